@@ -3,6 +3,7 @@
 """
 import pandas as pd
 import numpy as np
+from src.lib.stat_engine import grouped_stats
 
 # 读取数据
 df = pd.read_excel('666.xlsx')
@@ -19,36 +20,21 @@ dimensions = {
     'Дижитал контент бүтээх': ['5.1', '5.2']
 }
 
-# 创建结果列表
-results = []
+# 只保留数据中存在的题目
+valid_dimensions = {
+    dim_name: [q for q in questions if str(q) in df.columns]
+    for dim_name, questions in dimensions.items()
+}
 
-# 按年级分组计算
-for grade in sorted(df['class'].unique()):
-    grade_data = df[df['class'] == grade]
-    
-    row_data = {
-        'ZXaa': f'{int(grade)} анги'
-    }
-    
-    # 计算每个维度
-    for dim_name, questions in dimensions.items():
-        valid_questions = [q for q in questions if str(q) in df.columns]
-        
-        if valid_questions:
-            # 计算每个学生在该维度的平均分
-            dim_scores = grade_data[valid_questions].apply(pd.to_numeric, errors='coerce').mean(axis=1)
-            
-            # 计算该年级在该维度的均值和标准差
-            mean_val = dim_scores.mean()
-            std_val = dim_scores.std()
-            
-            row_data[f'{dim_name}_Дундаж'] = round(mean_val, 1)
-            row_data[f'{dim_name}_Стандарт'] = round(std_val, 1)
-    
-    results.append(row_data)
+# 一次 groupby 计算所有年级、所有维度的均值和标准差（维度得分 = 每个学生的题目平均分）
+grouped = grouped_stats(df, 'class', dimensions={k: v for k, v in valid_dimensions.items() if v})
 
 # 创建DataFrame
-result_df = pd.DataFrame(results)
+result_df = pd.DataFrame({'ZXaa': [f'{int(grade)} анги' for grade in grouped.table.index]})
+for dim_name in dimensions:
+    if valid_dimensions[dim_name]:
+        result_df[f'{dim_name}_Дундаж'] = grouped.stat(dim_name, 'mean').round(1).values
+        result_df[f'{dim_name}_Стандарт'] = grouped.stat(dim_name, 'std').round(1).values
 
 # 重新排列列顺序，使其与图片格式一致
 columns_order = ['ZXaa']
@@ -4,6 +4,7 @@
 """
 import pandas as pd
 import numpy as np
+from src.lib.stat_engine import grouped_stats
 
 # 读取数据
 df = pd.read_excel('666.xlsx')
@@ -20,37 +21,24 @@ dimensions = {
 # 将列名转换为字符串（避免数字列名问题）
 df.columns = [str(col) for col in df.columns]
 
-# 创建结果表
-results = []
+# 只保留数据中存在的题目（将列名转为字符串比较）
+valid_dimensions = {
+    dim_name: [q for q in questions if str(q) in df.columns]
+    for dim_name, questions in dimensions.items()
+}
 
-# 按年级分组
-for grade in sorted(df['class'].unique()):
-    grade_data = df[df['class'] == grade]
-    row = {'年级': f'{int(grade)} анги'}
-    
-    # 计算每个维度的均值和标准差
-    for dim_name, questions in dimensions.items():
-        # 确保题目列存在（将列名转为字符串比较）
-        valid_questions = [q for q in questions if str(q) in df.columns]
-        
-        if valid_questions:
-            # 计算该维度的平均分（每个学生的题目平均分）
-            dim_scores = grade_data[valid_questions].apply(pd.to_numeric, errors='coerce').mean(axis=1)
-            
-            # 计算均值和标准差
-            mean_val = dim_scores.mean()
-            std_val = dim_scores.std()
-            
-            row[f'{dim_name}_均值'] = round(mean_val, 1)
-            row[f'{dim_name}_标准差'] = round(std_val, 1)
-        else:
-            row[f'{dim_name}_均值'] = np.nan
-            row[f'{dim_name}_标准差'] = np.nan
-    
-    results.append(row)
+# 一次 groupby 计算所有年级、所有维度的统计量（维度得分 = 每个学生的题目平均分）
+grouped = grouped_stats(df, 'class', dimensions={k: v for k, v in valid_dimensions.items() if v})
 
-# 创建结果DataFrame
-result_df = pd.DataFrame(results)
+# 创建结果表
+result_df = pd.DataFrame({'年级': [f'{int(grade)} анги' for grade in grouped.table.index]})
+for dim_name in dimensions:
+    if valid_dimensions[dim_name]:
+        result_df[f'{dim_name}_均值'] = grouped.stat(dim_name, 'mean').round(1).values
+        result_df[f'{dim_name}_标准差'] = grouped.stat(dim_name, 'std').round(1).values
+    else:
+        result_df[f'{dim_name}_均值'] = np.nan
+        result_df[f'{dim_name}_标准差'] = np.nan
 
 # 显示结果
 print("=" * 100)
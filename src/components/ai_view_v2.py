@@ -24,21 +24,145 @@ AI 辅助分析模块：带 function calling 和结果展示
 - 第465-903行：render_ai_view() - 主渲染函数（包含6步流程）
 """
 import streamlit as st
-from openai import OpenAI
+from src.lib.ai_client import get_ai_client
 import json
 import pandas as pd
 import re
-from src.lib.stat_functions import independent_t_test, descriptive_stats, pearson_correlation
+from src.lib.stat_functions import (
+    independent_t_test, batch_t_test, descriptive_stats, pearson_correlation, multiple_choice_analysis,
+    run_tools
+)
 from src.lib.variable_labels import get_labels_context
+from src.lib.column_profile import get_profile
 from src.lib.i18n import get_lang
+from src.lib.result_summary import serialize_result
+from src.lib.prompt_builder import PromptBuilder, dataset_context, estimate_tokens, relevant_columns
 
 # 工具函数映射
 TOOL_FUNCTIONS = {
     "independent_t_test": independent_t_test,
+    "batch_t_test": batch_t_test,
     "descriptive_stats": descriptive_stats,
-    "pearson_correlation": pearson_correlation
+    "pearson_correlation": pearson_correlation,
+    "multiple_choice_analysis": multiple_choice_analysis
 }
 
+# 系统提示中的固定规则：这是AI的"使用说明书"，定义了它的能力、规则和输出格式
+# 与数据和问题无关，作为每轮相同的静态前缀（数据概况、值标签由 prompt_builder 追加在后面）
+SYSTEM_RULES = """你是 AIStats 的 AI 助手。
+
+🌍 **【重要】双语输出要求 / Хоёр хэлээр гаргах шаардлага**：
+你必须使用**汉语（中文）**和**西里尔蒙古语（Кирилл монгол хэл）**双语输出所有分析结果。
+
+**输出格式规范 / Гаралтын формат**：
+每段分析内容都要按以下格式：
+🇨🇳 [中文内容]
+🇲🇳 [Кирилл монгол хэлээр илэрхийлсэн агуулга]
+
+**统计学术语对照表 / Статистикийн нэр томъёо**：
+- 平均值 = Дундаж утга
+- 标准差 = Стандарт хазайлт  
+- 显著性 = Ач холбогдол
+- 相关性 = Хамаарал
+- 假设检验 = Таамаглалын шалгалт
+- t检验 = t шалгалт
+- 方差分析 = Дисперсийн шинжилгээ
+- 回归分析 = Регрессийн шинжилгээ
+- 频次 = Давтамж
+- 百分比 = Хувь
+- 差异 = Ялгаа
+- 样本量 = Түүврийн хэмжээ
+- 结论 = Дүгнэлт
+- 分析结果 = Шинжилгээний үр дүн
+
+**可用函数**：
+- independent_t_test: 比较两组均值差异
+- descriptive_stats: 描述统计（智能识别变量类型）
+  - 数值型连续变量：计算均值、标准差等
+  - 分类变量（包括数值型但设置了值标签的）：统计频次、占比
+  - 多选题（分号分隔）：统计各选项频次
+- pearson_correlation: 相关分析（变量超过30个时只返回相关最强的变量对）
+- batch_t_test: 批量两组比较（多个变量按同一分组变量一次检验，含多重比较校正；比较多个变量时优先使用）
+- multiple_choice_analysis: 多选题深入分析（选项共选关系、按分组对比各选项的选择人数）
+
+**核心规则**：
+1. 用户询问"统计"、"分析"、"频次"时 → **立即调用函数**，不要解释
+2. **可以使用关键词**：如"满意度"、"选项"、"类别"，系统会自动模糊匹配到完整变量名
+3. descriptive_stats 会**自动识别**变量类型（数值/分类/多选题），无需判断
+4. **严禁**输出：代码、表格数据、"让我..."、"实际效果"等
+5. **解释结果时必须同时显示数值和标签**：例如"3（一般）"而不是只说"一般"
+6. **必须列出所有值的频次**：包括频次为0的值
+7. 🔴 **学术规范（极其重要）**：任何结论前必须先说明统计依据
+8. 🌍 **双语输出（必须遵守）**：每段内容都要中蒙双语
+
+**关于值标签的使用**：
+- 值标签定义了变量的完整值域（例如：1=非常不满意，2=不满意，3=一般，4=满意，5=非常满意）
+- 统计结果会显示所有定义的值，包括频次为0的值
+- **解释时必须**：结合数值和标签，列出所有值的频次（包括0）
+- 格式："数值（标签）频次"，例如"3（一般）5人"
+
+**调用函数示例**（使用模糊匹配）：
+示例1：
+用户："统计满意度"
+→ 调用 descriptive_stats(["满意度"]) ← 使用关键词即可
+
+示例2：
+用户："分析选择题"
+→ 调用 descriptive_stats(["选择题"]) ← 使用关键词
+→ 系统会自动识别单选、多选、数值型
+
+**正确的回答方式**：
+- 函数会返回完整统计（包括频次为0的值）
+- 如果有值标签，必须在回复中显示"数值（标签）频次"
+- 例如："满意度分布：1（非常不满意）0人，2（不满意）3人，3（一般）5人，4（满意）8人，5（非常满意）4人。大部分人满意。"
+
+**关键要求**：
+✅ 列出所有值及其频次（包括频次为0的）
+✅ 数值和标签都要显示，格式：数值（标签）频次
+✅ 频次为0的值也要明确说明
+✅ 严格使用实际数据中的值标签，不要编造或使用示例标签
+
+**🔴 学术规范回答格式（必须遵守）**：
+
+正确格式：
+1. **先说明统计依据**（检验方法+统计量+p值+实际数据）
+2. **再给出结论**（因为XXX，所以YYY）
+
+🔴 **严禁编造数据**：
+- 必须使用函数返回的实际统计结果
+- 不要编造任何数字、百分比、统计量
+- 数据必须与统计结果完全一致
+
+示例1（相关分析）：
+✅ 正确："基于Pearson相关分析，r=0.65, p<0.001，所以父母监督程度与作业完成率之间存在显著的正相关关系。"
+❌ 错误："父母监督程度与作业完成率之间存在显著的正相关关系。"（缺少统计依据）
+
+示例2（t检验）：
+✅ 正确："根据独立样本t检验，t=3.45, p=0.002<0.05，所以男生和女生在成绩上存在显著差异。"
+❌ 错误："男生和女生在成绩上存在显著差异。"（缺少统计依据）
+
+示例3（描述统计/频次统计）：
+✅ 正确："根据频次统计，7年级7人（35%），8年级7人（35%），9年级6人（30%），所以7年级和8年级人数相同。"
+❌ 错误："7年级5人（25%），8年级10人（50%），9年级5人（25%）"（编造数据，与实际不符）
+❌ 错误："初二学生最多。"（缺少具体数据）
+
+**关键原则**：
+🔴 任何带有"显著"、"存在"、"差异"、"相关"等结论性词汇的语句
+🔴 必须在前面加上"基于XXX分析/检验，统计量=X, p=X，所以..."
+
+**错误示例**：
+❌ 只说描述性文字，不列出具体数值
+❌ 忽略频次为0的值
+❌ 只说标签不说数值
+❌ 只说数值不说标签
+❌ 使用不存在的值或标签
+❌ **编造数据**：给出的数字与统计结果不一致（极其严重的错误！）
+❌ **直接给结论，不说明统计依据**（严重错误）
+
+❌ 禁止：解释步骤、输出表格、显示代码"""
+
+_prompt_builder = PromptBuilder(SYSTEM_RULES)
+
 # 工具定义
 TOOLS = [
     {
@@ -56,6 +180,35 @@ TOOLS = [
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "batch_t_test",
+            "description": "一次比较多个变量在两组之间的差异（例如按性别比较所有题目），返回每个变量一行的结果表和多重比较校正后的 p 值。需要比较多个变量时用它代替多次调用 independent_t_test",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "group_var": {"type": "string", "description": "分组变量名（恰好2组）"},
+                    "data_vars": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "要比较的变量名列表；不填表示全部数值型变量"
+                    },
+                    "method": {
+                        "type": "string",
+                        "enum": ["student", "welch", "mannwhitney"],
+                        "description": "student：Student t 检验（默认）；welch：方差不齐时的 Welch t 检验；mannwhitney：非参数 Mann–Whitney U 检验"
+                    },
+                    "adjust": {
+                        "type": "string",
+                        "enum": ["holm", "bh", "none"],
+                        "description": "多重比较校正：holm（默认）、bh（Benjamini–Hochberg FDR）、none"
+                    }
+                },
+                "required": ["group_var"]
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -78,7 +231,7 @@ TOOLS = [
         "type": "function",
         "function": {
             "name": "pearson_correlation",
-            "description": "计算变量之间的 Pearson 相关系数",
+            "description": "计算变量之间的 Pearson 相关系数；变量超过30个时只返回相关最强的变量对和 |r| 分布摘要",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -91,6 +244,21 @@ TOOLS = [
                 "required": ["variables"]
             }
         }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "multiple_choice_analysis",
+            "description": "分析多选题（分号分隔）：各选项频次与百分比、选项之间的共选人数；指定分组变量时给出各组选择各选项的人数交叉表",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "variable": {"type": "string", "description": "多选题变量名"},
+                    "group_var": {"type": "string", "description": "分组变量名（可选）"}
+                },
+                "required": ["variable"]
+            }
+        }
     }
 ]
 
@@ -529,12 +697,86 @@ def display_stat_result(result, lang='zh'):
 - Эсвэл хувьсагч бүрийг тус тусад нь тайлбарлах дүрслэл (гистограмм, хайрцаг график)
                 """)
 
-def format_ai_response(content: str):
-    """格式化AI回复，高亮显示结论性语句"""
+    # 批量两组比较结果
+    elif isinstance(result, dict) and result.get("test_type") == "批量两组比较":
+        method_names = {"student": "Student t", "welch": "Welch t", "mannwhitney": "Mann–Whitney U"}
+        method = method_names.get(result["method"], result["method"])
+        if lang == 'zh':
+            st.markdown(f"### 📊 批量比较：{result['group1_name']} vs {result['group2_name']}（{method}）")
+        else:
+            st.markdown(f"### 📊 Бөөнөөр харьцуулах：{result['group1_name']} vs {result['group2_name']}（{method}）")
+        col1, col2 = st.columns(2)
+        col1.metric("检验变量数" if lang == 'zh' else "Хувьсагчийн тоо", result["n_variables"])
+        col2.metric(f"校正后显著（{result['adjust']}）" if lang == 'zh' else f"Залруулсны дараа ач холбогдолтой（{result['adjust']}）",
+                    result["n_significant"])
+        
+        table = pd.DataFrame(result["results"]).set_index("variable")
+        for col in ("p", "p_adjusted"):
+            table[col] = table[col].apply(lambda p: "" if pd.isna(p) else "< 0.001" if p < 0.001 else f"{p:.3f}")
+        st.dataframe(table, use_container_width=True)
+
+    # 宽数据相关筛选结果
+    elif isinstance(result, dict) and result.get("test_type") == "相关筛选":
+        summary = result["summary"]
+        title = f"### 📊 相关最强的 {len(result['top_pairs'])} 对变量" if lang == 'zh' else f"### 📊 Хамгийн хүчтэй хамааралтай {len(result['top_pairs'])} хос"
+        st.markdown(title)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("变量数" if lang == 'zh' else "Хувьсагчийн тоо", summary["n_variables"])
+        col2.metric("变量对" if lang == 'zh' else "Хосын тоо", summary["n_pairs"])
+        col3.metric("|r| ≥ 0.5", summary["abs_r_ge_0.5"])
+        col4.metric("|r| ≥ 0.7", summary["abs_r_ge_0.7"])
+        
+        pairs_df = pd.DataFrame(result["top_pairs"])
+        if not pairs_df.empty:
+            pairs_df["p"] = pairs_df["p"].apply(lambda p: "< 0.001" if p < 0.001 else f"{p:.3f}")
+        st.dataframe(pairs_df, use_container_width=True, hide_index=True)
+
+    # 多选题分析结果
+    elif isinstance(result, dict) and result.get("test_type") == "多选题分析":
+        title = f"### 📋 多选题：{result['variable']}" if lang == 'zh' else f"### 📋 Олон сонголттой асуулт：{result['variable']}"
+        st.markdown(title)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("有效回答" if lang == 'zh' else "Хүчинтэй хариулт", result["n"])
+        col2.metric("总选择次数" if lang == 'zh' else "Нийт сонголт", result["n_selections"])
+        col3.metric("人均选择" if lang == 'zh' else "Нэг хүнд ногдох", round(result["n_selections"] / result["n"], 2))
+        
+        if lang == 'zh':
+            freq_df = pd.DataFrame({
+                "选项": list(result["option_frequencies"].keys()),
+                "选择人数": list(result["option_frequencies"].values()),
+                "百分比(%)": [f"{result['option_percentages'][opt]:.1f}%" for opt in result["option_frequencies"]]
+            })
+        else:
+            freq_df = pd.DataFrame({
+                "Сонголт": list(result["option_frequencies"].keys()),
+                "Сонгосон хүн": list(result["option_frequencies"].values()),
+                "Хувь(%)": [f"{result['option_percentages'][opt]:.1f}%" for opt in result["option_frequencies"]]
+            })
+        st.dataframe(freq_df, use_container_width=True, hide_index=True)
+        
+        title = "### 🔗 共选矩阵" if lang == 'zh' else "### 🔗 Хамт сонгосон матриц"
+        st.markdown(title)
+        st.dataframe(pd.DataFrame(result["co_selection"]), use_container_width=True)
+        
+        if result.get("crosstab"):
+            title = f"### 📊 按 {result['group_var']} 分组" if lang == 'zh' else f"### 📊 {result['group_var']}-аар бүлэглэсэн"
+            st.markdown(title)
+            st.dataframe(pd.DataFrame(result["crosstab"]).T, use_container_width=True)
+
+def format_ai_response(content: str, streaming: bool = False):
+    """格式化AI回复，高亮显示结论性语句
+
+    streaming=True 时 content 是仍在增长的流式缓冲区：未闭合的代码块先不显示，
+    最后一句可能还没写完，按普通文本加光标显示，写完后再判断是否高亮。
+    """
     if not content:
         return
     
     # 过滤掉不应该显示的内容
+    # 0. 流式输出中尚未闭合的代码块（闭合后由下面的规则整体过滤）
+    if streaming and content.count("```") % 2 == 1:
+        content = content[:content.rfind("```")]
+    
     # 1. 过滤"undefined"
     content = content.replace("undefined", "").strip()
     
@@ -551,6 +793,7 @@ def format_ai_response(content: str):
     content = re.sub(r'descriptive_stats\([^)]*\)', '', content)
     content = re.sub(r'pearson_correlation\([^)]*\)', '', content)
     content = re.sub(r'multiple_choice_analysis\([^)]*\)', '', content)
+    content = re.sub(r'batch_t_test\([^)]*\)', '', content)
     
     # 4. 过滤"基于...结果："这类提示语
     content = re.sub(r'基于[^：]*检验结果[：:]\s*', '', content)
@@ -596,6 +839,9 @@ def format_ai_response(content: str):
     if len(sentences) % 2 == 1:
         full_sentences.append(sentences[-1])
     
+    # 流式输出时最后一句可能未完成
+    pending = full_sentences.pop() if streaming and full_sentences else ""
+    
     # 处理每个句子
     for sentence in full_sentences:
         sentence = sentence.strip()
@@ -616,6 +862,9 @@ def format_ai_response(content: str):
             # 普通显示（去掉前后空白）
             if sentence.strip():
                 st.markdown(f'<p style="margin: 0 0 8px 0;">{sentence}</p>', unsafe_allow_html=True)
+    
+    if streaming:
+        st.markdown(f'<p style="margin: 0 0 8px 0;">{pending.strip()}▌</p>', unsafe_allow_html=True)
 
 def render_ai_view():
     lang = get_lang()
@@ -741,6 +990,17 @@ def render_ai_view():
                             st.markdown("---")  # 分隔线
                     if 'content' in msg and msg['content']:
                         format_ai_response(msg['content'])
+                    if msg.get('input_tokens'):
+                        # 本轮输入 token（估算）、截掉的历史消息数及回复文字的首 token 延迟
+                        omitted = msg.get('omitted_messages', 0)
+                        first_token = msg.get('first_token_seconds')
+                        if lang == 'zh':
+                            caption = f"📊 本轮输入约 {msg['input_tokens']} tokens" + (f"，省略 {omitted} 条较早消息" if omitted else "")
+                            caption += f"，首个 token {first_token:.1f} 秒" if first_token is not None else ""
+                        else:
+                            caption = f"📊 Энэ удаагийн оролт ≈ {msg['input_tokens']} token" + (f"，{omitted} хуучин мессеж орхигдсон" if omitted else "")
+                            caption += f"，эхний token {first_token:.1f} сек" if first_token is not None else ""
+                        st.caption(caption)
     except Exception as e:
         error_text = f"❌ 显示对话历史时出错: {str(e)}" if lang == 'zh' else f"❌ Харилцан ярианы түүхийг харуулах үед алдаа гарлаа: {str(e)}"
         st.error(error_text)
@@ -773,139 +1033,27 @@ def render_ai_view():
         # 2.1 准备数据上下文
         # 功能：将当前数据集的基本信息传递给AI
         # 包括：数据行数、列数、变量名列表
+        # 列很多时只列出与最近问题相关的列（列名索引检索），其余列仍可模糊匹配调用
         data_context = ""
+        listed_columns = None
         if st.session_state.data is not None:
             df = st.session_state.data
-            # 创建简化的变量列表（用于AI参考）
-            columns_list = "\n".join([f"  - {col}" for col in df.columns])
-            data_context = f"""当前数据集：{len(df)}行，{len(df.columns)}列。
-
-**变量列表**（参考，调用函数时可以使用关键词模糊匹配）：
-{columns_list}
-
-💡 **模糊匹配功能**：
-- 可以使用简短的关键词，如"满意度"、"选项"、"类别"
-- 系统会自动匹配到完整的变量名
-- 不需要输入完整的变量名（包括括号、标点符号等）"""
+            # 创建简化的变量列表（用于AI参考），附带来自缓存列概况的类型提示
+            profile = get_profile(df)
+            listed_columns = relevant_columns(df.columns, st.session_state.chat_history)
+            data_context = dataset_context(
+                len(df), len(df.columns), {col: profile[col].type_hint() for col in listed_columns}
+            )
         
         # 2.2 获取值标签上下文
         # 功能：如果用户设置了值标签（如 1=是, 0=否），传递给AI
-        # 作用：让AI能理解数值的含义，在解释结果时使用标签
-        labels_context = get_labels_context()
+        # 作用：让AI能理解数值的含义，在解释结果时使用标签（只包含列出的变量）
+        labels_context = get_labels_context(listed_columns)
         
-        # 2.3 组装完整的系统提示词
-        # 这是AI的"使用说明书"，定义了它的能力、规则和输出格式
-        system_prompt = f"""你是 AIStats 的 AI 助手。{data_context}
-
-🌍 **【重要】双语输出要求 / Хоёр хэлээр гаргах шаардлага**：
-你必须使用**汉语（中文）**和**西里尔蒙古语（Кирилл монгол хэл）**双语输出所有分析结果。
-
-**输出格式规范 / Гаралтын формат**：
-每段分析内容都要按以下格式：
-🇨🇳 [中文内容]
-🇲🇳 [Кирилл монгол хэлээр илэрхийлсэн агуулга]
-
-**统计学术语对照表 / Статистикийн нэр томъёо**：
-- 平均值 = Дундаж утга
-- 标准差 = Стандарт хазайлт  
-- 显著性 = Ач холбогдол
-- 相关性 = Хамаарал
-- 假设检验 = Таамаглалын шалгалт
-- t检验 = t шалгалт
-- 方差分析 = Дисперсийн шинжилгээ
-- 回归分析 = Регрессийн шинжилгээ
-- 频次 = Давтамж
-- 百分比 = Хувь
-- 差异 = Ялгаа
-- 样本量 = Түүврийн хэмжээ
-- 结论 = Дүгнэлт
-- 分析结果 = Шинжилгээний үр дүн
-
-**可用函数**：
-- independent_t_test: 比较两组均值差异
-- descriptive_stats: 描述统计（智能识别变量类型）
-  - 数值型连续变量：计算均值、标准差等
-  - 分类变量（包括数值型但设置了值标签的）：统计频次、占比
-  - 多选题（分号分隔）：统计各选项频次
-- pearson_correlation: 相关分析
-
-**核心规则**：
-1. 用户询问"统计"、"分析"、"频次"时 → **立即调用函数**，不要解释
-2. **可以使用关键词**：如"满意度"、"选项"、"类别"，系统会自动模糊匹配到完整变量名
-3. descriptive_stats 会**自动识别**变量类型（数值/分类/多选题），无需判断
-4. **严禁**输出：代码、表格数据、"让我..."、"实际效果"等
-5. **解释结果时必须同时显示数值和标签**：例如"3（一般）"而不是只说"一般"
-6. **必须列出所有值的频次**：包括频次为0的值
-7. 🔴 **学术规范（极其重要）**：任何结论前必须先说明统计依据
-8. 🌍 **双语输出（必须遵守）**：每段内容都要中蒙双语
-
-**关于值标签的使用**：
-- 值标签定义了变量的完整值域（例如：1=非常不满意，2=不满意，3=一般，4=满意，5=非常满意）
-- 统计结果会显示所有定义的值，包括频次为0的值
-- **解释时必须**：结合数值和标签，列出所有值的频次（包括0）
-- 格式："数值（标签）频次"，例如"3（一般）5人"
-
-**调用函数示例**（使用模糊匹配）：
-示例1：
-用户："统计满意度"
-→ 调用 descriptive_stats(["满意度"]) ← 使用关键词即可
-
-示例2：
-用户："分析选择题"
-→ 调用 descriptive_stats(["选择题"]) ← 使用关键词
-→ 系统会自动识别单选、多选、数值型
-
-**正确的回答方式**：
-- 函数会返回完整统计（包括频次为0的值）
-- 如果有值标签，必须在回复中显示"数值（标签）频次"
-- 例如："满意度分布：1（非常不满意）0人，2（不满意）3人，3（一般）5人，4（满意）8人，5（非常满意）4人。大部分人满意。"
-
-**关键要求**：
-✅ 列出所有值及其频次（包括频次为0的）
-✅ 数值和标签都要显示，格式：数值（标签）频次
-✅ 频次为0的值也要明确说明
-✅ 严格使用实际数据中的值标签，不要编造或使用示例标签
-
-**🔴 学术规范回答格式（必须遵守）**：
-
-正确格式：
-1. **先说明统计依据**（检验方法+统计量+p值+实际数据）
-2. **再给出结论**（因为XXX，所以YYY）
-
-🔴 **严禁编造数据**：
-- 必须使用函数返回的实际统计结果
-- 不要编造任何数字、百分比、统计量
-- 数据必须与统计结果完全一致
-
-示例1（相关分析）：
-✅ 正确："基于Pearson相关分析，r=0.65, p<0.001，所以父母监督程度与作业完成率之间存在显著的正相关关系。"
-❌ 错误："父母监督程度与作业完成率之间存在显著的正相关关系。"（缺少统计依据）
-
-示例2（t检验）：
-✅ 正确："根据独立样本t检验，t=3.45, p=0.002<0.05，所以男生和女生在成绩上存在显著差异。"
-❌ 错误："男生和女生在成绩上存在显著差异。"（缺少统计依据）
-
-示例3（描述统计/频次统计）：
-✅ 正确："根据频次统计，7年级7人（35%），8年级7人（35%），9年级6人（30%），所以7年级和8年级人数相同。"
-❌ 错误："7年级5人（25%），8年级10人（50%），9年级5人（25%）"（编造数据，与实际不符）
-❌ 错误："初二学生最多。"（缺少具体数据）
-
-**关键原则**：
-🔴 任何带有"显著"、"存在"、"差异"、"相关"等结论性词汇的语句
-🔴 必须在前面加上"基于XXX分析/检验，统计量=X, p=X，所以..."
-
-**错误示例**：
-❌ 只说描述性文字，不列出具体数值
-❌ 忽略频次为0的值
-❌ 只说标签不说数值
-❌ 只说数值不说标签
-❌ 使用不存在的值或标签
-❌ **编造数据**：给出的数字与统计结果不一致（极其严重的错误！）
-❌ **直接给结论，不说明统计依据**（严重错误）
-
-❌ 禁止：解释步骤、输出表格、显示代码
-
-{labels_context if labels_context else ""}"""
+        # 2.3 组装系统提示词和消息列表
+        # 固定规则（SYSTEM_RULES）放在最前面且每轮相同，之后是数据概况和值标签；
+        # 对话历史按 token 预算从最近往前截取，放不下的旧消息只保留问题摘要
+        prompt = _prompt_builder.build(st.session_state.chat_history, data_context, labels_context)
         
         try:
             # ================================
@@ -914,23 +1062,16 @@ def render_ai_view():
             # 功能：将系统提示 + 历史对话 组装成完整的消息列表
             # 格式：[{role: 'system', content: '...'}, {role: 'user', content: '...'}, ...]
             
-            # 3.1 创建OpenAI客户端
-            # 使用用户配置的API Key和Base URL连接到AI服务
-            client = OpenAI(
-                api_key=st.session_state.ai_config['api_key'], 
-                base_url=st.session_state.ai_config['base_url']
-            )
+            # 3.1 获取OpenAI客户端
+            # 按用户配置的API Key和Base URL取共享客户端（复用连接池，不再每次新建）
+            client = get_ai_client(st.session_state.ai_config)
             
             # 3.2 组装消息列表
             # 结构：[系统消息] + [用户和AI的历史对话]
             # 系统消息（system）：定义AI的角色和能力
-            # 历史对话：包含之前所有的user和assistant消息
-            messages = [
-                {"role": "system", "content": system_prompt}  # 系统提示（只有一条）
-            ] + [
-                {"role": m['role'], "content": m.get('content', '')}  # 历史对话（可能有多条）
-                for m in st.session_state.chat_history
-            ]
+            # 历史对话：预算内最近的user和assistant消息（当前问题始终保留）
+            messages = prompt.messages
+            input_tokens = prompt.tokens.total  # 本轮发送的输入 token（估算）
             
             # ================================
             # 🎯 步骤4: 第一次API调用（核心）⭐
@@ -938,23 +1079,34 @@ def render_ai_view():
             # 目的：将用户问题发送到AI，让AI决定是否需要调用统计函数
             # 这是"双向绑定"机制的第一步：用户 → AI
             
+            # 流式输出：先显示用户的问题，AI 回复生成时逐段显示在下面的消息中
+            # （完成后 st.rerun() 会按对话历史重新显示完整回复）
+            with st.chat_message('user'):
+                st.markdown(user_input)
+            live_reply = st.chat_message('assistant').empty()
+            
+            def show_partial(buffer):
+                with live_reply.container():
+                    format_ai_response(buffer, streaming=True)
+            
             spinner_text = "AI 分析中..." if lang == 'zh' else "AI шинжилж байна..."
             with st.spinner(spinner_text):
-                # 4.1 调用OpenAI API（第一次）
+                # 4.1 调用OpenAI API（第一次，流式）
                 # 参数说明：
                 # - model: 使用的AI模型（如 deepseek-chat）
                 # - messages: 上面组装的消息列表（包含系统提示+历史对话）
                 # - tools: 可用的工具列表（9个统计函数的定义）
                 # - tool_choice: "auto" 表示让AI自动决定是否调用工具
-                response = client.chat.completions.create(
+                assistant_message = client.stream_chat(
                     model=st.session_state.ai_config['model'],
                     messages=messages,
                     tools=TOOLS,  # 传递工具定义，让AI知道有哪些函数可以调用
                     tool_choice="auto"  # 让AI自动判断是否需要调用工具
                 )
                 
-                # 4.2 获取AI的响应
-                assistant_message = response.choices[0].message
+                # 4.2 读取AI的响应（文字边生成边显示；工具调用在流结束后拼接完整）
+                assistant_message.collect(show_partial)
+                first_token = assistant_message.time_to_first_token  # 直接回复时的首 token 延迟（秒）
                 stat_results = []  # 用于保存所有统计函数的执行结果
                 
                 # ================================
@@ -969,20 +1121,23 @@ def render_ai_view():
                 if assistant_message.tool_calls:
                     function_results = []  # 存储函数执行结果的文本描述
                     
-                    # 5.2 遍历所有工具调用（可能有多个）
+                    # 5.2 解析所有工具调用（可能有多个）
                     # 例如：AI可能同时调用 descriptive_stats 和 correlation
+                    calls = []
                     for tool_call in assistant_message.tool_calls:
                         # 解析函数名和参数
-                        function_name = tool_call.function.name  # 例如："independent_t_test"
-                        function_args = json.loads(tool_call.function.arguments)  # 例如：{"data_var": "...", "group_var": "..."}
-                        
-                        # 5.3 执行实际的统计函数
+                        function_name = tool_call.name  # 例如："independent_t_test"
+                        function_args = json.loads(tool_call.arguments)  # 例如：{"data_var": "...", "group_var": "..."}
                         # TOOL_FUNCTIONS 是一个字典，包含所有可调用的统计函数
-                        # 例如：TOOL_FUNCTIONS["independent_t_test"](data_var="...", group_var="...")
                         if function_name in TOOL_FUNCTIONS:
-                            result = TOOL_FUNCTIONS[function_name](**function_args)  # 执行统计计算
-                            stat_results.append(result)  # 保存结果（用于显示统计表格）
-                            function_results.append(f"{function_name}: {json.dumps(result, ensure_ascii=False)}")  # 保存结果文本（用于传递给AI）
+                            calls.append((function_name, function_args))
+                    
+                    # 5.3 执行实际的统计函数
+                    # 多个调用并行计算，结果按调用顺序返回；函数和参数都相同的调用只计算一次
+                    results = run_tools([(TOOL_FUNCTIONS[name], args) for name, args in calls])
+                    for (function_name, _), result in zip(calls, results):
+                        stat_results.append(result)  # 保存结果（用于显示统计表格）
+                        function_results.append(f"{function_name}: {serialize_result(result)}")  # 保存结果摘要（用于传递给AI，完整结果只在本地显示）
                     
                     # ================================
                     # 🎯 步骤6: 第二次API调用（让AI解读结果）⭐
@@ -1049,17 +1204,19 @@ def render_ai_view():
 不要包含代码或表格。"""
                     })
                     
-                    # 6.4 调用OpenAI API（第二次）
+                    # 6.4 调用OpenAI API（第二次，流式）
                     # 这次调用的目的是让AI解读统计结果
                     # messages 现在包含：系统提示 + 历史对话 + 统计结果 + 解释要求
-                    final_response = client.chat.completions.create(
+                    input_tokens += sum(estimate_tokens(m['content']) for m in messages)
+                    final_response = client.stream_chat(
                         model=st.session_state.ai_config['model'],
                         messages=messages  # 包含了统计结果的完整对话
                     )
                     
-                    # 6.5 获取AI的解释文字
+                    # 6.5 获取AI的解释文字（边生成边显示）
                     # 这就是最终显示给用户的通俗易懂的分析结果
-                    assistant_content = final_response.choices[0].message.content
+                    assistant_content = final_response.collect(show_partial)
+                    first_token = final_response.time_to_first_token
                     
                     # ================================
                     # ✅ 双向绑定流程完成！
@@ -1109,6 +1266,10 @@ def render_ai_view():
                         msg['stat_results'] = stat_results  # 多个结果
                 if assistant_content:
                     msg['content'] = assistant_content
+                msg['input_tokens'] = input_tokens
+                msg['omitted_messages'] = prompt.tokens.omitted_messages
+                if first_token is not None:
+                    msg['first_token_seconds'] = round(first_token, 2)
                 
                 # 只有在有内容时才添加到历史记录
                 if stat_results or assistant_content:
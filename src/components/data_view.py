@@ -3,8 +3,29 @@ import streamlit as st
 import pandas as pd
 import io
 from src.lib.variable_labels import get_value_labels
+from src.lib.dataset_store import get_dataset_store
+from src.lib.incremental import running_stats, append_rows
+from src.lib.quantiles import rank_error, AUTO_SKETCH_MIN
+from src.lib.data_import import (
+    read_table, read_csv_chunked, sample_remaining_rows, is_columnar, table_columns, write_table,
+    optimize_dtypes
+)
 from src.lib.i18n import t, get_lang
 
+# 超过该大小的 CSV 自动使用分块流式导入
+STREAMING_THRESHOLD_MB = 50
+
+
+def _optimized(parse):
+    """解析后执行类型优化；报告随数据保存在 attrs 中，复用共享数据时同样可见"""
+    def parse_and_optimize(raw):
+        frame = parse(raw)
+        optimized, report = optimize_dtypes(frame)
+        optimized.attrs['dtype_report'] = report
+        return optimized
+    return parse_and_optimize
+
+
 def render_data_view():
     lang = get_lang()
     
@@ -46,11 +67,11 @@ def render_data_view():
     col_import1, col_import2 = st.columns([3, 1])
     with col_import1:
         label_text = "选择数据文件" if lang == 'zh' else "Өгөгдлийн файл сонгох"
-        help_text = "支持 CSV、Excel 格式" if lang == 'zh' else "CSV, Excel форматыг дэмжинэ"
+        help_text = "支持 CSV、Excel、Parquet、Feather 格式" if lang == 'zh' else "CSV, Excel, Parquet, Feather форматыг дэмжинэ"
         st.caption(label_text)
         uploaded_file = st.file_uploader(
             label_text,
-            type=['csv', 'xlsx', 'xls'],
+            type=['csv', 'xlsx', 'xls', 'parquet', 'feather'],
             help=help_text,
             label_visibility="collapsed"
         )
@@ -62,7 +83,11 @@ def render_data_view():
             example_file = "中学生作业数据_Homework_Data.csv"
             if os.path.exists(example_file):
                 try:
-                    df = pd.read_csv(example_file)
+                    with open(example_file, 'rb') as f:
+                        raw = f.read()
+                    df, data_key = get_dataset_store().load(
+                        raw, example_file, _optimized(lambda b: read_table(b, example_file)), ('optimized',)
+                    )
                     
                     # 检查是否有旧标签和对话
                     old_data_name = st.session_state.get('data_name')
@@ -79,6 +104,7 @@ def render_data_view():
                         st.info(info_text)
                     
                     st.session_state.data = df
+                    st.session_state.data_key = data_key
                     st.session_state.data_name = example_file
                     success_text = f"✅ 成功加载示例数据：{example_file}" if lang == 'zh' else f"✅ Жишээ өгөгдлийг амжилттай ачааллаа：{example_file}"
                     st.success(success_text)
@@ -90,18 +116,76 @@ def render_data_view():
                 warning_text = f"⚠️ 示例数据文件不存在：{example_file}" if lang == 'zh' else f"⚠️ Жишээ өгөгдлийн файл байхгүй байна：{example_file}"
                 st.warning(warning_text)
     
+    # 大文件导入选项（仅 CSV）
+    expander_title = "⚙️ 大文件导入选项" if lang == 'zh' else "⚙️ Том файл импортлох тохиргоо"
+    with st.expander(expander_title, expanded=False):
+        label_text = "分块流式导入 CSV" if lang == 'zh' else "CSV-г хэсэгчлэн урсгалаар импортлох"
+        help_text = (f"逐块读取并压缩数值类型，显示进度；超过 {STREAMING_THRESHOLD_MB} MB 的 CSV 自动启用"
+                     if lang == 'zh' else
+                     f"Хэсэгчлэн уншиж, тоон төрлийг шахна; {STREAMING_THRESHOLD_MB} MB-аас том CSV-д автоматаар идэвхжинэ")
+        streaming = st.checkbox(label_text, value=False, help=help_text)
+        label_text = "导入后自动优化数据类型" if lang == 'zh' else "Импортын дараа өгөгдлийн төрлийг автоматаар оновчлох"
+        help_text = ("数值列无损降精度，重复值多的文本列转为类别型，显著减少内存"
+                     if lang == 'zh' else
+                     "Тоон баганыг алдагдалгүй багасгаж, давтагдсан текстийг ангилал болгон санах ойг хэмнэнэ")
+        optimize = st.checkbox(label_text, value=True, help=help_text)
+        col_opt1, col_opt2, col_opt3 = st.columns(3)
+        with col_opt1:
+            label_text = "最多读取行数（0=不限）" if lang == 'zh' else "Хамгийн их мөр (0=хязгааргүй)"
+            max_rows = st.number_input(label_text, min_value=0, value=0, step=10000)
+        with col_opt2:
+            label_text = "内存上限 MB（0=不限）" if lang == 'zh' else "Санах ойн хязгаар MB (0=хязгааргүй)"
+            max_memory_mb = st.number_input(label_text, min_value=0, value=0, step=100)
+        with col_opt3:
+            label_text = "每块行数" if lang == 'zh' else "Хэсэг бүрийн мөр"
+            chunksize = st.number_input(label_text, min_value=1000, value=50000, step=10000)
+    
     if uploaded_file is not None:
         try:
-            # 根据文件类型读取
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            elif uploaded_file.name.endswith('.xlsx'):
-                df = pd.read_excel(uploaded_file, engine='openpyxl')
-            elif uploaded_file.name.endswith('.xls'):
-                df = pd.read_excel(uploaded_file, engine='xlrd')
-            
-            # 将数字列名转换为字符串，避免类型错误
-            df.columns = [str(col) for col in df.columns]
+            # 按文件内容从共享仓库取数据：相同文件在所有会话中只解析一次
+            file_name = uploaded_file.name
+            raw = uploaded_file.getvalue()
+            use_streaming = file_name.lower().endswith('.csv') and (
+                streaming or max_rows > 0 or max_memory_mb > 0
+                or len(raw) > STREAMING_THRESHOLD_MB * 1024 * 1024
+            )
+            if use_streaming:
+                progress_text = "正在分块读取…" if lang == 'zh' else "Хэсэгчлэн уншиж байна…"
+                progress_bar = st.progress(0.0, text=progress_text)
+
+                def report_progress(fraction, rows):
+                    text = (f"正在分块读取… 已读 {rows:,} 行" if lang == 'zh'
+                            else f"Хэсэгчлэн уншиж байна… {rows:,} мөр")
+                    progress_bar.progress(fraction, text=text)
+
+                def parse_streaming(b):
+                    frame, report = read_csv_chunked(
+                        b, chunksize=int(chunksize), max_rows=int(max_rows) or None,
+                        max_memory_mb=max_memory_mb or None, progress=report_progress
+                    )
+                    frame.attrs['import_report'] = report
+                    return frame
+
+                parse = parse_streaming
+                options = ('chunked', int(max_rows), int(max_memory_mb))
+            elif is_columnar(file_name):
+                # 列式文件只读结构，让用户选择需要的列后按列加载
+                all_columns = table_columns(raw, file_name)
+                label_text = "选择要加载的列" if lang == 'zh' else "Ачаалах баганыг сонгох"
+                help_text = "只加载选中的列，未选择时加载全部" if lang == 'zh' else "Зөвхөн сонгосон баганыг ачаална; сонгоогүй бол бүгдийг"
+                selected_columns = st.multiselect(label_text, all_columns, help=help_text)
+                columns = tuple(selected_columns) if selected_columns else None
+                parse = lambda b: read_table(b, file_name, columns)
+                options = ('columns', columns)
+            else:
+                parse = lambda b: read_table(b, file_name)
+                options = ()
+            if optimize:
+                parse = _optimized(parse)
+                options += ('optimized',)
+            df, data_key = get_dataset_store().load(raw, file_name, parse, options)
+            if use_streaming:
+                progress_bar.empty()
             
             # 检查是否有旧的数据和标签
             old_data_name = st.session_state.get('data_name')
@@ -140,13 +224,45 @@ def render_data_view():
                             st.info(info_text)
                     st.stop()
             
-            st.session_state.data = df
+            # 同一文件在重跑时沿用已有句柄，保持数据对象（及其结果缓存指纹）不变
+            if st.session_state.get('data_key') != data_key or st.session_state.data is None:
+                st.session_state.data = df
+                st.session_state.data_key = data_key
             st.session_state.data_name = uploaded_file.name
             # 清除标志
             if 'clear_labels_on_new_data' in st.session_state:
                 del st.session_state.clear_labels_on_new_data
             success_text = f"✅ 成功导入数据：{uploaded_file.name}" if lang == 'zh' else f"✅ Өгөгдлийг амжилттай оруулсан：{uploaded_file.name}"
             st.success(success_text)
+
+            # 达到行数/内存上限时，剩余部分可以随机抽样追加
+            report = df.attrs.get('import_report')
+            if report and report['truncated']:
+                if lang == 'zh':
+                    reason = "行数上限" if report['stop_reason'] == "max_rows" else "内存上限"
+                    st.warning(f"⚠️ 已达到{reason}，只导入了前 {report['rows_read']:,} 行")
+                else:
+                    st.warning(f"⚠️ Хязгаарт хүрсэн тул эхний {report['rows_read']:,} мөрийг л импортлосон")
+                col_sample1, col_sample2 = st.columns([2, 1])
+                with col_sample1:
+                    label_text = "从剩余部分随机抽样行数" if lang == 'zh' else "Үлдсэн хэсгээс санамсаргүй түүвэрлэх мөр"
+                    sample_n = st.number_input(label_text, min_value=1, value=10000, step=1000)
+                with col_sample2:
+                    st.markdown("<div style='margin-top: 28px;'></div>", unsafe_allow_html=True)
+                    btn_text = "🎲 抽样并追加" if lang == 'zh' else "🎲 Түүвэрлэж нэмэх"
+                    if st.button(btn_text, use_container_width=True):
+                        spinner_text = "正在抽样…" if lang == 'zh' else "Түүвэрлэж байна…"
+                        with st.spinner(spinner_text):
+                            # 之前追加过的抽样行不再重复抽取
+                            already_sampled = len(st.session_state.data) - report['rows_read']
+                            sample = sample_remaining_rows(raw, report['rows_read'], int(sample_n), chunksize=int(chunksize),
+                                                           already_sampled=already_sampled)
+                            # 已有的增量统计只用新增行更新
+                            combined = append_rows(st.session_state.data, sample)
+                        # data_key 不变：重跑时不会被仓库句柄覆盖；新对象会重新计算结果缓存指纹
+                        st.session_state.data = combined
+                        success_text = f"✅ 已追加 {len(sample):,} 行抽样数据" if lang == 'zh' else f"✅ {len(sample):,} мөр түүврийн өгөгдөл нэмлээ"
+                        st.success(success_text)
         except Exception as e:
             error_text = f"❌ 数据导入失败：{str(e)}" if lang == 'zh' else f"❌ Өгөгдөл оруулах амжилтгүй：{str(e)}"
             st.error(error_text)
@@ -192,7 +308,44 @@ def render_data_view():
             st.metric(label, st.session_state.data_name or unnamed)
         with col4:
             label = "内存占用" if lang == 'zh' else "Санах ойн эзэлхүүн"
-            st.metric(label, f"{df.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB")
+            memory_mb = df.memory_usage(deep=True).sum() / 1024 / 1024
+            dtype_report = df.attrs.get('dtype_report')
+            if dtype_report and dtype_report['memory_after'] < dtype_report['memory_before']:
+                # 相对于未优化类型时的内存变化
+                saved_mb = (dtype_report['memory_before'] - dtype_report['memory_after']) / 1024 / 1024
+                help_text = (f"类型优化前 {dtype_report['memory_before'] / 1024 / 1024:.2f} MB"
+                             if lang == 'zh' else
+                             f"Оновчлохоос өмнө {dtype_report['memory_before'] / 1024 / 1024:.2f} MB")
+                st.metric(label, f"{memory_mb:.2f} MB", delta=f"-{saved_mb:.2f} MB", delta_color="inverse", help=help_text)
+            else:
+                st.metric(label, f"{memory_mb:.2f} MB")
+        
+        # 共享数据集仓库状态（所有会话共用）
+        expander_title = "🗄️ 共享数据集缓存" if lang == 'zh' else "🗄️ Хуваалцсан өгөгдлийн кэш"
+        with st.expander(expander_title, expanded=False):
+            store_stats = get_dataset_store().stats()
+            if store_stats:
+                if lang == 'zh':
+                    columns = {"name": "文件", "rows": "行数", "columns": "列数", "memory_mb": "内存(MB)", "refcount": "引用会话", "hits": "复用次数"}
+                else:
+                    columns = {"name": "Файл", "rows": "Мөр", "columns": "Багана", "memory_mb": "Санах ой(MB)", "refcount": "Лавлагаа", "hits": "Дахин ашигласан"}
+                stats_df = pd.DataFrame(store_stats)[list(columns)].rename(columns=columns)
+                st.dataframe(stats_df, use_container_width=True, hide_index=True)
+        
+        # 导入时的类型优化明细
+        dtype_report = df.attrs.get('dtype_report')
+        if dtype_report and dtype_report['changed']:
+            expander_title = "🧮 类型优化明细" if lang == 'zh' else "🧮 Төрөл оновчлолын дэлгэрэнгүй"
+            with st.expander(expander_title, expanded=False):
+                if lang == 'zh':
+                    columns = ["变量", "原类型", "优化后"]
+                else:
+                    columns = ["Хувьсагч", "Анхны төрөл", "Оновчилсон"]
+                changed_df = pd.DataFrame(
+                    [(col, old, new) for col, (old, new) in dtype_report['changed'].items()],
+                    columns=columns
+                )
+                st.dataframe(changed_df, use_container_width=True, hide_index=True)
         
         # 数据表格
         # 根据切换状态决定显示内容
@@ -231,9 +384,22 @@ def render_data_view():
             if st.button(btn_text, use_container_width=True, type="primary"):
                 subheader_text = "📋 数值型变量描述统计" if lang == 'zh' else "📋 Тоон хувьсагчийн тайлбарлах статистик"
                 st.subheader(subheader_text)
-                numeric_df = df.select_dtypes(include=['int64', 'float64'])
-                if len(numeric_df.columns) > 0:
-                    st.dataframe(numeric_df.describe(), use_container_width=True)
+                if len(df) < AUTO_SKETCH_MIN:
+                    # 行数不多时直接精确计算
+                    numeric_df = df.select_dtypes(include='number')
+                    table = numeric_df.describe() if len(numeric_df.columns) > 0 else None
+                    approximate = False
+                else:
+                    # 大数据：增量统计，数据追加后只处理新增行；分位数来自草图
+                    stats_state = running_stats(df)
+                    table = stats_state.describe() if stats_state.columns else None
+                    approximate = stats_state.approximate
+                if table is not None:
+                    st.dataframe(table, use_container_width=True)
+                    if approximate:
+                        caption_text = (f"25%/50%/75% 分位数为近似值（秩误差约 ±{rank_error():.1%}）" if lang == 'zh'
+                                        else f"25%/50%/75% квантиль ойролцоо утга（зэрэглэлийн алдаа ±{rank_error():.1%}）")
+                        st.caption(caption_text)
                 else:
                     warning_text = "⚠️ 数据集中没有数值型变量" if lang == 'zh' else "⚠️ Өгөгдлийн багцад тоон хувьсагч байхгүй байна"
                     st.warning(warning_text)
@@ -244,6 +410,7 @@ def render_data_view():
             if st.button(btn_text, use_container_width=True, type="secondary"):
                 if st.session_state.get('confirm_delete', False):
                     st.session_state.data = None
+                    st.session_state.data_key = None
                     st.session_state.data_name = None
                     st.session_state.stat_result = None
                     # 同时清除标签和对话历史
@@ -271,7 +438,7 @@ def render_data_view():
             help_text = "选择导出的文件格式" if lang == 'zh' else "Экспортлох файлын форматыг сонгох"
             export_format = st.selectbox(
                 label_text, 
-                ["CSV", "Excel"],
+                ["CSV", "Excel", "Parquet", "Feather"],
                 help=help_text
             )
         
@@ -304,6 +471,11 @@ def render_data_view():
                     data_bytes = buffer.getvalue()
                     mime = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
                     ext = 'xlsx'
+                elif export_format in ("Parquet", "Feather"):
+                    # 列式格式保留列类型，重新导入时无需解析文本
+                    data_bytes = write_table(df, export_format)
+                    mime = 'application/octet-stream'
+                    ext = export_format.lower()
 
                 download_label = f"⬇️ 下载 {export_format} 文件" if lang == 'zh' else f"⬇️ {export_format} файл татах"
                 st.download_button(
@@ -254,7 +254,7 @@ AI ямар график ашиглахыг хэлнэ, дараа нь `📈 Г
 3. 找到你电脑里的Excel或CSV文件
 4. 选中，点打开
 
-🎯 支持 `.xlsx`、`.xls`、`.csv` 格式
+🎯 支持 `.xlsx`、`.xls`、`.csv`、`.parquet`、`.feather` 格式
                 """)
             st.markdown("---")
             st.markdown("### ❓ 常见问题")
@@ -308,7 +308,7 @@ Excel хүснэгтийг төсөөлөөрэй：
 3. Компьютер дээрээс Excel эсвэл CSV файл олох
 4. Сонгоод, нээх дарах
 
-🎯 `.xlsx`、`.xls`、`.csv` форматыг дэмжинэ
+🎯 `.xlsx`、`.xls`、`.csv`、`.parquet`、`.feather` форматыг дэмжинэ
                 """)
             st.markdown("---")
             st.markdown("### ❓ Түгээмэл асуултууд")
@@ -4,6 +4,7 @@ from src.lib.variable_labels import (
     set_value_labels, get_value_labels,
     get_labels_context, clear_variable_labels
 )
+from src.lib.column_profile import get_profile, sorted_values
 from src.lib.i18n import get_lang
 
 def render_label_view():
@@ -68,14 +69,11 @@ def render_label_view():
             key="label_var_select"
         )
         
-        # 显示变量的唯一值（安全排序）
-        unique_vals_list = df[var_to_label].dropna().unique().tolist()
-        # 检查是否全是数字
-        all_numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in unique_vals_list)
-        if all_numeric:
-            unique_values = sorted(unique_vals_list)
-        else:
-            unique_values = sorted(unique_vals_list, key=str)
+        # 显示变量的唯一值（安全排序，来自缓存的列概况，重跑时不再排序）
+        unique_values = get_profile(df)[var_to_label].values
+        if unique_values is None:
+            unique_values = sorted_values(df[var_to_label].dropna().unique().tolist())
+        unique_value_set = set(unique_values)
         if lang == 'zh':
             st.info(f"📊 变量 **{var_to_label}** 的数据中出现的值: {', '.join(map(str, unique_values))}")
         else:
@@ -95,7 +93,7 @@ def render_label_view():
         current_labels = get_value_labels(var_to_label)
         
         # 合并：数据中的值 + 已设置标签的值 + 手动添加的值
-        all_values = set(unique_values)
+        all_values = set(unique_value_set)
         if current_labels:
             all_values.update(current_labels.keys())
         # 添加手动添加的值
@@ -178,7 +176,7 @@ def render_label_view():
                 default_label = current_labels.get(val_key, "")
                 
                 # 标记数据中是否出现
-                in_data = val in unique_values
+                in_data = val in unique_value_set
                 if in_data:
                     label_suffix = ""
                 else:
@@ -3,7 +3,8 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from openai import OpenAI
+from src.lib.ai_client import get_ai_client
+from src.lib.response_cache import get_response_cache, response_key
 from src.lib.variable_labels import get_value_labels
 from src.lib.i18n import get_lang
 
@@ -39,10 +40,7 @@ def get_ai_chart_analysis(chart_data, chart_type):
         return None
     
     try:
-        client = OpenAI(
-            api_key=st.session_state.ai_config['api_key'],
-            base_url=st.session_state.ai_config['base_url']
-        )
+        client = get_ai_client(st.session_state.ai_config)
         
         # 构建提示词
         if chart_type == "scatter_with_trend":
@@ -148,10 +146,8 @@ def get_ai_chart_analysis(chart_data, chart_type):
         else:
             return None
         
-        response = client.chat.completions.create(
-            model=st.session_state.ai_config['model'],
-            messages=[
-                {"role": "system", "content": """你是一个数据可视化专家，擅长用简单的语言解读图表。
+        messages = [
+            {"role": "system", "content": """你是一个数据可视化专家，擅长用简单的语言解读图表。
 
 🌍 **【重要】双语输出要求**：
 你必须使用**汉语（中文）**和**西里尔蒙古语（Кирилл монгол хэл）**双语输出所有分析结果。
@@ -162,12 +158,28 @@ def get_ai_chart_analysis(chart_data, chart_type):
 
 **图表术语对照**：
 趋势=Чиг хандлага, 上升=Өсөлт, 下降=Бууралت, 分布=Тархалт, 相关=Хамаарал"""},
-                {"role": "user", "content": prompt + "\n\n🌍 请务必使用双语输出（中文+西里尔蒙文）！"}
-            ],
+            {"role": "user", "content": prompt + "\n\n🌍 请务必使用双语输出（中文+西里尔蒙文）！"}
+        ]
+        
+        # 相同的提示词直接使用磁盘缓存中的解读
+        cache = get_response_cache()
+        cache_key = response_key(st.session_state.ai_config, messages, get_lang())
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # 流式输出：解读生成时先逐段显示，完成后由调用方按结论显示
+        placeholder = st.empty()
+        response = client.stream_chat(
+            model=st.session_state.ai_config['model'],
+            messages=messages,
             temperature=0.7
         )
         
-        return response.choices[0].message.content
+        analysis = response.collect(lambda text: placeholder.info(text + "▌"))
+        placeholder.empty()
+        cache.put(cache_key, analysis)
+        return analysis
         
     except Exception as e:
         st.error(f"AI分析失败：{str(e)}")
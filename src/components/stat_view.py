@@ -1,23 +1,178 @@
 """统计视图模块：描述统计/t检验/方差分析/相关回归/信度/中介效应"""
+import time
 import streamlit as st
 import pandas as pd
 import numpy as np
-from scipy import stats
-from scipy.stats import f_oneway, levene
-import statsmodels.api as sm
-from openai import OpenAI
+try:
+    import statsmodels.api as sm  # 可选：仅用于"完整回归报告"
+except ImportError:
+    sm = None
+from src.lib.ai_client import get_ai_client
+from src.lib.response_cache import get_response_cache, response_key
+from src.lib import stat_engine
+from src.lib.stat_engine import StatError
+from src.lib.result_cache import cached_analysis, analysis_key, get_result_cache
+from src.lib.job_runner import get_job_runner, DONE as JOB_DONE, CANCELLED as JOB_CANCELLED
+from src.lib.stat_functions import job_owner
+from src.lib.correlation import WIDE_CORRELATION_LIMIT
+from src.lib.column_profile import get_profile
 from src.lib.i18n import get_lang
 
+# 批量两组比较的方法名称
+BATCH_METHOD_NAMES = {"student": "Student t", "welch": "Welch t", "mannwhitney": "Mann–Whitney U"}
+BATCH_ADJUST_NAMES = {"holm": "Holm", "bh": "Benjamini–Hochberg (FDR)", "none": "不校正 / Залруулгагүй"}
+# 行数超过该值时描述统计提供近似分位数选项
+APPROX_QUANTILE_ROWS = 1_000_000
+QUANTILE_METHOD_NAMES = {"exact": ("精确", "Яг"), "sketch": ("近似（KLL 草图）", "Ойролцоо（KLL）")}
+# 等待后台任务时刷新进度的间隔（秒）
+JOB_POLL_INTERVAL = 0.5
+
+def _resampling_controls(key, lang, default=False):
+    """重抽样选项：是否启用、重抽样次数、随机种子"""
+    label = "Bootstrap 置信区间 / 置换检验" if lang == 'zh' else "Bootstrap итгэлцлийн интервал / сэлгэмэл шалгалт"
+    enabled = st.checkbox(label, value=default, key=f"{key}_resample")
+    n_resamples, seed = 2000, 0
+    if enabled:
+        col1, col2 = st.columns(2)
+        label = "重抽样次数 B" if lang == 'zh' else "Дахин түүвэрлэлтийн тоо B"
+        n_resamples = col1.number_input(label, min_value=100, max_value=100_000, value=2000, step=500,
+                                        key=f"{key}_n_resamples")
+        label = "随机种子" if lang == 'zh' else "Санамсаргүй үр"
+        seed = col2.number_input(label, min_value=0, value=0, step=1, key=f"{key}_seed")
+    return enabled, int(n_resamples), int(seed)
+
+def _submit_job(key, df, func, label, **kwargs):
+    """把分析提交为后台任务，任务号记在 st.session_state[f"{key}_job"]；替换掉同一位置之前的任务"""
+    runner = get_job_runner()
+    job_id = runner.submit(df, func, owner=job_owner(), label=label, **kwargs)
+    previous = st.session_state.get(f"{key}_job")
+    if previous and previous != job_id:
+        runner.cancel(previous, job_owner())
+    st.session_state[f"{key}_job"] = job_id
+    return job_id
+
+def _await_job(key, lang):
+    """显示后台任务的进度和取消按钮
+
+    返回任务结果；没有任务、任务仍在计算、失败或被取消时返回 None。任务未结束时只显示
+    一次当前进度，不在脚本线程中等待（取消按钮和页面上的其他操作保持可用）；
+    页面末尾的 _poll_jobs 隔 JOB_POLL_INTERVAL 秒重跑页面，刷新进度并取回结果。
+    """
+    job_id = st.session_state.get(f"{key}_job")
+    if job_id is None:
+        return None
+    runner = get_job_runner()
+    status = runner.status(job_id)
+    if status is None:
+        del st.session_state[f"{key}_job"]
+        return None
+    
+    if not status.finished:
+        label = "⏹️ 取消计算" if lang == 'zh' else "⏹️ Тооцооллыг цуцлах"
+        if st.button(label, key=f"{key}_job_cancel"):
+            runner.cancel(job_id, job_owner())
+            status = runner.status(job_id)
+    if not status.finished:
+        text = (f"⏳ {status.label}：后台计算中 {status.progress:.0%}（{status.elapsed:.0f} 秒）" if lang == 'zh'
+                else f"⏳ {status.label}：тооцоолж байна {status.progress:.0%}（{status.elapsed:.0f} сек）")
+        st.progress(min(max(status.progress, 0.0), 1.0), text=text)
+        st.session_state.job_poll = True
+        return None
+    
+    if status.state == JOB_DONE:
+        return status.result
+    del st.session_state[f"{key}_job"]
+    if status.state == JOB_CANCELLED:
+        st.warning("⏹️ 计算已取消" if lang == 'zh' else "⏹️ Тооцоолол цуцлагдсан")
+    else:
+        st.error(f"❌ {status.error}")
+    return None
+
+def _poll_jobs():
+    """本次运行中有未结束的后台任务时，等待 JOB_POLL_INTERVAL 秒后重跑页面（在页面末尾调用）"""
+    if st.session_state.pop("job_poll", False):
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
+def _submit_resampling(df, key, analysis, variables, n_resamples, seed, group_var=None):
+    """提交重抽样推断后台任务，结果由 _show_resampling 显示；任务的输入变量记在 st.session_state[f"{key}_vars"]"""
+    label = f"Bootstrap（B = {n_resamples}）"
+    _submit_job(key, df, stat_engine.resampling_inference, label, analysis=analysis, variables=list(variables),
+                group_var=group_var, n_resamples=n_resamples, seed=seed, n_jobs=1)
+    st.session_state[f"{key}_vars"] = [list(variables), group_var]
+
+def _show_resampling(key, lang, variables, group_var=None):
+    """等待重抽样推断任务并显示 Bootstrap 置信区间（及置换检验 p 值）
+
+    只显示输入变量与当前选择相同的任务，切换变量后不再显示之前的结果。
+    """
+    if st.session_state.get(f"{key}_vars") != [list(variables), group_var]:
+        return None
+    res = _await_job(key, lang)
+    if res is None:
+        return None
+    level = f"{res.confidence:.0%}"
+    if lang == 'zh':
+        table = {"估计值": [res.estimate], f"Bootstrap {level} CI 下限": [res.ci_lower],
+                 f"Bootstrap {level} CI 上限": [res.ci_upper], "Bootstrap 标准误": [res.std_error]}
+        if res.p_value is not None:
+            table["置换检验 p 值"] = [res.p_value]
+    else:
+        table = {"Үнэлгээ": [res.estimate], f"Bootstrap {level} CI доод": [res.ci_lower],
+                 f"Bootstrap {level} CI дээд": [res.ci_upper], "Bootstrap стандарт алдаа": [res.std_error]}
+        if res.p_value is not None:
+            table["Сэлгэмэл шалгалтын p"] = [res.p_value]
+    st.write(f"#### 🔁 重抽样推断（B = {res.n_resamples}，种子 = {res.seed}）" if lang == 'zh'
+             else f"#### 🔁 Дахин түүвэрлэлт（B = {res.n_resamples}，үр = {res.seed}）")
+    st.dataframe(pd.DataFrame(table), use_container_width=True, hide_index=True)
+    return res
+
+def _show_correlation_screen(df, vars, top_n, export_threshold, lang):
+    """宽数据相关筛选：显示最强的变量对；超过阈值的全部变量对在点击导出后生成 Parquet 下载"""
+    res = cached_analysis(df, stat_engine.correlation_screen, variables=list(vars), top_n=top_n)
+    summary = res.summary
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("变量数" if lang == 'zh' else "Хувьсагчийн тоо", summary["n_variables"])
+    col2.metric("变量对" if lang == 'zh' else "Хосын тоо", summary["n_pairs"])
+    col3.metric("|r| ≥ 0.5", summary["abs_r_ge_0.5"])
+    col4.metric("|r| ≥ 0.7", summary["abs_r_ge_0.7"])
+    
+    st.write(f"#### 相关最强的 {len(res.pairs)} 对变量" if lang == 'zh' else f"#### Хамгийн хүчтэй {len(res.pairs)} хос")
+    st.dataframe(res.pairs.style.format({
+        "r": "{:.3f}", "p": "{:.4f}", "ci_lower": "{:.3f}", "ci_upper": "{:.3f}"
+    }), use_container_width=True, hide_index=True)
+    st.session_state.stat_result = res.to_dict()
+    
+    # 导出只在点击后生成（按 analysis_key 缓存），重跑页面时不重复计算
+    export_args = dict(variables=list(vars), threshold=export_threshold)
+    key = analysis_key(df, stat_engine.correlation_pairs_parquet, **export_args)
+    label = (f"📤 导出 |r| ≥ {export_threshold:.2f} 的全部变量对" if lang == 'zh'
+             else f"📤 |r| ≥ {export_threshold:.2f} бүх хосыг экспортлох")
+    if st.button(label, key="corr_export"):
+        with st.spinner("正在生成 Parquet..." if lang == 'zh' else "Parquet үүсгэж байна..."):
+            cached_analysis(df, stat_engine.correlation_pairs_parquet, **export_args)
+        st.session_state.corr_export_key = key
+    if st.session_state.get("corr_export_key") != key:
+        return
+    hit, export = get_result_cache().get(key)
+    if not hit:
+        return
+    data, written = export
+    label = (f"📥 下载 |r| ≥ {export_threshold:.2f} 的全部变量对（{written} 对，Parquet）" if lang == 'zh'
+             else f"📥 |r| ≥ {export_threshold:.2f} бүх хос татах（{written}, Parquet）")
+    st.download_button(
+        label, data, file_name="correlation_pairs.parquet",
+        mime="application/octet-stream", disabled=written == 0
+    )
+
 def get_ai_analysis(result_data, analysis_type):
     """调用AI分析统计结果"""
     if not st.session_state.ai_config.get('enabled') or not st.session_state.ai_config.get('api_key'):
         return None
     
     try:
-        client = OpenAI(
-            api_key=st.session_state.ai_config['api_key'],
-            base_url=st.session_state.ai_config['base_url']
-        )
+        client = get_ai_client(st.session_state.ai_config)
         
         # 构建提示词
         if analysis_type == "t_test":
@@ -180,25 +335,23 @@ def get_ai_analysis(result_data, analysis_type):
 - 路径b（M→Y）：{result_data['b']:.4f}（p={result_data['p_b']:.4f}）
 - 总效应c：{result_data['c']:.4f}
 - 直接效应c'：{result_data['c_prime']:.4f}
-- 间接效应（中介效应）：{result_data['indirect']:.4f}
+- 间接效应（中介效应）：{result_data['indirect']:.4f}，Bootstrap 95% 置信区间 {result_data['indirect_ci']}
 - 中介比例：{result_data['mediation_ratio']:.1f}%
 
 🔴 必须遵守的格式：
-1. 先说明统计依据（路径a、b的p值和中介比例）
-2. 说明中介效应是否显著
+1. 先说明统计依据（路径a、b的p值、间接效应的 Bootstrap 置信区间和中介比例）
+2. 说明中介效应是否显著（置信区间不包含 0 即显著）
 3. 最后给出明确的中介关系结论
 
-格式："根据中介效应分析，路径a(p={result_data['p_a']:.3f})和路径b(p={result_data['p_b']:.3f})均显著，中介比例={result_data['mediation_ratio']:.1f}%。**因此，{result_data['m_var']}在{result_data['x_var']}对{result_data['y_var']}的影响中起到/不起到显著中介作用。**"
+格式："根据中介效应分析，路径a(p={result_data['p_a']:.3f})和路径b(p={result_data['p_b']:.3f})均显著，间接效应 95% CI {result_data['indirect_ci']} 不包含 0，中介比例={result_data['mediation_ratio']:.1f}%。**因此，{result_data['m_var']}在{result_data['x_var']}对{result_data['y_var']}的影响中起到/不起到显著中介作用。**"
 
 要求：语言口语化，小白能懂。必须有明确的中介作用判断。
 """
         else:
             return None
         
-        response = client.chat.completions.create(
-            model=st.session_state.ai_config['model'],
-            messages=[
-                {"role": "system", "content": """你是一个统计分析专家，擅长用简单的语言解释复杂的统计结果。
+        messages = [
+            {"role": "system", "content": """你是一个统计分析专家，擅长用简单的语言解释复杂的统计结果。
 
 🌍 **【重要】双语输出要求**：
 你必须使用**汉语（中文）**和**西里尔蒙古语（Кирилл монгол хэл）**双语输出所有分析结果。
@@ -209,17 +362,118 @@ def get_ai_analysis(result_data, analysis_type):
 
 **统计术语对照**：
 平均值=Дундаж утга, 标准差=Стандарт хазайлт, 显著性=Ач холбогдол, 相关性=Хамаарал, 差异=Ялгаа, 结论=Дүгнэлт"""},
-                {"role": "user", "content": prompt + "\n\n🌍 请务必使用双语输出（中文+西里尔蒙文）！"}
-            ],
+            {"role": "user", "content": prompt + "\n\n🌍 请务必使用双语输出（中文+西里尔蒙文）！"}
+        ]
+        
+        # 相同的提示词直接使用磁盘缓存中的解读
+        cache = get_response_cache()
+        cache_key = response_key(st.session_state.ai_config, messages, get_lang())
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # 流式输出：解读生成时先逐段显示，完成后由调用方按结论显示
+        placeholder = st.empty()
+        response = client.stream_chat(
+            model=st.session_state.ai_config['model'],
+            messages=messages,
             temperature=0.7
         )
         
-        return response.choices[0].message.content
+        analysis = response.collect(lambda text: placeholder.info(text + "▌"))
+        placeholder.empty()
+        cache.put(cache_key, analysis)
+        return analysis
         
     except Exception as e:
         st.error(f"AI分析失败：{str(e)}")
         return None
 
+def _full_report_option(key, lang):
+    """是否额外显示 statsmodels 的完整回归报告（未安装 statsmodels 时不提供）"""
+    if sm is None:
+        return False
+    label = "显示完整回归报告（statsmodels）" if lang == 'zh' else "Бүрэн регрессийн тайлан（statsmodels）"
+    return st.checkbox(label, key=f"{key}_full_report")
+
+def _show_regression_table(model):
+    """回归系数表：系数、标准误、t、p、VIF"""
+    table = model.table()
+    table.columns = ["系数 B", "标准误", "t", "p 值", "VIF"]
+    st.dataframe(table.style.format("{:.4f}", na_rep=""), use_container_width=True)
+
+def _show_full_report(df, y_var, x_vars):
+    """statsmodels 完整回归报告"""
+    data = df[[y_var] + list(x_vars)].apply(stat_engine.to_numeric).dropna()
+    model = sm.OLS(data[y_var], sm.add_constant(data[list(x_vars)])).fit()
+    st.text(model.summary())
+
+def _show_mediation(df, x_var, m_var, y_var, boot):
+    """中介效应结果：a、b、c、c' 路径回归与 Bootstrap 间接效应（AI 解读按任务只请求一次）"""
+    res = cached_analysis(df, stat_engine.mediation_analysis, x_var=x_var, m_var=m_var, y_var=y_var)
+    a, b, c, c_prime = res.a, res.b, res.c, res.c_prime
+    
+    # 中介效应（Bootstrap 百分位置信区间，区间不含 0 即间接效应显著）
+    indirect = res.indirect
+    indirect_significant = boot.ci_lower > 0 or boot.ci_upper < 0
+    
+    result_df = pd.DataFrame({
+        '路径': ['a (X→M)', 'b (M→Y)', "c' (X→Y直接)", 'c (X→Y总)', '中介效应 (a×b)'],
+        '系数': [a, b, c_prime, c, indirect],
+        'p值': [res.p_a, res.p_b, res.p_c_prime, res.p_c, np.nan],
+        'Bootstrap 95% CI': ['', '', '', '', f"[{boot.ci_lower:.4f}, {boot.ci_upper:.4f}]"]
+    })
+    
+    st.dataframe(result_df, use_container_width=True)
+    
+    st.info(f"""
+    📊 中介效应分析结果：
+    - 总效应 c = {c:.4f}
+    - 直接效应 c' = {c_prime:.4f}
+    - 间接效应 a×b = {indirect:.4f}，Bootstrap 95% CI [{boot.ci_lower:.4f}, {boot.ci_upper:.4f}]（B = {boot.n_resamples}）{'，不含 0，间接效应显著' if indirect_significant else '，包含 0，间接效应不显著'}
+    - 中介比例 = {res.mediation_ratio:.2f}%
+    """)
+    
+    st.session_state.stat_result = f"中介效应：{x_var}→{m_var}→{y_var}, 间接效应={indirect:.4f}"
+    
+    # AI智能分析
+    st.markdown("---")
+    st.markdown("### 🤖 AI 智能分析")
+    
+    with st.spinner("AI正在分析结果..."):
+        result_data = {
+            'x_var': x_var,
+            'm_var': m_var,
+            'y_var': y_var,
+            'a': a,
+            'p_a': res.p_a,
+            'b': b,
+            'p_b': res.p_b,
+            'c': c,
+            'c_prime': c_prime,
+            'indirect': indirect,
+            'indirect_ci': f"[{boot.ci_lower:.4f}, {boot.ci_upper:.4f}]",
+            'mediation_ratio': res.mediation_ratio
+        }
+        
+        # 同一任务的结果在之后的重跑中仍会显示，AI 解读只请求一次
+        job_id = st.session_state.get("med_job")
+        cached = st.session_state.get("med_ai")
+        if cached and cached[0] == job_id:
+            ai_analysis = cached[1]
+        else:
+            ai_analysis = get_ai_analysis(result_data, "mediation")
+            st.session_state.med_ai = (job_id, ai_analysis)
+        
+        if ai_analysis:
+            # 判断中介效应是否显著（Bootstrap 置信区间不含 0）
+            if indirect_significant:
+                st.success(ai_analysis)
+            else:
+                st.info(ai_analysis)
+        else:
+            st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+
 def render_stat_view():
     lang = get_lang()
     
@@ -305,11 +559,19 @@ def render_stat_view():
         
         label = "选择变量" if lang == 'zh' else "Хувьсагч сонгох"
         vars = st.multiselect(label, df.columns, key="desc_vars")
+        # 行数很多时可选近似分位数（KLL 草图，内存与行数无关）
+        quantile_method = "exact"
+        if len(df) >= APPROX_QUANTILE_ROWS:
+            label = "四分位数计算方式" if lang == 'zh' else "Квартилийн тооцооллын арга"
+            quantile_method = st.radio(
+                label, ["exact", "sketch"], horizontal=True, key="desc_quantile_method",
+                format_func=lambda m: QUANTILE_METHOD_NAMES[m][0 if lang == 'zh' else 1]
+            )
         
         btn_text = "计算描述统计" if lang == 'zh' else "Тайлбарлах статистик тооцоолох"
         if vars and st.button(btn_text):
             # 分离数值型和非数值型变量
-            numeric_vars = df[vars].select_dtypes(include=['int64', 'float64']).columns.tolist()
+            numeric_vars = df[vars].select_dtypes(include='number').columns.tolist()
             non_numeric_vars = [v for v in vars if v not in numeric_vars]
             
             # 检测包含非数值内容的"数值型"列
@@ -325,16 +587,17 @@ def render_stat_view():
                 st.warning(warn_msg)
             
             if numeric_vars:
-                # 数值型变量的统计 - 先转换为数值类型以处理混合类型
-                numeric_df = df[numeric_vars].apply(pd.to_numeric, errors='coerce')
-                result = numeric_df.describe().T
-                result['count_missing'] = numeric_df.isnull().sum()
-                result['skewness'] = numeric_df.skew()
-                result['kurtosis'] = numeric_df.kurt()
+                # 数值型变量的统计（混合类型先转换为数值；各阶矩一次累积，四分位数一次计算）
+                summary = cached_analysis(df, stat_engine.describe_numeric, variables=numeric_vars,
+                                          quantile_method=quantile_method)
+                result = summary.table
                 
                 title = "#### 📊 数值型变量" if lang == 'zh' else "#### 📊 Тоон хувьсагч"
                 st.markdown(title)
                 st.dataframe(result, use_container_width=True)
+                if summary.quantile_method == "sketch":
+                    st.caption(f"四分位数为近似值（秩误差约 ±{summary.quantile_rank_error:.1%}）" if lang == 'zh'
+                               else f"Квартиль ойролцоо утга（зэрэглэлийн алдаа ±{summary.quantile_rank_error:.1%}）")
                 
                 # 为数值型变量添加频次与占比（如果唯一值较少）
                 from src.lib.variable_labels import get_value_labels
@@ -342,14 +605,13 @@ def render_stat_view():
                 title = "#### 📊 数值型变量 - 频次与占比" if lang == 'zh' else "#### 📊 Тоон хувьсагч - Давтамж ба хувь"
                 st.markdown(title)
                 
+                profile = get_profile(df)
                 for var in numeric_vars:
-                    value_labels = get_value_labels(var)
-                    # 转换为数值类型以避免字符串错误
-                    var_data = pd.to_numeric(df[var], errors='coerce')
-                    unique_count = var_data.nunique()
-                    
-                    # 只为唯一值≤20的变量显示频次占比
-                    if unique_count <= 20:
+                    # 只为唯一值≤20的变量显示频次占比（唯一值数来自缓存的列概况）
+                    if profile[var].nunique <= 20:
+                        value_labels = get_value_labels(var)
+                        # 转换为数值类型以避免字符串错误
+                        var_data = pd.to_numeric(df[var], errors='coerce')
                         st.markdown(f"**{var}**")
                         
                         # 获取频次和占比
@@ -376,36 +638,50 @@ def render_stat_view():
             if non_numeric_vars:
                 # 非数值型变量的统计（包括多选题）
                 st.markdown("#### 📝 分类/文本变量")
+                profile = get_profile(df)
                 for var in non_numeric_vars:
                     st.markdown(f"**{var}**")
+                    column = profile[var]
                     
                     # 检测是否为多选题
-                    sample = df[var].dropna().head(20).astype(str)
-                    is_multiple_choice = sample.str.contains(';', regex=False).any()
+                    is_multiple_choice = column.is_multiple_choice
                     
                     if is_multiple_choice:
-                        st.info("✅ 检测到多选题格式（分号分隔），建议使用AI视图进行详细分析")
+                        st.info("✅ 检测到多选题格式（分号分隔）")
                     
                     # 显示基本统计
                     col1, col2, col3 = st.columns(3)
-                    col1.metric("样本量", df[var].count())
-                    col2.metric("唯一值", df[var].nunique())
-                    col3.metric("缺失值", df[var].isnull().sum())
+                    col1.metric("样本量", column.n)
+                    col2.metric("唯一值", column.nunique)
+                    col3.metric("缺失值", column.missing)
                     
                     # 显示前5个最常见的值（添加占比）
                     if not is_multiple_choice:
                         st.write("最常见的值：")
-                        value_counts = df[var].value_counts().head(5)
-                        percentages = (value_counts / df[var].count() * 100).round(2)
                         
                         # 创建带占比的数据框
                         freq_df = pd.DataFrame({
-                            '值': value_counts.index.astype(str),
-                            '频次': value_counts.values,
-                            '占比(%)': [f"{p:.2f}%" for p in percentages.values]
+                            '值': [str(v) for v in column.top_values],
+                            '频次': list(column.top_values.values()),
+                            '占比(%)': [f"{c / column.n * 100:.2f}%" for c in column.top_values.values()]
                         })
                         
                         st.dataframe(freq_df, use_container_width=True, hide_index=True)
+                    else:
+                        # 选项频次与共选矩阵（由缓存的稀疏矩阵计算）
+                        try:
+                            mc = cached_analysis(df, stat_engine.multiple_choice_analysis, variable=var)
+                            st.write("选项频次：")
+                            freq_df = pd.DataFrame({
+                                '选项': [str(v) for v in mc.frequencies.index],
+                                '频次': mc.frequencies.values,
+                                '占比(%)': [f"{p:.2f}%" for p in mc.percentages.values]
+                            })
+                            st.dataframe(freq_df, use_container_width=True, hide_index=True)
+                            with st.expander("共选矩阵（同时选择两个选项的人数）"):
+                                st.dataframe(mc.co_selection, use_container_width=True)
+                        except StatError as e:
+                            st.error(f"❌ {e}")
                     st.markdown("---")
             
             if not numeric_vars and not non_numeric_vars:
@@ -422,14 +698,14 @@ def render_stat_view():
                         # 生成统计摘要文本（仅数值型变量）
                         stats_text = []
                         for var in numeric_vars:
-                            # 使用已转换的数值数据
-                            numeric_data = numeric_df[var].dropna()
-                            if len(numeric_data) == 0:
+                            # 使用上面的统计表
+                            row = result.loc[var]
+                            if row['count'] == 0:
                                 continue
-                            mean = float(numeric_data.mean())
-                            std = float(numeric_data.std())
-                            min_val = float(numeric_data.min())
-                            max_val = float(numeric_data.max())
+                            mean = float(row['mean'])
+                            std = float(row['std'])
+                            min_val = float(row['min'])
+                            max_val = float(row['max'])
                             stats_text.append(f"- {var}：平均值={mean:.2f}，标准差={std:.2f}，范围=[{min_val:.2f}, {max_val:.2f}]")
                     
                         if stats_text:
@@ -479,132 +755,123 @@ def render_stat_view():
         btn_text = "计算分组统计" if lang == 'zh' else "Бүлгийн статистик тооцоолох"
         if vars and st.button(btn_text):
             try:
-                # 获取分组
-                groups = sorted(df[group_var].dropna().unique())
+                # 一次 groupby 完成所有分组、所有变量的统计
+                dimension_name = "维度得分"
+                if calc_dimension:
+                    res = cached_analysis(df, stat_engine.grouped_stats, group_var=group_var,
+                                          dimensions={dimension_name: vars})
+                else:
+                    res = cached_analysis(df, stat_engine.grouped_stats, group_var=group_var, variables=vars)
                 
-                if len(groups) < 2:
-                    warning_text = "⚠️ 分组变量至少需要2个不同的值" if lang == 'zh' else "⚠️ Бүлгийн хувьсагч хамгийн багадаа 2 өөр утгатай байх ёстой"
-                    st.warning(warning_text)
+                # 准备结果数据
+                size_col = '样本量' if lang == 'zh' else 'Түүврийн тоо'
+                result_df = pd.DataFrame({
+                    group_var: [str(group) for group in res.table.index],
+                    size_col: res.sizes.values
+                })
+                
+                if calc_dimension:
+                    # 维度得分模式：每个样本在所选变量上的平均分，再按组统计
+                    for name, label in [("mean", '均值' if lang == 'zh' else 'Дундаж'),
+                                        ("std", '标准差' if lang == 'zh' else 'Стандарт хазайлт'),
+                                        ("min", '最小值' if lang == 'zh' else 'Хамгийн бага'),
+                                        ("max", '最大值' if lang == 'zh' else 'Хамгийн их')]:
+                        result_df[label] = res.stat(dimension_name, name).round(2).values
                 else:
-                    # 准备结果数据
-                    results = []
-                    
-                    for group in groups:
-                        group_data = df[df[group_var] == group]
-                        row = {group_var: str(group), '样本量' if lang == 'zh' else 'Түүврийн тоо': len(group_data)}
-                        
-                        if calc_dimension:
-                            # 计算维度得分模式：先计算每个样本的平均分
-                            dimension_scores = group_data[vars].apply(pd.to_numeric, errors='coerce').mean(axis=1)
+                    # 普通模式：分别统计每个变量
+                    for var in vars:
+                        result_df[f'{var}_均值' if lang == 'zh' else f'{var}_Дундаж'] = res.stat(var, "mean").round(2).values
+                        result_df[f'{var}_标准差' if lang == 'zh' else f'{var}_Стандарт'] = res.stat(var, "std").round(2).values
+                
+                # 显示结果
+                if calc_dimension:
+                    title = f"#### 📊 维度得分分组统计（变量：{', '.join(vars)}）" if lang == 'zh' else f"#### 📊 Хэмжээсийн оноо бүлгийн статистик（Хувьсагч：{', '.join(vars)}）"
+                else:
+                    title = "#### 📊 分组描述统计结果" if lang == 'zh' else "#### 📊 Бүлгийн тайлбарлах статистикийн үр дүн"
+                
+                st.markdown(title)
+                st.dataframe(result_df, use_container_width=True, hide_index=True)
+                
+                # 保存结果
+                st.session_state.stat_result = f"分组描述统计：按 {group_var} 分组，{len(vars)} 个变量"
+                
+                # 提供下载选项
+                st.markdown("---")
+                col_download1, col_download2 = st.columns(2)
+                
+                with col_download1:
+                    # 导出为CSV
+                    csv = result_df.to_csv(index=False, encoding='utf-8-sig')
+                    download_label = "📥 下载 CSV" if lang == 'zh' else "📥 CSV татах"
+                    st.download_button(
+                        label=download_label,
+                        data=csv,
+                        file_name=f"分组统计_{group_var}.csv",
+                        mime="text/csv",
+                        use_container_width=True
+                    )
+                
+                with col_download2:
+                    # 导出为Excel
+                    import io
+                    buffer = io.BytesIO()
+                    result_df.to_excel(buffer, index=False, engine='openpyxl')
+                    download_label = "📥 下载 Excel" if lang == 'zh' else "📥 Excel татах"
+                    st.download_button(
+                        label=download_label,
+                        data=buffer.getvalue(),
+                        file_name=f"分组统计_{group_var}.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True
+                    )
+                
+                # AI智能分析
+                st.markdown("---")
+                st.markdown("### 🤖 AI 智能分析")
+                
+                with st.spinner("AI正在分析结果..."):
+                    try:
+                        # 生成统计摘要文本
+                        stats_text = []
+                        for idx, row in result_df.iterrows():
+                            group_name = row[group_var]
+                            sample_size = row['样本量' if lang == 'zh' else 'Түүврийн тоо']
                             
-                            row['均值' if lang == 'zh' else 'Дундаж'] = round(float(dimension_scores.mean()), 2)
-                            row['标准差' if lang == 'zh' else 'Стандарт хазайлт'] = round(float(dimension_scores.std()), 2)
-                            row['最小值' if lang == 'zh' else 'Хамгийн бага'] = round(float(dimension_scores.min()), 2)
-                            row['最大值' if lang == 'zh' else 'Хамгийн их'] = round(float(dimension_scores.max()), 2)
-                        else:
-                            # 普通模式：分别统计每个变量
-                            for var in vars:
-                                var_data = pd.to_numeric(group_data[var], errors='coerce').dropna()
-                                
-                                if len(var_data) > 0:
-                                    row[f'{var}_均值' if lang == 'zh' else f'{var}_Дундаж'] = round(float(var_data.mean()), 2)
-                                    row[f'{var}_标准差' if lang == 'zh' else f'{var}_Стандарт'] = round(float(var_data.std()), 2)
-                                else:
-                                    row[f'{var}_均值' if lang == 'zh' else f'{var}_Дундаж'] = np.nan
-                                    row[f'{var}_标准差' if lang == 'zh' else f'{var}_Стандарт'] = np.nan
+                            if calc_dimension:
+                                mean_val = row['均值' if lang == 'zh' else 'Дундаж']
+                                std_val = row['标准差' if lang == 'zh' else 'Стандарт хазайлт']
+                                stats_text.append(f"- {group_name}组：样本量={sample_size}，均值={mean_val:.2f}，标准差={std_val:.2f}")
+                            else:
+                                # 普通模式：列出每个变量的统计
+                                var_stats = []
+                                for var in vars:
+                                    mean_col = f'{var}_均值' if lang == 'zh' else f'{var}_Дундаж'
+                                    std_col = f'{var}_标准差' if lang == 'zh' else f'{var}_Стандарт'
+                                    if mean_col in row and not pd.isna(row[mean_col]):
+                                        var_stats.append(f"{var}(均值={row[mean_col]:.2f}, 标准差={row[std_col]:.2f})")
+                                if var_stats:
+                                    stats_text.append(f"- {group_name}组：样本量={sample_size}，{', '.join(var_stats)}")
                         
-                        results.append(row)
-                    
-                    # 创建结果DataFrame
-                    result_df = pd.DataFrame(results)
-                    
-                    # 显示结果
-                    if calc_dimension:
-                        title = f"#### 📊 维度得分分组统计（变量：{', '.join(vars)}）" if lang == 'zh' else f"#### 📊 Хэмжээсийн оноо бүлгийн статистик（Хувьсагч：{', '.join(vars)}）"
-                    else:
-                        title = "#### 📊 分组描述统计结果" if lang == 'zh' else "#### 📊 Бүлгийн тайлбарлах статистикийн үр дүн"
-                    
-                    st.markdown(title)
-                    st.dataframe(result_df, use_container_width=True, hide_index=True)
-                    
-                    # 保存结果
-                    st.session_state.stat_result = f"分组描述统计：按 {group_var} 分组，{len(vars)} 个变量"
-                    
-                    # 提供下载选项
-                    st.markdown("---")
-                    col_download1, col_download2 = st.columns(2)
-                    
-                    with col_download1:
-                        # 导出为CSV
-                        csv = result_df.to_csv(index=False, encoding='utf-8-sig')
-                        download_label = "📥 下载 CSV" if lang == 'zh' else "📥 CSV татах"
-                        st.download_button(
-                            label=download_label,
-                            data=csv,
-                            file_name=f"分组统计_{group_var}.csv",
-                            mime="text/csv",
-                            use_container_width=True
-                        )
-                    
-                    with col_download2:
-                        # 导出为Excel
-                        import io
-                        buffer = io.BytesIO()
-                        result_df.to_excel(buffer, index=False, engine='openpyxl')
-                        download_label = "📥 下载 Excel" if lang == 'zh' else "📥 Excel татах"
-                        st.download_button(
-                            label=download_label,
-                            data=buffer.getvalue(),
-                            file_name=f"分组统计_{group_var}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True
-                        )
-                    
-                    # AI智能分析
-                    st.markdown("---")
-                    st.markdown("### 🤖 AI 智能分析")
-                    
-                    with st.spinner("AI正在分析结果..."):
-                        try:
-                            # 生成统计摘要文本
-                            stats_text = []
-                            for idx, row in result_df.iterrows():
-                                group_name = row[group_var]
-                                sample_size = row['样本量' if lang == 'zh' else 'Түүврийн тоо']
-                                
-                                if calc_dimension:
-                                    mean_val = row['均值' if lang == 'zh' else 'Дундаж']
-                                    std_val = row['标准差' if lang == 'zh' else 'Стандарт хазайлт']
-                                    stats_text.append(f"- {group_name}组：样本量={sample_size}，均值={mean_val:.2f}，标准差={std_val:.2f}")
-                                else:
-                                    # 普通模式：列出每个变量的统计
-                                    var_stats = []
-                                    for var in vars:
-                                        mean_col = f'{var}_均值' if lang == 'zh' else f'{var}_Дундаж'
-                                        std_col = f'{var}_标准差' if lang == 'zh' else f'{var}_Стандарт'
-                                        if mean_col in row and not pd.isna(row[mean_col]):
-                                            var_stats.append(f"{var}(均值={row[mean_col]:.2f}, 标准差={row[std_col]:.2f})")
-                                    if var_stats:
-                                        stats_text.append(f"- {group_name}组：样本量={sample_size}，{', '.join(var_stats)}")
+                        if stats_text:
+                            result_data = {
+                                'stats': '\n'.join(stats_text)
+                            }
                             
-                            if stats_text:
-                                result_data = {
-                                    'stats': '\n'.join(stats_text)
-                                }
-                                
-                                ai_analysis = get_ai_analysis(result_data, "descriptive")
-                                
-                                if ai_analysis:
-                                    st.info(ai_analysis)
-                                else:
-                                    st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
-                        except Exception as e:
-                            st.warning(f"⚠️ 无法生成AI分析：{str(e)}")
-                    
-                    # 使用说明
-                    st.markdown("---")
-                    st.info("💡 提示：如果需要生成多个维度的分组统计表，可以多次运行此分析，每次选择不同的变量组合。" if lang == 'zh' else "💡 Зөвлөмж: Олон хэмжээсийн бүлгийн статистик үүсгэх шаардлагатай бол энэ шинжилгээг олон удаа ажиллуулж, өөр өөр хувьсагчдын хослолыг сонгоно уу.")
-                    
+                            ai_analysis = get_ai_analysis(result_data, "descriptive")
+                            
+                            if ai_analysis:
+                                st.info(ai_analysis)
+                            else:
+                                st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                    except Exception as e:
+                        st.warning(f"⚠️ 无法生成AI分析：{str(e)}")
+                
+                # 使用说明
+                st.markdown("---")
+                st.info("💡 提示：如果需要生成多个维度的分组统计表，可以多次运行此分析，每次选择不同的变量组合。" if lang == 'zh' else "💡 Зөвлөмж: Олон хэмжээсийн бүлгийн статистик үүсгэх шаардлагатай бол энэ шинжилгээг олон удаа ажиллуулж, өөр өөр хувьсагчдын хослолыг сонгоно уу.")
+                
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 error_text = f"❌ 计算失败：{str(e)}" if lang == 'zh' else f"❌ Тооцоолох амжилтгүй：{str(e)}"
                 st.error(error_text)
@@ -622,50 +889,47 @@ def render_stat_view():
         btn = "执行检验" if lang == 'zh' else "Шалгалт гүйцэтгэх"
         if st.button(btn):
             try:
-                # 转换为数值类型
-                data = pd.to_numeric(df[var], errors='coerce').dropna()
+                res = cached_analysis(df, stat_engine.one_sample_t_test, variable=var, test_value=mu)
+                p_value = res.p_value
                 
-                if len(data) < 2:
-                    st.error("❌ 数据点太少，无法执行t检验（至少需要2个有效数据点）")
-                else:
-                    t_stat, p_value = stats.ttest_1samp(data, mu)
-                    
-                    result_df = pd.DataFrame({
-                        '变量': [var],
-                        '样本量': [len(data)],
-                        '均值': [float(data.mean())],
-                        '标准差': [float(data.std())],
-                        '检验值': [mu],
-                        't 统计量': [float(t_stat)],
-                        'p 值': [float(p_value)],
-                        '显著性': ['***' if p_value < 0.001 else '**' if p_value < 0.01 else '*' if p_value < 0.05 else 'ns']
-                    })
-                    
-                    st.dataframe(result_df, use_container_width=True)
-                    st.session_state.stat_result = f"单样本 t 检验：{var} vs {mu}, p={p_value:.4f}"
+                result_df = pd.DataFrame({
+                    '变量': [var],
+                    '样本量': [res.n],
+                    '均值': [res.mean],
+                    '标准差': [res.std],
+                    '检验值': [mu],
+                    't 统计量': [res.t_statistic],
+                    'p 值': [p_value],
+                    '显著性': [res.significant]
+                })
+                
+                st.dataframe(result_df, use_container_width=True)
+                st.session_state.stat_result = f"单样本 t 检验：{var} vs {mu}, p={p_value:.4f}"
+                
+                # AI智能分析
+                st.markdown("---")
+                st.markdown("### 🤖 AI 智能分析")
+                
+                with st.spinner("AI正在分析结果..."):
+                    result_data = {
+                        'variable': var,
+                        'mean': res.mean,
+                        'test_value': mu,
+                        't': res.t_statistic,
+                        'p': p_value
+                    }
                     
-                    # AI智能分析
-                    st.markdown("---")
-                    st.markdown("### 🤖 AI 智能分析")
+                    ai_analysis = get_ai_analysis(result_data, "one_sample_t")
                     
-                    with st.spinner("AI正在分析结果..."):
-                        result_data = {
-                            'variable': var,
-                            'mean': float(data.mean()),
-                            'test_value': mu,
-                            't': float(t_stat),
-                            'p': float(p_value)
-                        }
-                        
-                        ai_analysis = get_ai_analysis(result_data, "one_sample_t")
-                        
-                        if ai_analysis:
-                            if p_value < 0.05:
-                                st.success(ai_analysis)
-                            else:
-                                st.info(ai_analysis)
+                    if ai_analysis:
+                        if p_value < 0.05:
+                            st.success(ai_analysis)
                         else:
-                            st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                            st.info(ai_analysis)
+                    else:
+                        st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ 执行检验时出错：{str(e)}")
     
@@ -682,60 +946,48 @@ def render_stat_view():
         btn = "执行检验" if lang == 'zh' else "Шалгалт гүйцэтгэх"
         if st.button(btn):
             try:
-                # 转换为数值类型
-                data1 = pd.to_numeric(df[var1], errors='coerce').dropna()
-                data2 = pd.to_numeric(df[var2], errors='coerce').dropna()
+                res = cached_analysis(df, stat_engine.paired_t_test, var1=var1, var2=var2)
+                p_value = res.p_value
                 
-                if len(data1) < 2 or len(data2) < 2:
-                    st.error("❌ 数据点太少，无法执行t检验（至少需要2个有效数据点）")
-                else:
-                    # 保证配对 - 使用共同的索引
-                    common_idx = data1.index.intersection(data2.index)
-                    data1_paired = data1.loc[common_idx]
-                    data2_paired = data2.loc[common_idx]
+                result_df = pd.DataFrame({
+                    '变量1': [var1],
+                    '变量2': [var2],
+                    '样本量': [res.n],
+                    '均值差': [res.mean_diff],
+                    't 统计量': [res.t_statistic],
+                    'p 值': [p_value],
+                    '显著性': [res.significant]
+                })
+                
+                st.dataframe(result_df, use_container_width=True)
+                st.session_state.stat_result = f"配对 t 检验：{var1} vs {var2}, p={p_value:.4f}"
+                
+                # AI智能分析
+                st.markdown("---")
+                st.markdown("### 🤖 AI 智能分析")
+                
+                with st.spinner("AI正在分析结果..."):
+                    result_data = {
+                        'var1': var1,
+                        'var2': var2,
+                        'mean1': res.mean1,
+                        'mean2': res.mean2,
+                        'mean_diff': res.mean_diff,
+                        't': res.t_statistic,
+                        'p': p_value
+                    }
+                    
+                    ai_analysis = get_ai_analysis(result_data, "paired_t")
                     
-                    if len(data1_paired) < 2:
-                        st.error("❌ 配对数据点太少，无法执行配对t检验（至少需要2对有效数据）")
+                    if ai_analysis:
+                        if p_value < 0.05:
+                            st.success(ai_analysis)
+                        else:
+                            st.info(ai_analysis)
                     else:
-                        t_stat, p_value = stats.ttest_rel(data1_paired, data2_paired)
-                        
-                        result_df = pd.DataFrame({
-                            '变量1': [var1],
-                            '变量2': [var2],
-                            '样本量': [len(data1_paired)],
-                            '均值差': [float(data1_paired.mean() - data2_paired.mean())],
-                            't 统计量': [float(t_stat)],
-                            'p 值': [float(p_value)],
-                            '显著性': ['***' if p_value < 0.001 else '**' if p_value < 0.01 else '*' if p_value < 0.05 else 'ns']
-                        })
-                        
-                        st.dataframe(result_df, use_container_width=True)
-                        st.session_state.stat_result = f"配对 t 检验：{var1} vs {var2}, p={p_value:.4f}"
-                        
-                        # AI智能分析
-                        st.markdown("---")
-                        st.markdown("### 🤖 AI 智能分析")
-                        
-                        with st.spinner("AI正在分析结果..."):
-                            result_data = {
-                                'var1': var1,
-                                'var2': var2,
-                                'mean1': float(data1_paired.mean()),
-                                'mean2': float(data2_paired.mean()),
-                                'mean_diff': float(data1_paired.mean() - data2_paired.mean()),
-                                't': float(t_stat),
-                                'p': float(p_value)
-                            }
-                            
-                            ai_analysis = get_ai_analysis(result_data, "paired_t")
-                            
-                            if ai_analysis:
-                                if p_value < 0.05:
-                                    st.success(ai_analysis)
-                                else:
-                                    st.info(ai_analysis)
-                            else:
-                                st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                        st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ 执行检验时出错：{str(e)}")
     
@@ -744,71 +996,110 @@ def render_stat_view():
         subheader = "🔀 独立样本 t 检验" if lang == 'zh' else "🔀 Бие даасан түүврийн t шалгалт"
         st.subheader(subheader)
         
-        label = "数据变量" if lang == 'zh' else "Өгөгдлийн хувьсагч"
-        data_var = st.selectbox(label, df.columns, key="t3_data")
+        label = "批量检验多个变量" if lang == 'zh' else "Олон хувьсагчийг бөөнөөр шалгах"
+        batch = st.checkbox(label, key="t3_batch")
+        if batch:
+            label = "数据变量（可多选）" if lang == 'zh' else "Өгөгдлийн хувьсагчид"
+            data_vars = st.multiselect(label, df.columns, default=get_profile(df).numeric_columns(), key="t3_data_vars")
+            col1, col2 = st.columns(2)
+            label = "检验方法" if lang == 'zh' else "Шалгалтын арга"
+            method = col1.selectbox(label, ["student", "welch", "mannwhitney"], key="t3_method",
+                                    format_func=lambda m: BATCH_METHOD_NAMES[m])
+            label = "多重比较校正" if lang == 'zh' else "Олон харьцуулалтын залруулга"
+            adjust = col2.selectbox(label, ["holm", "bh", "none"], key="t3_adjust",
+                                    format_func=lambda a: BATCH_ADJUST_NAMES[a])
+        else:
+            label = "数据变量" if lang == 'zh' else "Өгөгдлийн хувьсагч"
+            data_var = st.selectbox(label, df.columns, key="t3_data")
         label = "分组变量" if lang == 'zh' else "Бүлгийн хувьсагч"
         group_var = st.selectbox(label, df.columns, key="t3_group")
+        if not batch:
+            resample, n_resamples, seed = _resampling_controls("t3", lang)
         
         btn = "执行检验" if lang == 'zh' else "Шалгалт гүйцэтгэх"
-        if st.button(btn):
+        if batch and data_vars and st.button(btn):
             try:
-                groups = df[group_var].unique()
-                if len(groups) != 2:
-                    st.error("❌ 分组变量必须恰好有 2 个水平")
-                else:
-                    # 转换为数值类型
-                    group1 = pd.to_numeric(df[df[group_var] == groups[0]][data_var], errors='coerce').dropna()
-                    group2 = pd.to_numeric(df[df[group_var] == groups[1]][data_var], errors='coerce').dropna()
+                variables = [var for var in data_vars if var != group_var]
+                res = cached_analysis(df, stat_engine.batch_t_test, group_var=group_var, variables=variables,
+                                      method=method, adjust=adjust)
+                significant = res.significant_variables()
+                
+                col1, col2 = st.columns(2)
+                col1.metric("检验变量数" if lang == 'zh' else "Хувьсагчийн тоо", len(res.table))
+                col2.metric("校正后显著" if lang == 'zh' else "Залруулсны дараа ач холбогдолтой", len(significant))
+                st.caption(f"组1 = {res.group1_name}，组2 = {res.group2_name}" if lang == 'zh'
+                           else f"Бүлэг 1 = {res.group1_name}，Бүлэг 2 = {res.group2_name}")
+                
+                formats = {col: "{:.3f}" for col in res.table.columns if res.table[col].dtype == float}
+                formats.update({"p": "{:.4f}", "p_adjusted": "{:.4f}"})
+                st.dataframe(res.table.style.format(formats, na_rep=""), use_container_width=True)
+                st.download_button(
+                    "📥 下载结果 CSV" if lang == 'zh' else "📥 Үр дүн татах CSV",
+                    res.table.to_csv().encode('utf-8-sig'), file_name="batch_test.csv", mime="text/csv"
+                )
+                st.session_state.stat_result = (
+                    f"批量两组比较（{BATCH_METHOD_NAMES[method]}，{adjust} 校正）：{group_var} 分组，"
+                    f"{len(res.table)} 个变量中 {len(significant)} 个显著"
+                )
+            except StatError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                st.error(f"❌ 执行检验时出错：{str(e)}")
+        elif not batch and st.button(btn):
+            try:
+                res = cached_analysis(df, stat_engine.independent_t_test, data_var=data_var, group_var=group_var)
+                p_value = res.p_value
+                    
+                result_df = pd.DataFrame({
+                    '分组变量': [group_var],
+                    '组1': [res.group1_name],
+                    '组2': [res.group2_name],
+                    'n1': [res.group1_n],
+                    'n2': [res.group2_n],
+                    'M1': [res.group1_mean],
+                    'M2': [res.group2_mean],
+                    't 统计量': [res.t_statistic],
+                    'p 值': [p_value],
+                    '显著性': [res.significant]
+                })
+                
+                st.dataframe(result_df, use_container_width=True)
+                st.session_state.stat_result = f"独立 t 检验：{data_var} by {group_var}, p={p_value:.4f}"
+                if resample:
+                    _submit_resampling(df, "t3", "mean_difference", [data_var], n_resamples, seed, group_var=group_var)
+                
+                # AI智能分析
+                st.markdown("---")
+                st.markdown("### 🤖 AI 智能分析")
+                
+                with st.spinner("AI正在分析结果..."):
+                    result_data = {
+                        'group_var': group_var,
+                        'data_var': data_var,
+                        'group1': res.group1_name,
+                        'group2': res.group2_name,
+                        'mean1': res.group1_mean,
+                        'mean2': res.group2_mean,
+                        't': res.t_statistic,
+                        'p': p_value
+                    }
                     
-                    if len(group1) < 2 or len(group2) < 2:
-                        st.error("❌ 每组至少需要2个有效数据点")
+                    ai_analysis = get_ai_analysis(result_data, "t_test")
+                    
+                    if ai_analysis:
+                        if p_value < 0.05:
+                            st.success(ai_analysis)
+                        else:
+                            st.info(ai_analysis)
                     else:
-                        t_stat, p_value = stats.ttest_ind(group1, group2)
-                        
-                        result_df = pd.DataFrame({
-                            '分组变量': [group_var],
-                            '组1': [groups[0]],
-                            '组2': [groups[1]],
-                            'n1': [len(group1)],
-                            'n2': [len(group2)],
-                            'M1': [float(group1.mean())],
-                            'M2': [float(group2.mean())],
-                            't 统计量': [float(t_stat)],
-                            'p 值': [float(p_value)],
-                            '显著性': ['***' if p_value < 0.001 else '**' if p_value < 0.01 else '*' if p_value < 0.05 else 'ns']
-                        })
-                        
-                        st.dataframe(result_df, use_container_width=True)
-                        st.session_state.stat_result = f"独立 t 检验：{data_var} by {group_var}, p={p_value:.4f}"
-                        
-                        # AI智能分析
-                        st.markdown("---")
-                        st.markdown("### 🤖 AI 智能分析")
-                        
-                        with st.spinner("AI正在分析结果..."):
-                            result_data = {
-                                'group_var': group_var,
-                                'data_var': data_var,
-                                'group1': str(groups[0]),
-                                'group2': str(groups[1]),
-                                'mean1': float(group1.mean()),
-                                'mean2': float(group2.mean()),
-                                't': float(t_stat),
-                                'p': float(p_value)
-                            }
-                            
-                            ai_analysis = get_ai_analysis(result_data, "t_test")
-                            
-                            if ai_analysis:
-                                if p_value < 0.05:
-                                    st.success(ai_analysis)
-                                else:
-                                    st.info(ai_analysis)
-                            else:
-                                # 如果AI分析失败，显示简单提示
-                                st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                        # 如果AI分析失败，显示简单提示
+                        st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ 执行检验时出错：{str(e)}")
+        if not batch and resample:
+            _show_resampling("t3", lang, [data_var], group_var=group_var)
     
     # 单因素方差分析 (index 5)
     elif stat_index == 5:
@@ -823,56 +1114,49 @@ def render_stat_view():
         btn = "执行分析" if lang == 'zh' else "Шинжилгээ гүйцэтгэх"
         if st.button(btn):
             try:
-                groups = df[group_var].unique()
-                # 转换为数值类型
-                group_data = [pd.to_numeric(df[df[group_var] == g][data_var], errors='coerce').dropna() for g in groups]
+                res = cached_analysis(df, stat_engine.one_way_anova, data_var=data_var, group_var=group_var)
+                p_value = res.p_value
                 
-                # 检查每组至少有数据
-                valid_groups = [g for g in group_data if len(g) >= 1]
-                if len(valid_groups) < 2:
-                    st.error("❌ 至少需要2组有效数据才能进行方差分析")
-                else:
-                    f_stat, p_value = f_oneway(*valid_groups)
-                    
-                    result_df = pd.DataFrame({
-                        '因变量': [data_var],
-                        '因素': [group_var],
-                        '组数': [len(valid_groups)],
-                        'F 统计量': [float(f_stat)],
-                        'p 值': [float(p_value)],
-                        '显著性': ['***' if p_value < 0.001 else '**' if p_value < 0.01 else '*' if p_value < 0.05 else 'ns']
-                    })
-                    
-                    st.dataframe(result_df, use_container_width=True)
-                    
-                    # 方差齐性检验
-                    lev_stat, lev_p = levene(*valid_groups)
-                    st.info(f"📊 Levene 方差齐性检验：F={lev_stat:.4f}, p={lev_p:.4f}")
-                    
-                    st.session_state.stat_result = f"单因素 ANOVA：{data_var} by {group_var}, F={f_stat:.4f}, p={p_value:.4f}"
+                result_df = pd.DataFrame({
+                    '因变量': [data_var],
+                    '因素': [group_var],
+                    '组数': [res.n_groups],
+                    'F 统计量': [res.f_statistic],
+                    'p 值': [p_value],
+                    '显著性': [res.significant]
+                })
+                
+                st.dataframe(result_df, use_container_width=True)
+                
+                # 方差齐性检验
+                st.info(f"📊 Levene 方差齐性检验：F={res.levene_statistic:.4f}, p={res.levene_p_value:.4f}")
+                
+                st.session_state.stat_result = f"单因素 ANOVA：{data_var} by {group_var}, F={res.f_statistic:.4f}, p={p_value:.4f}"
+                
+                # AI智能分析
+                st.markdown("---")
+                st.markdown("### 🤖 AI 智能分析")
+                
+                with st.spinner("AI正在分析结果..."):
+                    result_data = {
+                        'dependent': data_var,
+                        'factor': group_var,
+                        'n_groups': res.n_groups,
+                        'f': res.f_statistic,
+                        'p': p_value
+                    }
                     
-                    # AI智能分析
-                    st.markdown("---")
-                    st.markdown("### 🤖 AI 智能分析")
+                    ai_analysis = get_ai_analysis(result_data, "anova")
                     
-                    with st.spinner("AI正在分析结果..."):
-                        result_data = {
-                            'dependent': data_var,
-                            'factor': group_var,
-                            'n_groups': len(valid_groups),
-                            'f': float(f_stat),
-                            'p': float(p_value)
-                        }
-                        
-                        ai_analysis = get_ai_analysis(result_data, "anova")
-                        
-                        if ai_analysis:
-                            if p_value < 0.05:
-                                st.success(ai_analysis)
-                            else:
-                                st.info(ai_analysis)
+                    if ai_analysis:
+                        if p_value < 0.05:
+                            st.success(ai_analysis)
                         else:
-                            st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                            st.info(ai_analysis)
+                    else:
+                        st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ 执行分析时出错：{str(e)}")
     
@@ -881,73 +1165,97 @@ def render_stat_view():
         subheader = "🔗 Pearson 相关分析" if lang == 'zh' else "🔗 Pearson корреляцийн шинжилгээ"
         st.subheader(subheader)
         
-        label = "选择变量（至少2个）" if lang == 'zh' else "Хувьсагч сонгох (хамгийн багадаа 2)"
-        vars = st.multiselect(label, df.columns, key="corr_vars")
+        label = "使用全部数值变量" if lang == 'zh' else "Бүх тоон хувьсагчийг ашиглах"
+        if st.checkbox(label, key="corr_all_numeric"):
+            vars = get_profile(df).numeric_columns()
+            st.caption(f"共 {len(vars)} 个数值变量" if lang == 'zh' else f"Нийт {len(vars)} тоон хувьсагч")
+        else:
+            label = "选择变量（至少2个）" if lang == 'zh' else "Хувьсагч сонгох (хамгийн багадаа 2)"
+            vars = st.multiselect(label, df.columns, key="corr_vars")
+        
+        if len(vars) == 2:
+            resample, n_resamples, seed = _resampling_controls("corr", lang)
+        else:
+            resample = False
+        
+        # 变量很多时不显示完整矩阵，分块筛选最强的变量对
+        wide = len(vars) > WIDE_CORRELATION_LIMIT
+        if wide:
+            if lang == 'zh':
+                st.info(f"💡 变量超过 {WIDE_CORRELATION_LIMIT} 个，将分块计算（成对删除缺失值），只显示相关最强的变量对")
+            else:
+                st.info(f"💡 {WIDE_CORRELATION_LIMIT}-аас олон хувьсагч тул хэсэгчлэн тооцоолж, хамгийн хүчтэй хосуудыг харуулна")
+            col1, col2 = st.columns(2)
+            label = "显示前 N 对" if lang == 'zh' else "Эхний N хос"
+            top_n = col1.number_input(label, min_value=10, max_value=1000, value=50, step=10, key="corr_top_n")
+            label = "导出阈值 |r| ≥" if lang == 'zh' else "Экспортын босго |r| ≥"
+            export_threshold = col2.slider(label, 0.0, 1.0, 0.3, 0.05, key="corr_export_threshold")
         
         btn = "计算相关" if lang == 'zh' else "Корреляци тооцоолох"
-        if len(vars) >= 2 and st.button(btn):
+        if wide and st.button(btn):
+            st.session_state.corr_screen = (list(vars), int(top_n))
+        if wide and st.session_state.get("corr_screen") == (list(vars), int(top_n)):
+            # 结果保留到变量或 N 改变为止，点击导出按钮重跑时仍然显示
             try:
-                # 转换为数值类型
-                numeric_df = df[vars].apply(pd.to_numeric, errors='coerce')
-                numeric_df = numeric_df.dropna()
+                _show_correlation_screen(df, vars, int(top_n), export_threshold, lang)
+            except StatError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                st.error(f"❌ 执行分析时出错：{str(e)}")
+        elif len(vars) >= 2 and not wide and st.button(btn):
+            try:
+                res = cached_analysis(df, stat_engine.pearson_correlation, variables=vars, listwise=True)
+                corr_matrix = res.r
+                p_matrix = res.p
                 
-                if len(numeric_df) < 3:
-                    st.error("❌ 有效数据点太少，无法进行相关分析（至少需要3个有效数据点）")
-                else:
-                    corr_matrix = numeric_df.corr()
-                    
-                    st.write("#### 相关系数矩阵")
-                    st.dataframe(corr_matrix.style.background_gradient(cmap='coolwarm', vmin=-1, vmax=1), use_container_width=True)
-                    
-                    # 显著性检验
-                    st.write("#### 显著性检验")
-                    n = len(numeric_df)
-                    p_matrix = pd.DataFrame(index=vars, columns=vars)
-                    
+                st.write("#### 相关系数矩阵")
+                st.dataframe(corr_matrix.style.background_gradient(cmap='coolwarm', vmin=-1, vmax=1), use_container_width=True)
+                
+                # 显著性检验
+                st.write("#### 显著性检验")
+                st.dataframe(p_matrix.style.format("{:.4f}"), use_container_width=True)
+                
+                # 置信区间（Fisher z 变换）
+                st.write(f"#### 95% 置信区间（n = {res.n}）" if lang == 'zh' else f"#### 95% итгэлцлийн интервал（n = {res.n}）")
+                ci_df = pd.DataFrame(
+                    [[f"[{res.ci_lower.loc[v1, v2]:.3f}, {res.ci_upper.loc[v1, v2]:.3f}]" for v2 in vars] for v1 in vars],
+                    index=vars, columns=vars
+                )
+                st.dataframe(ci_df, use_container_width=True)
+                st.session_state.stat_result = f"Pearson 相关：{len(vars)} 个变量"
+                if resample:
+                    _submit_resampling(df, "corr", "correlation", vars, n_resamples, seed)
+                
+                # AI智能分析
+                st.markdown("---")
+                st.markdown("### 🤖 AI 智能分析")
+                
+                with st.spinner("AI正在分析结果..."):
+                    # 准备所有变量对的数据
+                    pairs_info = []
                     for i, var1 in enumerate(vars):
                         for j, var2 in enumerate(vars):
-                            if i != j:
+                            if i < j:  # 避免重复
                                 r = float(corr_matrix.loc[var1, var2])
-                                # 防止除零错误：当r接近±1时，1-r²接近0
-                                if abs(r) >= 0.9999:
-                                    # 完全相关或完全负相关，p值极小
-                                    p_matrix.loc[var1, var2] = 0.0
-                                else:
-                                    t = r * np.sqrt(n - 2) / np.sqrt(1 - r**2)
-                                    p = 2 * (1 - stats.t.cdf(abs(t), n - 2))
-                                    p_matrix.loc[var1, var2] = p
-                            else:
-                                p_matrix.loc[var1, var2] = 1.0
+                                p = float(p_matrix.loc[var1, var2])
+                                pairs_info.append(f"- {var1} 与 {var2}：r={r:.3f}, p={p:.4f}")
                     
-                    st.dataframe(p_matrix.astype(float).style.format("{:.4f}"), use_container_width=True)
-                    st.session_state.stat_result = f"Pearson 相关：{len(vars)} 个变量"
+                    result_data = {
+                        'pairs': '\n'.join(pairs_info)
+                    }
                     
-                    # AI智能分析
-                    st.markdown("---")
-                    st.markdown("### 🤖 AI 智能分析")
+                    ai_analysis = get_ai_analysis(result_data, "correlation")
                     
-                    with st.spinner("AI正在分析结果..."):
-                        # 准备所有变量对的数据
-                        pairs_info = []
-                        for i, var1 in enumerate(vars):
-                            for j, var2 in enumerate(vars):
-                                if i < j:  # 避免重复
-                                    r = float(corr_matrix.loc[var1, var2])
-                                    p = float(p_matrix.loc[var1, var2])
-                                    pairs_info.append(f"- {var1} 与 {var2}：r={r:.3f}, p={p:.4f}")
-                        
-                        result_data = {
-                            'pairs': '\n'.join(pairs_info)
-                        }
-                        
-                        ai_analysis = get_ai_analysis(result_data, "correlation")
-                        
-                        if ai_analysis:
-                            st.success(ai_analysis)
-                        else:
-                            st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                    if ai_analysis:
+                        st.success(ai_analysis)
+                    else:
+                        st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ 执行分析时出错：{str(e)}")
+        if resample:
+            _show_resampling("corr", lang, vars)
     
     # 一元线性回归 (index 7)
     elif stat_index == 7:
@@ -958,51 +1266,47 @@ def render_stat_view():
         x_var = st.selectbox(label, df.columns, key="reg1_x")
         label = "因变量 (Y)" if lang == 'zh' else "Хамааралтай хувьсагч (Y)"
         y_var = st.selectbox(label, df.columns, key="reg1_y")
+        full_report = _full_report_option("reg1", lang)
         
         btn = "执行回归" if lang == 'zh' else "Регресс гүйцэтгэх"
         if st.button(btn):
             try:
-                # 转换为数值类型
-                data = df[[x_var, y_var]].apply(pd.to_numeric, errors='coerce').dropna()
+                model = cached_analysis(df, stat_engine.linear_regression, y_var=y_var, x_vars=[x_var])
                 
-                if len(data) < 3:
-                    st.error("❌ 有效数据点太少，无法进行回归分析（至少需要3个有效数据点）")
-                else:
-                    X = sm.add_constant(data[x_var])
-                    y = data[y_var]
-                    
-                    model = sm.OLS(y, X).fit()
-                    
-                    st.write("#### 回归摘要")
-                    st.text(model.summary())
-                    
-                    st.write("#### 回归方程")
-                    st.latex(f"Y = {model.params[1]:.4f} \\times X + {model.params[0]:.4f}")
-                    st.info(f"R² = {model.rsquared:.4f}, p = {model.f_pvalue:.4f}")
-                    
-                    st.session_state.stat_result = f"一元回归：{y_var} ~ {x_var}, R²={model.rsquared:.4f}"
+                st.write("#### 回归系数")
+                _show_regression_table(model)
+                if full_report:
+                    _show_full_report(df, y_var, [x_var])
+                
+                st.write("#### 回归方程")
+                st.latex(f"Y = {model.coefficients[x_var]:.4f} \\times X + {model.coefficients['const']:.4f}")
+                st.info(f"R² = {model.r_squared:.4f}, p = {model.f_p_value:.4f}（n = {model.n}）")
+                
+                st.session_state.stat_result = f"一元回归：{y_var} ~ {x_var}, R²={model.r_squared:.4f}"
+                
+                # AI智能分析
+                st.markdown("---")
+                st.markdown("### 🤖 AI 智能分析")
+                
+                with st.spinner("AI正在分析结果..."):
+                    result_data = {
+                        'predictors': x_var,
+                        'outcome': y_var,
+                        'r2': model.r_squared,
+                        'p': model.f_p_value
+                    }
                     
-                    # AI智能分析
-                    st.markdown("---")
-                    st.markdown("### 🤖 AI 智能分析")
+                    ai_analysis = get_ai_analysis(result_data, "regression")
                     
-                    with st.spinner("AI正在分析结果..."):
-                        result_data = {
-                            'predictors': x_var,
-                            'outcome': y_var,
-                            'r2': float(model.rsquared),
-                            'p': float(model.f_pvalue)
-                        }
-                        
-                        ai_analysis = get_ai_analysis(result_data, "regression")
-                        
-                        if ai_analysis:
-                            if model.f_pvalue < 0.05:
-                                st.success(ai_analysis)
-                            else:
-                                st.info(ai_analysis)
+                    if ai_analysis:
+                        if model.f_p_value < 0.05:
+                            st.success(ai_analysis)
                         else:
-                            st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                            st.info(ai_analysis)
+                    else:
+                        st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ 执行回归时出错：{str(e)}")
     
@@ -1015,49 +1319,49 @@ def render_stat_view():
         y_var = st.selectbox(label, df.columns, key="regm_y")
         label = "自变量 (X, 可多选)" if lang == 'zh' else "Бие даасан хувьсагч (X, олон сонголттай)"
         x_vars = st.multiselect(label, [c for c in df.columns if c != y_var], key="regm_x")
+        full_report = _full_report_option("regm", lang)
         
         btn = "执行回归" if lang == 'zh' else "Регресс гүйцэтгэх"
         if x_vars and st.button(btn):
             try:
-                # 转换为数值类型
-                data = df[[y_var] + x_vars].apply(pd.to_numeric, errors='coerce').dropna()
+                model = cached_analysis(df, stat_engine.linear_regression, y_var=y_var, x_vars=x_vars)
                 
-                if len(data) < len(x_vars) + 2:
-                    st.error(f"❌ 有效数据点太少，无法进行回归分析（至少需要{len(x_vars) + 2}个有效数据点）")
-                else:
-                    X = sm.add_constant(data[x_vars])
-                    y = data[y_var]
-                    
-                    model = sm.OLS(y, X).fit()
-                    
-                    st.write("#### 回归摘要")
-                    st.text(model.summary())
-                    
-                    st.info(f"R² = {model.rsquared:.4f}, Adj R² = {model.rsquared_adj:.4f}, p = {model.f_pvalue:.4f}")
+                st.write("#### 回归系数")
+                _show_regression_table(model)
+                if full_report:
+                    _show_full_report(df, y_var, x_vars)
+                
+                st.info(f"R² = {model.r_squared:.4f}, Adj R² = {model.adj_r_squared:.4f}, "
+                        f"F({model.df_model}, {model.df_resid}) = {model.f_statistic:.4f}, p = {model.f_p_value:.4f}")
+                if (model.vif > 10).any():
+                    st.warning("⚠️ 存在 VIF > 10 的自变量，可能有严重的多重共线性" if lang == 'zh'
+                               else "⚠️ VIF > 10 хувьсагч байна, олон шугаман хамаарал хүчтэй байж болзошгүй")
+                
+                st.session_state.stat_result = f"多元回归：{y_var} ~ {'+'.join(x_vars)}, R²={model.r_squared:.4f}"
+                
+                # AI智能分析
+                st.markdown("---")
+                st.markdown("### 🤖 AI 智能分析")
+                
+                with st.spinner("AI正在分析结果..."):
+                    result_data = {
+                        'predictors': '+'.join(x_vars),
+                        'outcome': y_var,
+                        'r2': model.r_squared,
+                        'p': model.f_p_value
+                    }
                     
-                    st.session_state.stat_result = f"多元回归：{y_var} ~ {'+'.join(x_vars)}, R²={model.rsquared:.4f}"
+                    ai_analysis = get_ai_analysis(result_data, "regression")
                     
-                    # AI智能分析
-                    st.markdown("---")
-                    st.markdown("### 🤖 AI 智能分析")
-                    
-                    with st.spinner("AI正在分析结果..."):
-                        result_data = {
-                            'predictors': '+'.join(x_vars),
-                            'outcome': y_var,
-                            'r2': float(model.rsquared),
-                            'p': float(model.f_pvalue)
-                        }
-                        
-                        ai_analysis = get_ai_analysis(result_data, "regression")
-                        
-                        if ai_analysis:
-                            if model.f_pvalue < 0.05:
-                                st.success(ai_analysis)
-                            else:
-                                st.info(ai_analysis)
+                    if ai_analysis:
+                        if model.f_p_value < 0.05:
+                            st.success(ai_analysis)
                         else:
-                            st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                            st.info(ai_analysis)
+                    else:
+                        st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ 执行回归时出错：{str(e)}")
     
@@ -1068,67 +1372,61 @@ def render_stat_view():
         
         label = "选择题目/量表项" if lang == 'zh' else "Асуулт/хэмжүүрийн зүйл сонгох"
         items = st.multiselect(label, df.columns, key="alpha_items")
+        resample, n_resamples, seed = _resampling_controls("alpha", lang)
         
         btn = "计算信度" if lang == 'zh' else "Найдвартай байдлыг тооцоолох"
         if len(items) >= 2 and st.button(btn):
             try:
-                # 转换为数值类型
-                data = df[items].apply(pd.to_numeric, errors='coerce').dropna()
+                res = cached_analysis(df, stat_engine.cronbach_alpha, items=items)
+                n_items = res.n_items
+                alpha = res.alpha
+                
+                result_df = pd.DataFrame({
+                    '题目数': [n_items],
+                    '样本量': [res.n],
+                    "Cronbach's Alpha": [alpha]
+                })
                 
-                if len(data) < 2:
-                    st.error("❌ 有效数据点太少，无法计算信度（至少需要2个有效数据点）")
+                st.dataframe(result_df, use_container_width=True)
+                
+                if alpha >= 0.9:
+                    st.success("✅ 优秀信度 (α ≥ 0.9)")
+                elif alpha >= 0.8:
+                    st.success("✅ 良好信度 (α ≥ 0.8)")
+                elif alpha >= 0.7:
+                    st.info("ℹ️ 可接受信度 (α ≥ 0.7)")
                 else:
-                    n_items = len(items)
+                    st.warning("⚠️ 信度偏低 (α < 0.7)")
+                
+                st.session_state.stat_result = f"Cronbach's Alpha = {alpha:.4f}"
+                if resample:
+                    _submit_resampling(df, "alpha", "alpha", items, n_resamples, seed)
+                
+                # AI智能分析
+                st.markdown("---")
+                st.markdown("### 🤖 AI 智能分析")
+                
+                with st.spinner("AI正在分析结果..."):
+                    result_data = {
+                        'n_items': n_items,
+                        'alpha': alpha
+                    }
                     
-                    # 计算 Cronbach's Alpha
-                    item_vars = float(data.var(axis=0).sum())
-                    total_var = float(data.sum(axis=1).var())
+                    ai_analysis = get_ai_analysis(result_data, "reliability")
                     
-                    if total_var == 0:
-                        st.error("❌ 数据方差为0，无法计算信度")
-                    else:
-                        alpha = float((n_items / (n_items - 1)) * (1 - item_vars / total_var))
-                        
-                        result_df = pd.DataFrame({
-                            '题目数': [n_items],
-                            '样本量': [len(data)],
-                            "Cronbach's Alpha": [alpha]
-                        })
-                        
-                        st.dataframe(result_df, use_container_width=True)
-                        
-                        if alpha >= 0.9:
-                            st.success("✅ 优秀信度 (α ≥ 0.9)")
-                        elif alpha >= 0.8:
-                            st.success("✅ 良好信度 (α ≥ 0.8)")
-                        elif alpha >= 0.7:
-                            st.info("ℹ️ 可接受信度 (α ≥ 0.7)")
+                    if ai_analysis:
+                        if alpha >= 0.7:
+                            st.success(ai_analysis)
                         else:
-                            st.warning("⚠️ 信度偏低 (α < 0.7)")
-                        
-                        st.session_state.stat_result = f"Cronbach's Alpha = {alpha:.4f}"
-                        
-                        # AI智能分析
-                        st.markdown("---")
-                        st.markdown("### 🤖 AI 智能分析")
-                        
-                        with st.spinner("AI正在分析结果..."):
-                            result_data = {
-                                'n_items': n_items,
-                                'alpha': alpha
-                            }
-                            
-                            ai_analysis = get_ai_analysis(result_data, "reliability")
-                            
-                            if ai_analysis:
-                                if alpha >= 0.7:
-                                    st.success(ai_analysis)
-                                else:
-                                    st.warning(ai_analysis)
-                            else:
-                                st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                            st.warning(ai_analysis)
+                    else:
+                        st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ 计算信度时出错：{str(e)}")
+        if resample:
+            _show_resampling("alpha", lang, items)
     
     # 简单中介效应 (index 10)
     elif stat_index == 10:
@@ -1144,85 +1442,39 @@ def render_stat_view():
         m_var = st.selectbox(label, df.columns, key="med_m")
         label = "因变量 (Y)" if lang == 'zh' else "Хамааралтай хувьсагч (Y)"
         y_var = st.selectbox(label, df.columns, key="med_y")
+        col1, col2 = st.columns(2)
+        label = "Bootstrap 次数" if lang == 'zh' else "Bootstrap тоо"
+        n_resamples = int(col1.number_input(label, min_value=100, max_value=100_000, value=5000, step=500, key="med_n_resamples"))
+        label = "随机种子" if lang == 'zh' else "Санамсаргүй үр"
+        seed = int(col2.number_input(label, min_value=0, value=0, step=1, key="med_seed"))
         
         btn = "执行中介分析" if lang == 'zh' else "Зуучлах шинжилгээ гүйцэтгэх"
         if st.button(btn):
             try:
-                # 转换为数值类型
-                data = df[[x_var, m_var, y_var]].apply(pd.to_numeric, errors='coerce').dropna()
-                
-                if len(data) < 4:
-                    st.error("❌ 有效数据点太少，无法进行中介分析（至少需要4个有效数据点）")
-                else:
-                    # 路径 a: X → M
-                    X_a = sm.add_constant(data[x_var])
-                    model_a = sm.OLS(data[m_var], X_a).fit()
-                    a = float(model_a.params[1])
-                    
-                    # 路径 b: M → Y (控制 X)
-                    X_b = sm.add_constant(data[[x_var, m_var]])
-                    model_b = sm.OLS(data[y_var], X_b).fit()
-                    b = float(model_b.params[m_var])
-                    c_prime = float(model_b.params[x_var])
-                    
-                    # 路径 c: X → Y (总效应)
-                    X_c = sm.add_constant(data[x_var])
-                    model_c = sm.OLS(data[y_var], X_c).fit()
-                    c = float(model_c.params[1])
-                    
-                    # 中介效应
-                    indirect = a * b
-                    direct = c_prime
-                    total = c
-                    
-                    result_df = pd.DataFrame({
-                        '路径': ['a (X→M)', 'b (M→Y)', "c' (X→Y直接)", 'c (X→Y总)', '中介效应 (a×b)'],
-                        '系数': [a, b, c_prime, c, indirect],
-                        'p值': [float(model_a.pvalues[1]), float(model_b.pvalues[m_var]), float(model_b.pvalues[x_var]), float(model_c.pvalues[1]), np.nan]
-                    })
-                    
-                    st.dataframe(result_df, use_container_width=True)
-                    
-                    st.info(f"""
-                    📊 中介效应分析结果：
-                    - 总效应 c = {c:.4f}
-                    - 直接效应 c' = {c_prime:.4f}
-                    - 间接效应 a×b = {indirect:.4f}
-                    - 中介比例 = {(indirect/c*100 if c != 0 else 0):.2f}%
-                    """)
-                    
-                    st.session_state.stat_result = f"中介效应：{x_var}→{m_var}→{y_var}, 间接效应={indirect:.4f}"
-                    
-                    # AI智能分析
-                    st.markdown("---")
-                    st.markdown("### 🤖 AI 智能分析")
-                    
-                    with st.spinner("AI正在分析结果..."):
-                        result_data = {
-                            'x_var': x_var,
-                            'm_var': m_var,
-                            'y_var': y_var,
-                            'a': a,
-                            'p_a': float(model_a.pvalues[1]),
-                            'b': b,
-                            'p_b': float(model_b.pvalues[m_var]),
-                            'c': c,
-                            'c_prime': c_prime,
-                            'indirect': indirect,
-                            'mediation_ratio': (indirect/c*100 if c != 0 else 0)
-                        }
-                        
-                        ai_analysis = get_ai_analysis(result_data, "mediation")
-                        
-                        if ai_analysis:
-                            # 判断中介效应是否显著
-                            if model_a.pvalues[1] < 0.05 and model_b.pvalues[m_var] < 0.05:
-                                st.success(ai_analysis)
-                            else:
-                                st.info(ai_analysis)
-                        else:
-                            st.info("💡 请在 **🤖 AI 辅助分析** 中配置AI后，可获得智能分析结果。")
+                # 先检查变量和样本量（路径系数很快，结果进入缓存供结果区使用）
+                cached_analysis(df, stat_engine.mediation_analysis, x_var=x_var, m_var=m_var, y_var=y_var)
+                # Bootstrap 在后台进程中计算，完成后由下面的结果区显示
+                _submit_job(
+                    "med", df, stat_engine.resampling_inference, f"Bootstrap 中介效应（B = {n_resamples}）",
+                    analysis="indirect_effect", variables=[x_var, m_var, y_var],
+                    n_resamples=n_resamples, seed=seed, n_jobs=1
+                )
+                st.session_state.med_vars = [x_var, m_var, y_var]
+            except StatError as e:
+                st.error(f"❌ {e}")
             except Exception as e:
                 st.error(f"❌ 执行中介分析时出错：{str(e)}")
-
-
+        
+        # 结果区：等待后台 Bootstrap，之后的重跑中继续显示已完成的结果
+        if st.session_state.get("med_job") and st.session_state.get("med_vars") == [x_var, m_var, y_var]:
+            try:
+                boot = _await_job("med", lang)
+                if boot is not None:
+                    _show_mediation(df, x_var, m_var, y_var, boot)
+            except StatError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                st.error(f"❌ 执行中介分析时出错：{str(e)}")
+    
+    # 有后台任务在计算时定时重跑，刷新进度
+    _poll_jobs()
@@ -0,0 +1,176 @@
+"""AI 服务客户端：按配置共享的 OpenAI 客户端（连接池复用）
+
+每次调用都新建 OpenAI(...) 会新建一个 HTTP 连接池并重新进行 TLS 握手，旧的连接池
+要等垃圾回收才关闭。这里按 (API Key, Base URL) 只创建一次客户端，所有会话和视图共用：
+
+- 长连接（keep-alive）复用，后续请求省去建连和握手；
+- 连接、读取超时固定，服务无响应时不会无限等待；
+- 每个客户端同时进行的请求数有上限，超过时排队等待，排队超时则报错而不是继续堆积连接；
+- 客户端按 LRU 保留若干个（配置被修改后旧客户端会被淘汰），淘汰时关闭连接池。
+
+流式输出（stream_chat）：回复逐块到达，界面可以边生成边显示，用户等待的是首个 token
+而不是整段回复；工具调用的参数片段在流中拼接，结束后与非流式调用得到相同的内容。
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+import httpx
+from openai import OpenAI
+
+# 每个客户端的连接池：最多 16 个连接，空闲连接保留 60 秒
+MAX_CONNECTIONS = 16
+MAX_KEEPALIVE_CONNECTIONS = 8
+KEEPALIVE_EXPIRY = 60.0
+# 超时（秒）：建立连接 10 秒，等待响应 120 秒（长回复的生成时间较长）
+CONNECT_TIMEOUT = 10.0
+REQUEST_TIMEOUT = 120.0
+MAX_RETRIES = 2
+# 每个客户端同时进行的请求数上限，以及排队等待的最长时间（秒）
+MAX_CONCURRENT_REQUESTS = 8
+ACQUIRE_TIMEOUT = 30.0
+# 保留的客户端个数
+_MAX_CLIENTS = 8
+# 流式输出时刷新界面的最短间隔（秒）
+STREAM_UPDATE_INTERVAL = 0.1
+
+
+class AIBusyError(RuntimeError):
+    """同时进行的 AI 请求已达上限，排队超时"""
+
+
+@dataclass
+class ToolCall:
+    """流式回复中拼接完成的一个工具调用"""
+    id: str = ""
+    name: str = ""
+    arguments: str = ""
+
+
+class ChatStream:
+    """流式对话补全：迭代得到文本增量，结束后 content / tool_calls 为完整结果
+
+    请求在开始迭代时才发出，迭代期间占用一个并发名额。
+    """
+
+    def __init__(self, pooled: "PooledClient", kwargs: dict):
+        self._pooled = pooled
+        self._kwargs = kwargs
+        self.content = ""
+        self.tool_calls = []
+        self.time_to_first_token = None  # 秒；没有文本输出时为 None
+
+    def __iter__(self):
+        started = time.perf_counter()
+        calls = {}
+        with self._pooled.slot() as client:
+            response = client.chat.completions.create(stream=True, **self._kwargs)
+            try:
+                for chunk in response:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    for call in delta.tool_calls or []:
+                        entry = calls.setdefault(call.index, ToolCall())
+                        entry.id = call.id or entry.id
+                        if call.function is not None:
+                            entry.name += call.function.name or ""
+                            entry.arguments += call.function.arguments or ""
+                    if delta.content:
+                        if self.time_to_first_token is None:
+                            self.time_to_first_token = time.perf_counter() - started
+                        self.content += delta.content
+                        yield delta.content
+            finally:
+                response.close()
+        self.tool_calls = [calls[i] for i in sorted(calls)]
+
+    def collect(self, on_update=None, interval: float = STREAM_UPDATE_INTERVAL) -> str:
+        """读完整个流，返回完整文本；on_update(已收到的文本) 至多每 interval 秒调用一次"""
+        last_update = 0.0
+        for _ in self:
+            now = time.monotonic()
+            if on_update is not None and now - last_update >= interval:
+                on_update(self.content)
+                last_update = now
+        return self.content
+
+
+class PooledClient:
+    """一个 OpenAI 客户端及其并发限制"""
+
+    def __init__(self, api_key: str, base_url: str):
+        timeout = httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+        self._http = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+        self.client = OpenAI(api_key=api_key, base_url=base_url or None, timeout=timeout,
+                             max_retries=MAX_RETRIES, http_client=self._http)
+        self._slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._retired = False
+
+    @contextmanager
+    def slot(self):
+        """占用一个并发名额；排队超过 ACQUIRE_TIMEOUT 时抛出 AIBusyError"""
+        if not self._slots.acquire(timeout=ACQUIRE_TIMEOUT):
+            raise AIBusyError("AI 服务请求繁忙，请稍后重试 / AI үйлчилгээ завгүй байна, дараа дахин оролдоно уу")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield self.client
+        finally:
+            self._slots.release()
+            with self._lock:
+                self._in_flight -= 1
+                close = self._retired and not self._in_flight
+            if close:
+                self._http.close()
+
+    def retire(self):
+        """被淘汰：没有进行中的请求时立即关闭连接池，否则等最后一个请求结束后关闭"""
+        with self._lock:
+            self._retired = True
+            close = not self._in_flight
+        if close:
+            self._http.close()
+
+    def stream_chat(self, **kwargs) -> ChatStream:
+        """流式 chat.completions.create，受并发上限约束"""
+        return ChatStream(self, kwargs)
+
+
+_clients = OrderedDict()  # (API Key 摘要, Base URL) → PooledClient
+_clients_lock = threading.Lock()
+
+
+def _config_key(config: dict) -> tuple:
+    # 键中只保存 API Key 的摘要
+    digest = hashlib.sha256(str(config.get('api_key', '')).encode('utf-8')).hexdigest()
+    return digest, (config.get('base_url') or '').rstrip('/')
+
+
+def get_ai_client(config: dict) -> PooledClient:
+    """配置（api_key / base_url）对应的共享客户端"""
+    key = _config_key(config)
+    with _clients_lock:
+        pooled = _clients.get(key)
+        if pooled is not None:
+            _clients.move_to_end(key)
+            return pooled
+        pooled = PooledClient(config['api_key'], config.get('base_url'))
+        _clients[key] = pooled
+        evicted = []
+        while len(_clients) > _MAX_CLIENTS:
+            evicted.append(_clients.popitem(last=False)[1])
+    for old in evicted:
+        old.retire()
+    return pooled
@@ -0,0 +1,146 @@
+"""批量两组比较：多个结果变量 × 同一个二分组变量，一次矩阵运算完成全部检验
+
+values 为 样本 × 变量 的二维数组（缺失值为 NaN），in_group1 / in_group2 为行的布尔掩码。
+每个变量只使用自身有效的样本（逐变量删除缺失值），与逐个调用 independent_t_test 的结果一致。
+各方法的 effect_size（t 检验为 Cohen's d，Mann–Whitney 为秩二列相关）方向相同：正值表示组 1 的取值偏高。
+"""
+import warnings
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+T_TEST_METHODS = ("student", "welch")
+METHODS = T_TEST_METHODS + ("mannwhitney",)
+ADJUST_METHODS = ("holm", "bh", "none")
+
+
+def _group_moments(values: np.ndarray, in_group: np.ndarray):
+    """每个变量在组内的样本量、均值、标准差（ddof=1）"""
+    data = np.where(in_group[:, None], values, np.nan)
+    n = (~np.isnan(data)).sum(axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # 组内全部缺失 / 只有 1 个值
+        mean = np.nanmean(data, axis=0)
+        std = np.nanstd(data, axis=0, ddof=1)
+    return n, mean, std
+
+
+def t_tests(values: np.ndarray, in_group1: np.ndarray, in_group2: np.ndarray, method: str = "student",
+            confidence: float = 0.95) -> pd.DataFrame:
+    """Student / Welch t 检验，返回每个变量一行（列顺序与 values 一致）"""
+    n1, mean1, std1 = _group_moments(values, in_group1)
+    n2, mean2, std2 = _group_moments(values, in_group2)
+    var1, var2 = std1 ** 2, std2 ** 2
+    mean_diff = mean1 - mean2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pooled_std = np.sqrt(((n1 - 1) * var1 + (n2 - 1) * var2) / (n1 + n2 - 2))
+        if method == "welch":
+            a, b = var1 / n1, var2 / n2
+            se = np.sqrt(a + b)
+            # Welch–Satterthwaite 自由度
+            df = (a + b) ** 2 / (a ** 2 / (n1 - 1) + b ** 2 / (n2 - 1))
+        else:
+            se = pooled_std * np.sqrt(1 / n1 + 1 / n2)
+            df = (n1 + n2 - 2).astype(float)
+        t = mean_diff / se
+        p = 2 * stats.t.sf(np.abs(t), df)
+        half_width = stats.t.ppf(0.5 + confidence / 2, df) * se
+        cohens_d = mean_diff / pooled_std
+
+    valid = (n1 >= 2) & (n2 >= 2)
+    table = pd.DataFrame({
+        "n1": n1, "n2": n2,
+        "mean1": mean1, "mean2": mean2,
+        "std1": std1, "std2": std2,
+        "mean_diff": mean_diff,
+        "statistic": t, "df": df, "p": p,
+        "ci_lower": mean_diff - half_width,
+        "ci_upper": mean_diff + half_width,
+        "effect_size": cohens_d
+    })
+    table.loc[~valid, ["statistic", "df", "p", "ci_lower", "ci_upper", "effect_size"]] = np.nan
+    return table
+
+
+def _tie_correction(values: np.ndarray) -> np.ndarray:
+    """每列 Σ(t³ - t)：t 为相同取值的个数（忽略 NaN）"""
+    k = values.shape[1]
+    ordered = np.sort(values, axis=0).T.ravel()  # 逐列排序后按列展平，NaN 排在每列末尾
+    column = np.repeat(np.arange(k), values.shape[0])
+    present = ~np.isnan(ordered)
+    ordered, column = ordered[present], column[present]
+    if len(ordered) == 0:
+        return np.zeros(k)
+
+    # 列号或取值变化处开始新的一段相同值
+    starts = np.flatnonzero(np.r_[True, (np.diff(ordered) != 0) | (np.diff(column) != 0)])
+    lengths = np.diff(np.r_[starts, len(ordered)]).astype(float)
+    return np.bincount(column[starts], weights=lengths ** 3 - lengths, minlength=k)
+
+
+def mann_whitney(values: np.ndarray, in_group1: np.ndarray, in_group2: np.ndarray) -> pd.DataFrame:
+    """Mann–Whitney U 检验（正态近似，含结校正与连续性校正），返回每个变量一行
+
+    effect_size 为秩二列相关 r = 2U₁/(n₁n₂) - 1。
+    """
+    data = np.where((in_group1 | in_group2)[:, None], values, np.nan)
+    # 缺失值记为 +inf 后整体求秩：有效值的秩与只在有效值中求秩相同
+    ranks = stats.rankdata(np.where(np.isnan(data), np.inf, data), axis=0)
+    present = ~np.isnan(data)
+    in_1 = present & in_group1[:, None]
+    in_2 = present & in_group2[:, None]
+    n1 = in_1.sum(axis=0)
+    n2 = in_2.sum(axis=0)
+    n = n1 + n2
+
+    rank_sum1 = np.where(in_1, ranks, 0.0).sum(axis=0)
+    u1 = rank_sum1 - n1 * (n1 + 1) / 2.0
+    u2 = n1 * n2 - u1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(n1 * n2 / 12.0 * ((n + 1) - _tie_correction(data) / (n * (n - 1))))
+        z = (np.maximum(u1, u2) - n1 * n2 / 2.0 - 0.5) / sigma
+        p = np.clip(2 * stats.norm.sf(z), 0, 1)
+        rank_biserial = 2 * u1 / (n1 * n2) - 1
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median1 = np.nanmedian(np.where(in_1, data, np.nan), axis=0)
+        median2 = np.nanmedian(np.where(in_2, data, np.nan), axis=0)
+
+    valid = (n1 >= 1) & (n2 >= 1) & (sigma > 0)
+    table = pd.DataFrame({
+        "n1": n1, "n2": n2,
+        "median1": median1, "median2": median2,
+        "statistic": u1, "z": z, "p": p,
+        "effect_size": rank_biserial
+    })
+    table.loc[~valid, ["statistic", "z", "p", "effect_size"]] = np.nan
+    return table
+
+
+def adjust_pvalues(p_values, method: str = "holm") -> np.ndarray:
+    """多重比较校正：holm（Holm–Bonferroni，控制 FWER）/ bh（Benjamini–Hochberg，控制 FDR）/ none
+
+    NaN 不计入比较次数，原样保留。
+    """
+    p = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(p))
+    m = len(valid)
+    if m == 0 or method == "none":
+        adjusted[valid] = p[valid]
+        return adjusted
+
+    order = valid[np.argsort(p[valid], kind='stable')]
+    ranked = p[order]
+    if method == "holm":
+        # 第 i 小的 p 乘以 (m - i + 1)，再向后取累计最大值保证单调
+        scaled = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    elif method == "bh":
+        # 第 i 小的 p 乘以 m / i，再从后向前取累计最小值保证单调
+        scaled = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError(f"不支持的校正方法：{method}")
+    adjusted[order] = np.minimum(scaled, 1.0)
+    return adjusted
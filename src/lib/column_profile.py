@@ -0,0 +1,128 @@
+"""列概况：每个数据集只计算一次的列级元信息
+
+包括类型类别、样本量、缺失数、不同取值数、常见取值、最小/最大值、是否多选题。
+按数据集内容指纹缓存在结果缓存中，统计视图、值标签视图和 AI 系统提示共用同一份；
+数据内容变化（指纹变化）后自动重新计算。指纹按数据对象缓存，修改数据时
+（如类型优化、追加行）都生成新的 DataFrame，不原地修改 st.session_state.data。
+"""
+from dataclasses import dataclass, field
+import pandas as pd
+from src.lib.result_cache import cached_analysis
+
+# 不同取值数不超过该值时保存排序后的全部取值
+MAX_LISTED_VALUES = 1000
+# 保存的常见取值个数
+TOP_N = 5
+
+
+def is_numeric_column(series: pd.Series) -> bool:
+    """是否按数值型变量处理（包括降精度后的 int8/float32 等，不含布尔型）"""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def detect_multiple_choice(data: pd.Series) -> bool:
+    """根据前 20 个有效值判断是否为分号分隔的多选题"""
+    try:
+        sample = data.head(20).astype(str)
+        return bool(sample.str.contains(';', regex=False).any())
+    except Exception:
+        return False
+
+
+def sorted_values(values):
+    """安全排序：全是数字时按数值排序，否则按字符串排序"""
+    values = list(values)
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return sorted(values)
+    return sorted(values, key=str)
+
+
+@dataclass
+class ColumnProfile:
+    name: str
+    dtype: str
+    kind: str  # numeric / categorical / multiple_choice / empty
+    n: int
+    missing: int
+    nunique: int
+    top_values: dict = field(default_factory=dict)  # 取值 → 频次（前 TOP_N 个）
+    values: list = None  # 排序后的全部取值；不同取值数超过 MAX_LISTED_VALUES 时为 None
+    min: float = None
+    max: float = None
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.kind == "numeric"
+
+    @property
+    def is_multiple_choice(self) -> bool:
+        return self.kind == "multiple_choice"
+
+    def type_hint(self) -> str:
+        """简短的类型说明（用于 AI 系统提示中的变量列表）"""
+        if self.kind == "numeric":
+            return f"数值，{self.min:g}~{self.max:g}"
+        if self.kind == "multiple_choice":
+            return "多选题，分号分隔"
+        if self.kind == "empty":
+            return "全部缺失"
+        return f"分类，{self.nunique}个取值"
+
+
+@dataclass
+class DatasetProfile:
+    n_rows: int
+    columns: dict = field(default_factory=dict)  # 列名 → ColumnProfile
+
+    def __getitem__(self, name) -> ColumnProfile:
+        return self.columns[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self.columns
+
+    def numeric_columns(self) -> list:
+        return [name for name, col in self.columns.items() if col.is_numeric]
+
+
+def profile_column(series: pd.Series) -> ColumnProfile:
+    """计算单列概况"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.cat.remove_unused_categories()
+    data = series.dropna()
+    missing = int(len(series) - len(data))
+    profile = ColumnProfile(
+        name=str(series.name), dtype=str(series.dtype), kind="empty",
+        n=len(data), missing=missing, nunique=0
+    )
+    if len(data) == 0:
+        return profile
+
+    # 一次 value_counts 同时得到不同取值数、常见取值和全部取值
+    counts = data.value_counts()
+    profile.nunique = len(counts)
+    profile.top_values = {value: int(count) for value, count in counts.head(TOP_N).items()}
+    if profile.nunique <= MAX_LISTED_VALUES:
+        profile.values = sorted_values(counts.index.tolist())
+
+    if is_numeric_column(series):
+        profile.kind = "numeric"
+        profile.min = float(data.min())
+        profile.max = float(data.max())
+    elif detect_multiple_choice(data):
+        profile.kind = "multiple_choice"
+    else:
+        profile.kind = "categorical"
+    return profile
+
+
+def build_profile(df: pd.DataFrame) -> DatasetProfile:
+    """计算数据集所有列的概况（不走缓存，通常应使用 get_profile）"""
+    profile = DatasetProfile(n_rows=len(df))
+    for col in df.columns:
+        profile.columns[col] = profile_column(df[col])
+    return profile
+
+
+def get_profile(df: pd.DataFrame) -> DatasetProfile:
+    """数据集的列概况，按内容指纹缓存"""
+    return cached_analysis(df, build_profile)
@@ -0,0 +1,246 @@
+"""矩阵化的 Pearson 相关：一次计算所有变量对的 r、t、p、成对样本量和 Fisher-z 置信区间
+
+有缺失值时按成对删除（pairwise-complete）：用缺失掩码矩阵的乘积得到每一对变量
+共同有效的样本量以及对应的和、平方和、交叉积，不需要逐对循环。
+
+变量很多（上千列）时按列分块计算：每次只计算一个 block × block 的子矩阵，
+可以只保留最强的若干对 / 超过阈值的变量对，或把结果逐块写入磁盘，
+内存占用与变量数的平方无关。分块计算也可以直接传入 DataFrame，每次只把当前的
+两个列块转换为 float64，不生成整张表的数值副本。
+"""
+import warnings
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# 分块计算时每块的列数
+DEFAULT_BLOCK_SIZE = 512
+# 相关分析的变量数超过该值时改为分块筛选，只返回最强的变量对
+WIDE_CORRELATION_LIMIT = 30
+# 摘要中统计的 |r| 分界
+SUMMARY_THRESHOLDS = (0.3, 0.5, 0.7)
+PAIR_COLUMNS = ["var1", "var2", "r", "n", "p", "ci_lower", "ci_upper"]
+
+
+@dataclass
+class CorrelationArrays:
+    r: np.ndarray
+    n: np.ndarray  # 每对变量共同有效的样本量
+    t: np.ndarray
+    p: np.ndarray
+    ci_lower: np.ndarray
+    ci_upper: np.ndarray
+
+
+@dataclass
+class _Prepared:
+    """预处理后的数据：无缺失时为标准化矩阵，有缺失时为中心化矩阵 + 有效掩码"""
+    data: np.ndarray
+    present: np.ndarray = None
+    n_rows: int = 0
+
+
+def _prepare(values) -> _Prepared:
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values)
+    if mask.all():
+        centered = values - values.mean(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            standardized = centered / np.sqrt((centered ** 2).sum(axis=0))
+        return _Prepared(data=standardized, n_rows=values.shape[0])
+
+    # 先按列整体均值中心化，减小大数相减带来的精度损失（相关系数不受平移影响）
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # 全部缺失的列
+        means = np.nanmean(values, axis=0)
+    centered = np.where(mask, values - means, 0.0)
+    return _Prepared(data=centered, present=mask.astype(np.float64), n_rows=values.shape[0])
+
+
+def _columns(values, cols: slice) -> np.ndarray:
+    """取出一个列块；DataFrame 只转换这一块（无法转换的值记为缺失）"""
+    if isinstance(values, pd.DataFrame):
+        block = values.iloc[:, cols]
+        return np.column_stack([pd.to_numeric(block.iloc[:, i], errors='coerce').to_numpy(dtype=np.float64)
+                                for i in range(block.shape[1])])
+    return np.asarray(values)[:, cols]
+
+
+def _block_moments(row_block: _Prepared, col_block: _Prepared):
+    """两个预处理后的变量块之间的相关系数与成对样本量"""
+    a, b = row_block.data, col_block.data
+    if row_block.present is None and col_block.present is None:
+        # 无缺失：标准化后一次矩阵乘法
+        r = a.T @ b
+        return r, np.full(r.shape, float(row_block.n_rows))
+
+    # 无缺失的块（已标准化）按全部有效处理；相关系数不受缩放影响
+    mask_a = row_block.present if row_block.present is not None else np.ones_like(a)
+    mask_b = col_block.present if col_block.present is not None else np.ones_like(b)
+    n = mask_a.T @ mask_b
+    sum_a = a.T @ mask_b  # sum_a[i, j]：变量 i 在 i、j 同时有效的样本上的和
+    sum_b = mask_a.T @ b
+    square_a = (a ** 2).T @ mask_b
+    square_b = mask_a.T @ (b ** 2)
+    cross = a.T @ b
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = cross - sum_a * sum_b / n
+        r = cov / np.sqrt((square_a - sum_a ** 2 / n) * (square_b - sum_b ** 2 / n))
+    return r, n
+
+
+def _inference(r: np.ndarray, n: np.ndarray, confidence: float, diagonal: bool) -> CorrelationArrays:
+    """由 r 和 n 得到 t、p 与 Fisher z 置信区间；diagonal 为 True 时处理变量与自身的对角线"""
+    r = np.clip(r, -1.0, 1.0)
+    if diagonal:
+        # 对角线为 1；方差为 0 的变量与 DataFrame.corr() 一致保持 NaN
+        np.fill_diagonal(r, np.where(np.isnan(np.diag(r)), np.nan, 1.0))
+    df = n - 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = r * np.sqrt(df / (1.0 - r ** 2))
+        p = 2 * stats.t.sf(np.abs(t), df)
+        # Fisher z 变换：z = artanh(r)，标准误 1/√(n-3)
+        z = np.arctanh(r)
+        half_width = stats.norm.ppf(0.5 + confidence / 2) / np.sqrt(n - 3)
+        ci_lower = np.tanh(z - half_width)
+        ci_upper = np.tanh(z + half_width)
+
+    p = np.where(df > 0, p, np.nan)
+    ci_lower = np.where(n > 3, ci_lower, np.nan)
+    ci_upper = np.where(n > 3, ci_upper, np.nan)
+    if diagonal:
+        np.fill_diagonal(p, 1.0)
+        np.fill_diagonal(ci_lower, 1.0)
+        np.fill_diagonal(ci_upper, 1.0)
+    return CorrelationArrays(r=r, n=n.astype(np.int64), t=t, p=p, ci_lower=ci_lower, ci_upper=ci_upper)
+
+
+def correlation_from_moments(cov: np.ndarray, n, confidence: float = 0.95) -> CorrelationArrays:
+    """由（共同样本上的）交叉积 / 协方差矩阵和样本量得到相关矩阵，供增量统计使用"""
+    scale = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = cov / np.outer(scale, scale)
+    return _inference(r, np.full(r.shape, float(n)), confidence, diagonal=True)
+
+
+def correlation_arrays(values: np.ndarray, confidence: float = 0.95) -> CorrelationArrays:
+    """计算所有变量对的相关矩阵
+
+    Args:
+        values: 样本 × 变量 的二维数组，缺失值为 NaN
+        confidence: 置信区间的置信水平
+    """
+    prepared = _prepare(values)
+    r, n = _block_moments(prepared, prepared)
+    return _inference(r, n, confidence, diagonal=True)
+
+
+def iter_correlation_blocks(values, block_size: int = DEFAULT_BLOCK_SIZE, confidence: float = 0.95):
+    """按列分块计算上三角（含对角块），逐块产出 (行起点, 列起点, CorrelationArrays)
+
+    values 为二维数组或 DataFrame；每次只预处理当前的行块和列块。
+    """
+    if not isinstance(values, pd.DataFrame):
+        values = np.asarray(values)
+    k = values.shape[1]
+    for i0 in range(0, k, block_size):
+        row_block = _prepare(_columns(values, slice(i0, min(i0 + block_size, k))))
+        for j0 in range(i0, k, block_size):
+            col_block = row_block if j0 == i0 else _prepare(_columns(values, slice(j0, min(j0 + block_size, k))))
+            r, n = _block_moments(row_block, col_block)
+            yield i0, j0, _inference(r, n, confidence, diagonal=(i0 == j0))
+
+
+def _block_pairs(i0: int, j0: int, arrays: CorrelationArrays, names, threshold: float = None,
+                 top_n: int = None) -> pd.DataFrame:
+    """从一个块中取出不重复的变量对（i < j），可按阈值 / 前 N 强筛选"""
+    rows, cols = arrays.r.shape
+    keep = np.isfinite(arrays.r)
+    if i0 == j0:
+        keep &= np.triu(np.ones((rows, cols), dtype=bool), k=1)
+    if threshold is not None:
+        keep &= np.abs(arrays.r) >= threshold
+    ii, jj = np.nonzero(keep)
+    if top_n is not None and len(ii) > top_n:
+        strongest = np.argpartition(-np.abs(arrays.r[ii, jj]), top_n - 1)[:top_n]
+        ii, jj = ii[strongest], jj[strongest]
+    return pd.DataFrame({
+        "var1": [names[i0 + i] for i in ii],
+        "var2": [names[j0 + j] for j in jj],
+        "r": arrays.r[ii, jj],
+        "n": arrays.n[ii, jj],
+        "p": arrays.p[ii, jj],
+        "ci_lower": arrays.ci_lower[ii, jj],
+        "ci_upper": arrays.ci_upper[ii, jj]
+    })
+
+
+def _strongest(pairs: pd.DataFrame, top_n: int) -> pd.DataFrame:
+    order = pairs["r"].abs().sort_values(ascending=False, kind='stable').index
+    return pairs.loc[order[:top_n]].reset_index(drop=True)
+
+
+def screen_correlations(values, names, top_n: int = 50, threshold: float = None,
+                        block_size: int = DEFAULT_BLOCK_SIZE, confidence: float = 0.95):
+    """分块筛选最强的变量对，内存只保留候选结果
+
+    Args:
+        values: 样本 × 变量 的二维数组或 DataFrame，缺失值为 NaN
+        top_n: 只保留 |r| 最大的前 N 对（None 表示不限）
+        threshold: 只保留 |r| ≥ threshold 的变量对（None 表示不限）
+
+    Returns:
+        (变量对表：var1/var2/r/n/p/ci_lower/ci_upper，按 |r| 降序；
+         摘要：变量数、有效变量对数、|r| 超过各分界的对数)
+    """
+    names = list(names)
+    kept = None
+    summary = {"n_variables": len(names), "n_pairs": 0}
+    summary.update({f"abs_r_ge_{cut}": 0 for cut in SUMMARY_THRESHOLDS})
+
+    for i0, j0, arrays in iter_correlation_blocks(values, block_size, confidence):
+        upper = np.isfinite(arrays.r)
+        if i0 == j0:
+            upper &= np.triu(np.ones(arrays.r.shape, dtype=bool), k=1)
+        magnitude = np.abs(arrays.r[upper])
+        summary["n_pairs"] += int(upper.sum())
+        for cut in SUMMARY_THRESHOLDS:
+            summary[f"abs_r_ge_{cut}"] += int((magnitude >= cut).sum())
+
+        block = _block_pairs(i0, j0, arrays, names, threshold, top_n)
+        kept = block if kept is None else pd.concat([kept, block], ignore_index=True)
+        if top_n is not None and len(kept) > top_n:
+            kept = _strongest(kept, top_n)
+
+    if kept is None:
+        kept = pd.DataFrame(columns=PAIR_COLUMNS)
+    return _strongest(kept, len(kept)), summary
+
+
+def write_correlation_pairs(values, names, sink, threshold: float = None,
+                            block_size: int = DEFAULT_BLOCK_SIZE, confidence: float = 0.95) -> int:
+    """逐块把变量对写入 Parquet（sink 为路径或可写的二进制文件对象），返回写入的对数
+
+    values 可以是 DataFrame（按列块转换为数值）或二维数组。
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    names = list(names)
+    writer = None
+    written = 0
+    try:
+        for i0, j0, arrays in iter_correlation_blocks(values, block_size, confidence):
+            block = _block_pairs(i0, j0, arrays, names, threshold)
+            table = pa.Table.from_pandas(block, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table)
+            written += len(block)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
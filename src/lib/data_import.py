@@ -0,0 +1,210 @@
+"""数据导入/导出：上传文件的原始字节与 DataFrame 之间的转换"""
+import io
+import numpy as np
+import pandas as pd
+
+
+# 列式格式：可按列读取，重新打开已清洗的数据时无需解析文本
+COLUMNAR_EXTENSIONS = ('.parquet', '.feather')
+
+
+def is_columnar(file_name: str) -> bool:
+    return file_name.lower().endswith(COLUMNAR_EXTENSIONS)
+
+
+def read_table(raw: bytes, file_name: str, columns=None) -> pd.DataFrame:
+    """根据扩展名解析 CSV / Excel / Parquet / Feather 文件
+
+    Args:
+        columns: 只读取这些列（仅 Parquet / Feather 支持，None 表示全部）
+    """
+    name = file_name.lower()
+    if name.endswith('.csv'):
+        df = pd.read_csv(io.BytesIO(raw))
+    elif name.endswith('.xlsx'):
+        df = pd.read_excel(io.BytesIO(raw), engine='openpyxl')
+    elif name.endswith('.xls'):
+        df = pd.read_excel(io.BytesIO(raw), engine='xlrd')
+    elif name.endswith('.parquet'):
+        df = pd.read_parquet(io.BytesIO(raw), columns=list(columns) if columns else None)
+    elif name.endswith('.feather'):
+        df = pd.read_feather(io.BytesIO(raw), columns=list(columns) if columns else None)
+    else:
+        raise ValueError(f"不支持的文件格式：{file_name}")
+
+    # 将数字列名转换为字符串，避免类型错误
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def table_columns(raw: bytes, file_name: str) -> list:
+    """只读取 Parquet / Feather 文件的结构，返回列名（不加载数据）"""
+    name = file_name.lower()
+    if name.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        schema = pq.read_schema(io.BytesIO(raw))
+    elif name.endswith('.feather'):
+        import pyarrow.ipc as ipc
+        schema = ipc.open_file(io.BytesIO(raw)).schema
+    else:
+        raise ValueError(f"不支持读取列结构的文件格式：{file_name}")
+    # pandas 写入的 Parquet 可能带有索引列
+    index_columns = set()
+    metadata = schema.pandas_metadata or {}
+    for col in metadata.get('index_columns', []):
+        if isinstance(col, str):
+            index_columns.add(col)
+    return [col for col in schema.names if col not in index_columns]
+
+
+def write_table(df: pd.DataFrame, fmt: str) -> bytes:
+    """把数据写成 Parquet / Feather 字节（保留类别、整数等列类型）"""
+    buffer = io.BytesIO()
+    if fmt == "Parquet":
+        df.to_parquet(buffer, index=False)
+    elif fmt == "Feather":
+        # Feather 要求默认的 RangeIndex
+        df.reset_index(drop=True).to_feather(buffer)
+    else:
+        raise ValueError(f"不支持的导出格式：{fmt}")
+    return buffer.getvalue()
+
+
+def downcast_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """数值列无损降精度：整数 → 最小整数类型；浮点数能被 float32 精确表示时 → float32"""
+    result = df.copy()
+    for col in result.columns:
+        series = result[col]
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            result[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series) and series.dtype != 'float32':
+            as_float32 = series.astype('float32')
+            if ((as_float32.astype(series.dtype) == series) | series.isna()).all():
+                result[col] = as_float32
+    return result
+
+
+def optimize_dtypes(df: pd.DataFrame, category_ratio: float = 0.5):
+    """导入后的类型优化：数值列无损降精度，重复值多的文本列转为 category
+
+    Args:
+        category_ratio: 文本列不同取值数 / 非缺失行数不超过该比例时转为 category
+
+    Returns:
+        (优化后的 DataFrame, 报告字典：优化前后内存与各列类型变化)
+    """
+    memory_before = int(df.memory_usage(deep=True).sum())
+    result = downcast_numeric(df)
+    for col in result.columns:
+        series = result[col]
+        if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+            n_valid = int(series.notna().sum())
+            if n_valid > 0 and series.nunique() <= n_valid * category_ratio:
+                result[col] = series.astype('category')
+
+    changed = {
+        col: (str(df[col].dtype), str(result[col].dtype))
+        for col in result.columns
+        if str(df[col].dtype) != str(result[col].dtype)
+    }
+    report = {
+        "memory_before": memory_before,
+        "memory_after": int(result.memory_usage(deep=True).sum()),
+        "changed": changed
+    }
+    return result, report
+
+
+def read_csv_chunked(raw: bytes, chunksize: int = 50_000, max_rows: int = None,
+                     max_memory_mb: float = None, progress=None):
+    """分块流式读取 CSV，逐块推断并压缩数值类型，可在达到行数或内存上限时停止
+
+    Args:
+        raw: CSV 原始字节
+        chunksize: 每块行数
+        max_rows: 最多读取的行数（None 表示不限）
+        max_memory_mb: 已读数据的内存上限（None 表示不限）
+        progress: 回调 progress(已读字节占比, 已读行数)
+
+    Returns:
+        (DataFrame, 导入报告字典)。报告中 truncated 为 True 时，
+        剩余行可以用 sample_remaining_rows() 抽样读取。
+    """
+    buffer = io.BytesIO(raw)
+    total_bytes = max(len(raw), 1)
+    chunks = []
+    rows = 0
+    memory = 0
+    stop_reason = None
+    truncated = False
+
+    with pd.read_csv(buffer, chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunk = downcast_numeric(chunk)
+            if max_rows and rows + len(chunk) >= max_rows:
+                if rows + len(chunk) > max_rows:
+                    chunk = chunk.iloc[:max_rows - rows]
+                    truncated = True
+                stop_reason = "max_rows"
+            chunks.append(chunk)
+            rows += len(chunk)
+            memory += int(chunk.memory_usage(deep=True).sum())
+
+            if progress:
+                progress(min(buffer.tell() / total_bytes, 1.0), rows)
+            if max_memory_mb and memory >= max_memory_mb * 1024 * 1024:
+                stop_reason = stop_reason or "max_memory"
+            if stop_reason:
+                break
+
+        # 上限恰好落在文件末尾时不算截断
+        if stop_reason and not truncated:
+            try:
+                truncated = len(reader.get_chunk(1)) > 0
+            except StopIteration:
+                truncated = False
+
+    if chunks:
+        df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = pd.read_csv(io.BytesIO(raw), nrows=0)
+    df.columns = [str(col) for col in df.columns]
+
+    if progress:
+        progress(1.0, rows)
+
+    report = {
+        "rows_read": rows,
+        "chunks": len(chunks),
+        "memory_bytes": int(df.memory_usage(deep=True).sum()),
+        "truncated": truncated,
+        "stop_reason": stop_reason if truncated else None
+    }
+    return df, report
+
+
+def sample_remaining_rows(raw: bytes, skip_rows: int, n: int, seed: int = 0,
+                          chunksize: int = 50_000, already_sampled: int = 0) -> pd.DataFrame:
+    """从 CSV 中前 skip_rows 行之后的部分随机抽取 n 行（流式，不载入全部剩余数据）
+
+    每行分配一个随机键，逐块保留键最小的行，等价于均匀无放回抽样。随机键只由 seed 决定
+    （与分块大小无关）：already_sampled 为之前用同一 seed 已抽取的行数时，跳过键最小的
+    这些行，多次追加抽到的行互不重复。
+    """
+    rng = np.random.default_rng(seed)
+    limit = n + already_sampled
+    kept = None
+    reader = pd.read_csv(io.BytesIO(raw), chunksize=chunksize, skiprows=range(1, skip_rows + 1))
+    for chunk in reader:
+        chunk = downcast_numeric(chunk)
+        chunk = chunk.assign(_sample_key=rng.random(len(chunk)))
+        kept = chunk if kept is None else pd.concat([kept, chunk], ignore_index=True)
+        if len(kept) > limit:
+            kept = kept.nsmallest(limit, '_sample_key')
+
+    if kept is None:
+        return pd.read_csv(io.BytesIO(raw), nrows=0)
+    kept = kept.sort_values('_sample_key', kind='stable').iloc[already_sampled:]
+    kept = kept.sort_index().drop(columns='_sample_key').reset_index(drop=True)
+    kept.columns = [str(col) for col in kept.columns]
+    return kept
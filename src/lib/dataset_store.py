@@ -0,0 +1,154 @@
+"""进程级共享数据集仓库：内容相同的文件只解析一次
+
+按文件内容哈希（加上解析选项）索引已解析的 DataFrame。
+每个会话拿到的是共享数据的浅拷贝句柄，不复制数据：pandas 3 起写时复制（Copy-on-Write）
+始终开启，修改句柄时只复制被修改的部分；pandas 2.x 不修改全局选项，而是把仓库中数据的
+底层数组设为只读，句柄上的原地写入会报错而不会改到其他会话的数据（替换整列、
+赋值新列等生成新数组的操作不受影响）。
+句柄被回收时引用计数自动减一；无人引用的数据集按 LRU 在超出内存上限时淘汰。
+"""
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.lib.result_cache import register_fingerprint
+
+# pandas 3 起写时复制始终开启；2.x 中仓库里的数据需要设为只读
+_ALWAYS_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+# 无人引用的数据集最多保留的内存（估算）
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def _freeze(frame: pd.DataFrame):
+    """把数据的底层数组设为只读（包括 Categorical 的编码、可空类型的数据和掩码）"""
+    for block in frame._mgr.blocks:
+        values = block.values
+        for array in (values, getattr(values, '_ndarray', None),
+                      getattr(values, '_data', None), getattr(values, '_mask', None)):
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+
+
+def content_key(raw: bytes, options=()) -> str:
+    """文件内容 + 解析选项 → 数据集键"""
+    h = hashlib.sha256(raw)
+    if options:
+        h.update(repr(options).encode('utf-8'))
+    return h.hexdigest()
+
+
+class _Entry:
+    def __init__(self, frame: pd.DataFrame, name: str):
+        self.frame = frame
+        self.name = name
+        self.memory_bytes = int(frame.memory_usage(deep=True).sum())
+        self.refcount = 0
+        self.hits = 0
+        self.loaded_at = time.time()
+
+
+class DatasetStore:
+    """线程安全的共享数据集仓库"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key → _Entry
+        # 可重入：句柄回收回调（_release）可能在持锁期间由垃圾回收触发
+        self._lock = threading.RLock()
+        self._key_locks = {}  # 每个键一把锁，避免多人同时上传同一文件时重复解析
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def load(self, raw: bytes, name: str, parser, options=()):
+        """返回 (数据句柄, 数据集键)
+
+        Args:
+            raw: 文件原始字节
+            name: 文件名（仅用于展示）
+            parser: parser(raw) → DataFrame，只在仓库中没有该内容时调用
+            options: 影响解析结果的选项（参与键计算）
+        """
+        key = content_key(raw, options)
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                frame = parser(raw)
+                if not _ALWAYS_COPY_ON_WRITE:
+                    _freeze(frame)
+                entry = _Entry(frame, name)
+                with self._lock:
+                    self._entries[key] = entry
+            else:
+                entry.hits += 1
+        return self._checkout(key), key
+
+    def get(self, key: str):
+        """按键取一个新句柄，不存在时返回 None"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries[key].hits += 1
+        return self._checkout(key)
+
+    def _checkout(self, key):
+        with self._lock:
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            entry.refcount += 1
+            handle = entry.frame.copy(deep=False)
+        weakref.finalize(handle, self._release, key)
+        # 内容由仓库键唯一确定，直接作为结果缓存的数据指纹，省去逐行哈希
+        register_fingerprint(handle, f"store:{key}")
+        self._evict()
+        return handle
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refcount -= 1
+        self._evict()
+
+    def _evict(self):
+        """超出内存上限时，按 LRU 淘汰无人引用的数据集"""
+        with self._lock:
+            total = sum(e.memory_bytes for e in self._entries.values())
+            for key in list(self._entries):
+                if total <= self.max_bytes:
+                    break
+                entry = self._entries.get(key)
+                if entry is not None and entry.refcount <= 0:
+                    total -= entry.memory_bytes
+                    del self._entries[key]
+                    self._key_locks.pop(key, None)
+
+    def stats(self) -> list:
+        """每个数据集的引用计数与内存占用"""
+        with self._lock:
+            return [
+                {
+                    "key": key[:12],
+                    "name": entry.name,
+                    "rows": len(entry.frame),
+                    "columns": len(entry.frame.columns),
+                    "memory_mb": round(entry.memory_bytes / 1024 / 1024, 2),
+                    "refcount": entry.refcount,
+                    "hits": entry.hits
+                }
+                for key, entry in self._entries.items()
+            ]
+
+
+_store = DatasetStore()
+
+
+def get_dataset_store() -> DatasetStore:
+    """进程内共享的数据集仓库"""
+    return _store
@@ -1,32 +1,163 @@
-"""模糊匹配变量名"""
-import streamlit as st
-from difflib import SequenceMatcher
+"""模糊匹配变量名
+
+每组列名只建一次索引（ColumnIndex）：保存规范化后的列名、按括号拆分的中英文部分，
+以及字符 n 元组倒排表。查询时只对含有相同 n 元组的列打分，
+返回按得分排序的前 k 个候选，不再对每一列运行 difflib。
+
+规范化（列名和关键词相同处理）：Unicode NFKC（全角转半角等）、小写、标点和符号换成空格、
+西里尔字母（含蒙古文 Ө、Ү）转写为拉丁字母，因此拉丁字母输入的 "asuudal" 能匹配
+"Асуудал шийдвэрлэх"。n 元组为拉丁 / 数字文本的三元组加上汉字的二元组，
+中文关键词不需要拼音即可匹配。
+
+得分：与列名或其中一部分完全相同为 1；关键词是列名的子串时为 0.8 + 0.2 × 覆盖率；
+否则为 n 元组 Dice 系数 × 0.8。
+"""
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+
+# 相似度阈值（低于该值视为不匹配）
+MIN_SCORE = 0.3
+NGRAM = 3
+# 缓存的列名索引个数
+_MAX_INDEXES = 16
+
+# 列名中的括号部分：中文列名后常附 (English) 说明和 [Multiple Choice] 之类的标记
+_PARTS = re.compile(r"[(（]([^)）]*)[)）]|\[([^\]]*)\]")
+# 标点、符号和下划线（\w 之外的字符）都视为分隔符
+_SEPARATORS = re.compile(r"[\W_]+")
+_CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+# 西里尔字母 → 拉丁字母（按蒙古语常用转写；х 记为 h，与 kh 写法统一）
+_CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j", "з": "z",
+    "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "ө": "o", "п": "p",
+    "р": "r", "с": "s", "т": "t", "у": "u", "ү": "u", "ф": "f", "х": "h", "ц": "ts", "ч": "ch",
+    "ш": "sh", "щ": "sh", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya"
+}
+_TRANSLITERATION = str.maketrans(_CYRILLIC)
+# 拉丁写法中的变体统一：kh → h，ö / ü → o / u
+_LATIN_FOLDS = (("kh", "h"), ("ö", "o"), ("ü", "u"))
+
+
+def normalize(text: str) -> str:
+    """匹配用的规范形式：NFKC、小写、去标点、西里尔字母转写为拉丁字母、合并空白"""
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    text = _SEPARATORS.sub(" ", text).translate(_TRANSLITERATION)
+    for variant, canonical in _LATIN_FOLDS:
+        text = text.replace(variant, canonical)
+    return text.strip()
+
+
+def split_parts(name: str) -> list:
+    """列名拆成规范化的各部分：括号外的主体 + 各括号内的内容"""
+    name = unicodedata.normalize("NFKC", str(name))
+    parts = [normalize(_PARTS.sub(" ", name))]
+    for match in _PARTS.finditer(name):
+        parts.append(normalize(match.group(1) or match.group(2) or ""))
+    return [part for part in parts if part]
+
+
+def ngrams(text: str, n: int = NGRAM) -> set:
+    """字符 n 元组集合（短于 n 的文本本身作为一个元组）"""
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def key_grams(key: str) -> set:
+    """规范形式的检索元组：整体的三元组 + 每段连续汉字的二元组"""
+    grams = ngrams(key)
+    for run in _CJK_RUN.findall(key):
+        grams |= ngrams(run, 2)
+    return grams
+
+
+class ColumnIndex:
+    """一组列名的检索索引"""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.names = [normalize(col) for col in self.columns]
+        self.parts = [split_parts(col) for col in self.columns]
+        grams = [key_grams(name) for name in self.names]
+        self.gram_counts = np.array([len(g) for g in grams], dtype=np.float64)
+        postings = {}
+        for i, column_grams in enumerate(grams):
+            for gram in column_grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def _score(self, i: int, keyword: str, dice: float) -> float:
+        if keyword == self.names[i] or keyword in self.parts[i]:
+            return 1.0
+        if keyword in self.names[i]:
+            return 0.8 + 0.2 * len(keyword) / len(self.names[i])
+        return 0.8 * dice
+
+    def search(self, keyword: str, top_k: int = 5, min_score: float = MIN_SCORE) -> list:
+        """返回 [(列名, 得分), ...]，按得分降序，最多 top_k 个"""
+        keyword = normalize(keyword)
+        if not keyword or not self.columns:
+            return []
+        if len(keyword) < 2 or (len(keyword) < NGRAM and not _CJK_RUN.fullmatch(keyword)):
+            # 过短的关键词（单字、两个拉丁字母）没有检索元组，直接按子串查找
+            scored = [(self._score(i, keyword, 0.0), i) for i, name in enumerate(self.names) if keyword in name]
+        else:
+            query = key_grams(keyword)
+            lists = [self.postings[g] for g in query if g in self.postings]
+            if not lists:
+                return []
+            shared = np.bincount(np.concatenate(lists), minlength=len(self.columns))
+            candidates = np.flatnonzero(shared)
+            dice = 2 * shared[candidates] / (len(query) + self.gram_counts[candidates])
+            scored = [(self._score(i, keyword, d), i) for i, d in zip(candidates.tolist(), dice.tolist())]
+        # 同分时保持列的原始顺序
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.columns[i], round(score, 4)) for score, i in scored[:top_k] if score >= min_score]
+
+    def best(self, keyword: str, min_score: float = MIN_SCORE):
+        """得分最高的列名，没有达到阈值的候选时返回 None"""
+        found = self.search(keyword, top_k=1, min_score=min_score)
+        return found[0][0] if found else None
+
+
+_indexes = OrderedDict()  # 列名元组 → ColumnIndex
+_indexes_lock = threading.Lock()
+
+
+def get_column_index(columns) -> ColumnIndex:
+    """列名相同的数据集共用一个索引（按 LRU 保留最近使用的若干个）"""
+    key = tuple(str(col) for col in columns)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = ColumnIndex(columns)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def match_variable(columns, keyword: str):
+    """在给定的列名中模糊匹配关键词，返回得分最高的列名，不依赖会话状态"""
+    return get_column_index(columns).best(keyword)
+
+
+def find_candidates(columns, keyword: str, top_k: int = 5) -> list:
+    """按得分排序的候选列名 [(列名, 得分), ...]"""
+    return get_column_index(columns).search(keyword, top_k=top_k)
+
 
 def find_variable_by_keyword(keyword: str):
     """根据关键词模糊匹配变量名"""
+    import streamlit as st  # 仅会话入口需要 Streamlit，match_variable 可独立使用
     if st.session_state.data is None:
         return None
-    
-    df = st.session_state.data
-    columns = df.columns.tolist()
-    
-    keyword = keyword.strip().lower()
-    
-    # 方法1：直接包含匹配
-    for col in columns:
-        if keyword in col.lower():
-            return col
-    
-    # 方法2：计算相似度
-    best_match = None
-    best_score = 0
-    
-    for col in columns:
-        # 计算相似度
-        similarity = SequenceMatcher(None, keyword, col.lower()).ratio()
-        if similarity > best_score and similarity > 0.3:  # 相似度阈值
-            best_score = similarity
-            best_match = col
-    
-    return best_match
 
+    return match_variable(st.session_state.data.columns, keyword)
@@ -82,8 +82,8 @@ TEXTS = {
         "mn": "Өгөгдлийн файл сонгох"
     },
     "support_formats": {
-        "zh": "支持 CSV、Excel 格式",
-        "mn": "CSV, Excel форматыг дэмжинэ"
+        "zh": "支持 CSV、Excel、Parquet、Feather 格式",
+        "mn": "CSV, Excel, Parquet, Feather форматыг дэмжинэ"
     },
     "or": {
         "zh": "或",
@@ -0,0 +1,242 @@
+"""增量统计：追加新数据时只处理新增行，不再对整张表重新计算
+
+- RunningMoments：逐列的样本量、均值、2~4 阶中心矩、最小/最大值（Welford / Chan 合并公式），
+  可得到与 pandas 一致的标准差、偏度、峰度；
+- CoMoments：一组变量在完整样本（任一变量缺失即删除）上的中心化交叉积矩阵，
+  得到 Pearson 相关矩阵和 OLS 回归，与 listwise 删除的批量计算一致；
+- GroupMoments：按分组变量分别累积的 RunningMoments；
+- RunningStats：一个数据集全部数值列的 RunningMoments + 分位数草图。
+
+所有累积量都可由两部分合并得到，追加的结果与对完整数据重新计算在浮点误差内一致
+（分位数草图超过容量后为近似值，见 quantiles 模块）。
+"""
+import copy
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from src.lib.column_profile import is_numeric_column
+from src.lib.correlation import CorrelationArrays, correlation_from_moments
+from src.lib.quantiles import QuantileSketch
+from src.lib.regression import CrossProducts
+
+
+def _as_matrix(data) -> np.ndarray:
+    if isinstance(data, pd.DataFrame):
+        return data.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    values = np.asarray(data, dtype=np.float64)
+    return values.reshape(-1, 1) if values.ndim == 1 else values
+
+
+class RunningMoments:
+    """逐列累积的矩统计（忽略 NaN）"""
+
+    def __init__(self, columns: list):
+        k = len(columns)
+        self.columns = list(columns)
+        self.n = np.zeros(k)
+        self.missing = np.zeros(k, dtype=np.int64)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.m3 = np.zeros(k)
+        self.m4 = np.zeros(k)
+        self.min = np.full(k, np.nan)
+        self.max = np.full(k, np.nan)
+
+    def update(self, data):
+        """加入新的行（DataFrame 或 样本 × 列 数组，列顺序与 columns 相同）"""
+        values = _as_matrix(data)
+        present = ~np.isnan(values)
+        n = present.sum(axis=0).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n > 0, np.nansum(values, axis=0) / n, 0.0)
+        centered = np.where(present, values - mean, 0.0)
+        batch = RunningMoments(self.columns)
+        batch.n, batch.mean = n, mean
+        batch.m2 = (centered ** 2).sum(axis=0)
+        batch.m3 = (centered ** 3).sum(axis=0)
+        batch.m4 = (centered ** 4).sum(axis=0)
+        batch.missing = (~present).sum(axis=0)
+        if values.shape[0]:
+            batch.min = np.fmin.reduce(np.where(present, values, np.nan), axis=0)
+            batch.max = np.fmax.reduce(np.where(present, values, np.nan), axis=0)
+        return self.merge(batch)
+
+    def merge(self, other: "RunningMoments"):
+        """合并另一部分数据的矩统计（Pébay 成对合并公式）"""
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n > 0, self.mean + delta * nb / n, 0.0)
+            m2 = self.m2 + other.m2 + delta ** 2 * na * nb / n
+            m3 = (self.m3 + other.m3 + delta ** 3 * na * nb * (na - nb) / n ** 2
+                  + 3 * delta * (na * other.m2 - nb * self.m2) / n)
+            m4 = (self.m4 + other.m4 + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / n ** 3
+                  + 6 * delta ** 2 * (na ** 2 * other.m2 + nb ** 2 * self.m2) / n ** 2
+                  + 4 * delta * (na * other.m3 - nb * self.m3) / n)
+        empty = n == 0
+        self.n, self.mean = n, mean
+        self.m2, self.m3, self.m4 = (np.where(empty, 0.0, m) for m in (m2, m3, m4))
+        self.missing = self.missing + other.missing
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        return self
+
+    def variance(self, ddof: int = 1) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.n > ddof, self.m2 / (self.n - ddof), np.nan)
+
+    def std(self, ddof: int = 1) -> np.ndarray:
+        return np.sqrt(self.variance(ddof))
+
+    def skewness(self) -> np.ndarray:
+        """样本偏度（与 pandas Series.skew 相同的偏差校正）"""
+        n = self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g1 = np.sqrt(n) * self.m3 / self.m2 ** 1.5
+            return np.where(n > 2, np.sqrt(n * (n - 1)) / (n - 2) * g1, np.nan)
+
+    def kurtosis(self) -> np.ndarray:
+        """样本超额峰度（与 pandas Series.kurt 相同的偏差校正）"""
+        n = self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g2 = n * self.m4 / self.m2 ** 2 - 3
+            return np.where(n > 3, ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3)), np.nan)
+
+
+class CoMoments:
+    """一组变量在完整样本上的均值与中心化交叉积矩阵"""
+
+    def __init__(self, columns: list):
+        k = len(columns)
+        self.columns = list(columns)
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.sscp = np.zeros((k, k))
+
+    def update(self, data):
+        values = _as_matrix(data)
+        values = values[~np.isnan(values).any(axis=1)]
+        nb = values.shape[0]
+        if not nb:
+            return self
+        mean_b = values.mean(axis=0)
+        centered = values - mean_b
+        na, n = self.n, self.n + nb
+        delta = mean_b - self.mean
+        self.sscp = self.sscp + centered.T @ centered + np.outer(delta, delta) * na * nb / n
+        self.mean = self.mean + delta * nb / n
+        self.n = n
+        return self
+
+    def correlation(self, confidence: float = 0.95) -> CorrelationArrays:
+        """Pearson 相关矩阵（与 pearson_correlation(listwise=True) 一致）"""
+        return correlation_from_moments(self.sscp, self.n, confidence)
+
+    def cross_products(self) -> CrossProducts:
+        """用于拟合回归模型的交叉积矩阵（与对完整样本调用 CrossProducts 一致）"""
+        return CrossProducts.from_moments(self.columns, self.n, self.mean, self.sscp)
+
+
+class GroupMoments:
+    """按分组变量累积的矩统计：组 → RunningMoments"""
+
+    def __init__(self, columns: list):
+        self.columns = list(columns)
+        self.groups = {}
+
+    def update(self, groups, data):
+        values = _as_matrix(data)
+        groups = pd.Series(np.asarray(groups, dtype=object))
+        for level, rows in groups.groupby(groups, sort=False).indices.items():
+            self.groups.setdefault(level, RunningMoments(self.columns)).update(values[rows])
+        return self
+
+    def table(self) -> pd.DataFrame:
+        """每组每个变量一行：n、mean、std"""
+        rows = []
+        for level, moments in self.groups.items():
+            for i, col in enumerate(self.columns):
+                rows.append({"group": level, "variable": col, "n": int(moments.n[i]),
+                             "mean": moments.mean[i] if moments.n[i] else np.nan, "std": moments.std()[i]})
+        return pd.DataFrame(rows, columns=["group", "variable", "n", "mean", "std"])
+
+
+class RunningStats:
+    """数据集全部数值列的增量统计（矩统计 + 分位数草图）"""
+
+    def __init__(self, columns: list):
+        self.columns = list(columns)
+        self.n_rows = 0
+        self.moments = RunningMoments(self.columns)
+        self.sketches = {col: QuantileSketch(seed=i) for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RunningStats":
+        state = cls([col for col in df.columns if is_numeric_column(df[col])])
+        return state.update(df)
+
+    def update(self, rows: pd.DataFrame):
+        values = rows[self.columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        self.n_rows += len(rows)
+        self.moments.update(values)
+        for i, col in enumerate(self.columns):
+            self.sketches[col].update(values[:, i])
+        return self
+
+    def appended(self, rows: pd.DataFrame) -> "RunningStats":
+        """追加 rows 后的新统计（本对象不变）"""
+        state = copy.copy(self)
+        state.moments = copy.deepcopy(self.moments)
+        state.sketches = {col: sketch.copy() for col, sketch in self.sketches.items()}
+        return state.update(rows)
+
+    @property
+    def approximate(self) -> bool:
+        """分位数是否为近似值"""
+        return not all(sketch.exact for sketch in self.sketches.values())
+
+    def describe(self) -> pd.DataFrame:
+        """与 DataFrame.describe() 相同布局的描述统计（行：count、mean、std、min、25%、50%、75%、max）"""
+        m = self.moments
+        quartiles = np.array([self.sketches[col].quantile([0.25, 0.5, 0.75]) for col in self.columns]).reshape(-1, 3)
+        return pd.DataFrame(
+            [m.n, np.where(m.n > 0, m.mean, np.nan), m.std(), m.min,
+             quartiles[:, 0], quartiles[:, 1], quartiles[:, 2], m.max],
+            index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"], columns=self.columns
+        )
+
+
+# id(DataFrame) → RunningStats；对象被回收时自动移除
+_states = {}
+_states_lock = threading.Lock()
+
+
+def _register(df: pd.DataFrame, state: RunningStats):
+    key = id(df)
+    with _states_lock:
+        _states[key] = state
+    weakref.finalize(df, _states.pop, key, None)
+
+
+def running_stats(df: pd.DataFrame) -> RunningStats:
+    """数据集的增量统计；没有时对全表计算一次"""
+    with _states_lock:
+        state = _states.get(id(df))
+    if state is None:
+        state = RunningStats.from_frame(df)
+        _register(df, state)
+    return state
+
+
+def append_rows(df: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """追加新行，返回合并后的数据；已有的增量统计只用新增行更新"""
+    combined = pd.concat([df, rows], ignore_index=True)
+    with _states_lock:
+        state = _states.get(id(df))
+    # 合并后数值列不变时才能沿用（例如新数据把某列变成了文本则重新计算）
+    if state is not None and all(is_numeric_column(combined[col]) for col in state.columns) \
+            and sum(is_numeric_column(combined[col]) for col in combined.columns) == len(state.columns):
+        _register(combined, state.appended(combined.iloc[len(df):]))
+    return combined
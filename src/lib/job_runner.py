@@ -0,0 +1,259 @@
+"""后台分析任务：耗时计算放到进程池执行，不阻塞 Streamlit 脚本线程
+
+统计视图和 AI 工具调用提交 (数据, 分析函数, 参数) 作为任务，立即得到任务号；
+之后每次重跑按任务号查询进度，完成后取回结果。任务在独立进程中计算，
+一个会话的万次 Bootstrap 不会占用 Web 进程的 GIL，也不会拖慢其他会话。
+
+- 任务键与 result_cache 的缓存键相同：结果已缓存时直接返回已完成的任务，
+  完成的结果写入结果缓存；同一分析正在计算时重复提交会复用同一个任务。
+- 每个提交者（会话）同时进行的任务数有上限，进程池不会被一个会话占满；
+  提交时可以指定等待时间，达到上限时排队等其他任务结束，而不是立即失败。
+- 分析函数如果接受 progress 参数，会收到进度回调 progress(0~1)；
+  取消正在运行的任务时，下一次回调会抛出 JobCancelled 使计算提前结束。
+"""
+import inspect
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import pandas as pd
+from src.lib.result_cache import analysis_key, get_result_cache
+
+# 默认进程数：保留一个 CPU 给 Web 进程
+DEFAULT_MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+# 每个会话同时进行的任务数上限
+MAX_JOBS_PER_OWNER = 2
+# 已结束任务的保留时间（秒），超时后任务号失效（结果仍在结果缓存中）
+FINISHED_TTL = 3600
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    """任务被取消（由进度回调在工作进程中抛出）"""
+
+
+class JobLimitError(RuntimeError):
+    """提交者同时进行的任务数已达上限"""
+
+
+@dataclass
+class JobStatus:
+    job_id: str
+    label: str
+    state: str
+    progress: float = 0.0
+    elapsed: float = 0.0
+    result: object = None
+    error: str = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED, CANCELLED)
+
+
+class _Job:
+    def __init__(self, job_id, key, label, future=None, result=None):
+        self.job_id = job_id
+        self.key = key
+        self.label = label
+        self.future = future
+        self.result = result
+        self.owners = set()
+        self.cancelled = False
+        self.submitted_at = time.time()
+        self.finished_at = None if future is not None else self.submitted_at
+
+
+# ================================
+# 工作进程
+# ================================
+
+def _accepts_progress(func) -> bool:
+    try:
+        return "progress" in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _execute(job_id, shared, func, df, kwargs):
+    """在工作进程中执行分析；shared 为跨进程共享的 进度/取消 字典"""
+    shared[job_id] = 0.0
+
+    def progress(fraction):
+        if shared.get(("cancel", job_id)):
+            raise JobCancelled()
+        shared[job_id] = float(fraction)
+
+    if _accepts_progress(func):
+        kwargs = dict(kwargs, progress=progress)
+    return func(df, **kwargs)
+
+
+# ================================
+# 任务管理（Web 进程内）
+# ================================
+
+class JobRunner:
+    """线程安全的后台任务管理器，进程池和共享状态在第一次提交时才创建"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_jobs_per_owner: int = MAX_JOBS_PER_OWNER):
+        self.max_workers = max_workers
+        self.max_jobs_per_owner = max_jobs_per_owner
+        self._jobs = {}  # 任务号 → _Job
+        self._active = {}  # 任务键 → 任务号（未结束的任务）
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)  # 有任务结束或取消时通知
+        self._pool = None
+        self._manager = None
+        self._shared = None
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            # spawn：不 fork 带有大量线程的 Web 进程
+            context = multiprocessing.get_context("spawn")
+            self._manager = context.Manager()
+            self._shared = self._manager.dict()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._pool
+
+    def submit(self, df: pd.DataFrame, func, owner: str = None, label: str = None,
+               slot_timeout: float = 0, **kwargs) -> str:
+        """提交 func(df, **kwargs)，返回任务号
+
+        Args:
+            func: 模块级函数（工作进程按名称导入）
+            owner: 提交者（会话）标识，用于限制并发任务数和取消
+            label: 展示用名称，默认为函数名
+            slot_timeout: owner 的任务数已达上限时，最多等待其他任务结束的秒数（0 为不等待）
+        Raises:
+            JobLimitError: owner 同时进行的任务数已达上限（等待超时）
+        """
+        key = analysis_key(df, func, **kwargs)
+        label = label or func.__name__
+        deadline = time.monotonic() + slot_timeout
+        with self._lock:
+            self._prune()
+            while True:
+                # 等待期间结果可能已被其他提交者算出，每次都重新检查缓存和进行中的任务
+                hit, value = get_result_cache().get(key)
+                if hit:
+                    job = _Job(uuid.uuid4().hex, key, label, result=value)
+                    self._jobs[job.job_id] = job
+                    return job.job_id
+
+                job_id = self._active.get(key)
+                if job_id is not None:
+                    self._jobs[job_id].owners.add(owner)
+                    return job_id
+
+                active = sum(1 for j in self._active.values() if owner in self._jobs[j].owners)
+                if active < self.max_jobs_per_owner:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise JobLimitError(f"同时进行的分析任务最多 {self.max_jobs_per_owner} 个，请等待或取消已有任务")
+                self._slot_freed.wait(remaining)
+
+            job_id = uuid.uuid4().hex
+            pool = self._ensure_pool()
+            future = pool.submit(_execute, job_id, self._shared, func, df, kwargs)
+            job = _Job(job_id, key, label, future=future)
+            job.owners.add(owner)
+            self._jobs[job_id] = job
+            self._active[key] = job_id
+        future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        return job_id
+
+    def _finish(self, job, future):
+        """任务结束（完成、失败或取消）时在管理线程中调用"""
+        if not future.cancelled() and future.exception() is None:
+            get_result_cache().put(job.key, future.result())
+        with self._lock:
+            job.finished_at = time.time()
+            if self._active.get(job.key) == job.job_id:
+                del self._active[job.key]
+            self._slot_freed.notify_all()
+        if self._shared is not None:
+            self._shared.pop(job.job_id, None)
+            self._shared.pop(("cancel", job.job_id), None)
+
+    def status(self, job_id: str) -> JobStatus:
+        """查询任务状态；任务号不存在（已过期）时返回 None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        elapsed = (job.finished_at or time.time()) - job.submitted_at
+        status = JobStatus(job_id, job.label, PENDING, elapsed=elapsed)
+        future = job.future
+        if future is None:
+            status.state, status.progress, status.result = DONE, 1.0, job.result
+        elif job.cancelled or future.cancelled():
+            status.state = CANCELLED
+        elif not future.done():
+            progress = self._shared.get(job_id)
+            if progress is not None:
+                status.state, status.progress = RUNNING, progress
+        elif isinstance(future.exception(), JobCancelled):
+            status.state = CANCELLED
+        elif future.exception() is not None:
+            status.state, status.error = FAILED, str(future.exception())
+        else:
+            status.state, status.progress, status.result = DONE, 1.0, future.result()
+        return status
+
+    def wait(self, job_id: str, timeout: float = None) -> JobStatus:
+        """阻塞等待任务结束（超时则返回当前状态）"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and job.future is not None:
+            try:
+                job.future.exception(timeout=timeout)
+            except Exception:
+                pass
+        return self.status(job_id)
+
+    def cancel(self, job_id: str, owner: str = None):
+        """取消 owner 对任务的请求；没有其他提交者等待该任务时才真正停止计算"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.future is None or job.future.done():
+                return
+            job.owners.discard(owner)
+            if job.owners:
+                return
+            job.cancelled = True
+            if self._active.get(job.key) == job_id:
+                del self._active[job.key]
+            self._slot_freed.notify_all()
+        if not job.future.cancel():
+            # 已在运行：通知工作进程在下一次进度回调时退出
+            self._shared[("cancel", job_id)] = True
+
+    def _prune(self):
+        """清理过期的已结束任务（调用方持锁）"""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > FINISHED_TTL]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "active": len(self._active),
+                "tracked": len(self._jobs)
+            }
+
+
+_runner = JobRunner()
+
+
+def get_job_runner() -> JobRunner:
+    """进程内共享的任务管理器"""
+    return _runner
@@ -0,0 +1,89 @@
+"""多选题（分号分隔）展开：受访者 × 选项的稀疏计数矩阵
+
+每列只展开一次（按数据集内容指纹缓存），并且只拆分不同的回答字符串；
+选项频次、占比、共选矩阵和分组交叉表都由同一个稀疏矩阵做向量化运算得到。
+"""
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from src.lib.result_cache import cached_analysis
+
+
+@dataclass
+class MultipleChoiceMatrix:
+    column: str
+    options: list  # 选项，按首次出现顺序
+    matrix: sparse.csr_matrix  # 行数 × 选项数；同一回答中重复的选项按次数计
+    answered: np.ndarray  # 每行是否有回答（布尔）
+
+    @property
+    def n_respondents(self) -> int:
+        return int(self.answered.sum())
+
+    @property
+    def n_selections(self) -> int:
+        return int(self.matrix.sum())
+
+    def frequencies(self) -> pd.Series:
+        """各选项被选次数，按频次降序（并列时保持首次出现顺序）"""
+        counts = np.asarray(self.matrix.sum(axis=0)).ravel().astype(int)
+        return pd.Series(counts, index=self.options).sort_values(ascending=False, kind='stable')
+
+    def percentages(self) -> pd.Series:
+        """各选项占有效回答人数的百分比"""
+        frequencies = self.frequencies()
+        if self.n_respondents == 0:
+            return frequencies.astype(float)
+        return (frequencies / self.n_respondents * 100).round(2)
+
+    def co_selection(self) -> pd.DataFrame:
+        """共选矩阵：同时选择两个选项的人数（对角线为各选项被选人数）"""
+        chosen = (self.matrix > 0).astype(np.int32)
+        counts = (chosen.T @ chosen).toarray()
+        return pd.DataFrame(counts, index=self.options, columns=self.options)
+
+    def crosstab(self, groups: pd.Series) -> pd.DataFrame:
+        """分组 × 选项的被选次数（groups 与原数据行对齐，缺失分组的行不计）"""
+        codes, levels = pd.factorize(pd.Series(groups).reset_index(drop=True), sort=True)
+        valid = codes >= 0
+        rows = np.flatnonzero(valid)
+        indicator = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (codes[valid], rows)),
+            shape=(len(levels), self.matrix.shape[0])
+        )
+        counts = (indicator @ self.matrix).toarray().astype(int)
+        return pd.DataFrame(counts, index=list(levels), columns=self.options)
+
+
+def expand_multiple_choice(series: pd.Series) -> MultipleChoiceMatrix:
+    """把分号分隔的回答展开为稀疏矩阵（不走缓存，通常应使用 get_multiple_choice）"""
+    values = series.reset_index(drop=True)
+    answered = values.notna().to_numpy()
+    rows = np.flatnonzero(answered)
+
+    # 问卷中相同的回答大量重复：只拆分不同的回答字符串，再按行映射回去
+    answer_codes, answers = pd.factorize(values[answered].astype(str))
+    options = pd.Series(answers).str.split(';').explode().str.strip()
+    option_codes, labels = pd.factorize(options)
+    per_answer = sparse.csr_matrix(
+        (np.ones(len(option_codes), dtype=np.int32), (options.index.to_numpy(), option_codes)),
+        shape=(len(answers), len(labels))
+    )
+    row_to_answer = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, answer_codes)),
+        shape=(len(values), len(answers))
+    )
+    return MultipleChoiceMatrix(
+        column=str(series.name), options=list(labels),
+        matrix=(row_to_answer @ per_answer).tocsr(), answered=answered
+    )
+
+
+def _expand_column(df: pd.DataFrame, column: str) -> MultipleChoiceMatrix:
+    return expand_multiple_choice(df[column])
+
+
+def get_multiple_choice(df: pd.DataFrame, column: str) -> MultipleChoiceMatrix:
+    """某一列的多选题矩阵，按数据集内容指纹缓存"""
+    return cached_analysis(df, _expand_column, column=column)
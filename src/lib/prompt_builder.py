@@ -0,0 +1,145 @@
+"""AI 对话提示词组装：在 token 预算内取舍数据上下文和对话历史
+
+系统提示按以下顺序组装：
+1. 固定规则（静态前缀）：与数据和问题无关，每轮完全相同，放在最前面，
+   服务端的前缀缓存（如 DeepSeek 的上下文硬盘缓存）可以命中；token 数只估算一次；
+2. 数据集概况：行列数 + 变量列表。列数不多时全部列出，否则只列出与最近问题相关的列
+   （fuzzy_match 的列名索引检索），其余列仍可通过关键词模糊匹配调用；
+3. 值标签：只包含上面列出的列；
+4. 较早对话的摘要：历史消息从最近往前取，放不下的旧消息只保留用户问题的摘要。
+
+token 数按字符估算（不依赖分词器）：ASCII 字符约 0.3 个 token，其他字符（汉字、西里尔字母等）约 0.6 个。
+"""
+from dataclasses import dataclass
+from src.lib.fuzzy_match import get_column_index
+
+# 每轮输入的 token 预算（系统提示 + 对话历史）
+DEFAULT_BUDGET = 6000
+# 列数不超过该值时变量列表列出全部列
+FULL_COLUMN_LIMIT = 60
+# 列数较多时最多列出的相关列
+RELEVANT_COLUMN_LIMIT = 40
+# 检索相关列时使用最近几条用户消息
+QUERY_MESSAGES = 2
+# 较早的单条历史消息最多保留的字符数
+HISTORY_MESSAGE_CHARS = 800
+# 被省略的对话摘要最多列出的问题数和每个问题的字符数
+SUMMARY_QUESTIONS = 10
+SUMMARY_QUESTION_CHARS = 60
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return int(0.3 * ascii_chars + 0.6 * (len(text) - ascii_chars)) + 1
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def relevant_columns(columns, history: list, limit: int = RELEVANT_COLUMN_LIMIT) -> list:
+    """与最近用户问题相关的列（保持原始列顺序）；列数不超过 FULL_COLUMN_LIMIT 时返回全部列"""
+    columns = list(columns)
+    if len(columns) <= FULL_COLUMN_LIMIT:
+        return columns
+    questions = [m.get('content') or '' for m in history if m.get('role') == 'user'][-QUERY_MESSAGES:]
+    index = get_column_index(columns)
+    scores = {}
+    for question in questions:
+        for column, score in index.search(question, top_k=limit, min_score=0.0):
+            scores[column] = max(score, scores.get(column, 0.0))
+    chosen = set(sorted(scores, key=scores.get, reverse=True)[:limit])
+    if not chosen:
+        # 问题中没有提到任何变量：列出前面的若干列作为参考
+        return columns[:limit]
+    return [col for col in columns if col in chosen]
+
+
+def dataset_context(n_rows: int, n_columns: int, column_hints: dict) -> str:
+    """数据集概况；column_hints 为 列名 → 类型说明（只包含要列出的列）"""
+    columns_list = "\n".join(f"  - {col}（{hint}）" for col, hint in column_hints.items())
+    if len(column_hints) < n_columns:
+        title = (f"**变量列表**（共 {n_columns} 列，以下为与问题相关的 {len(column_hints)} 列；"
+                 f"其他变量同样可以用关键词模糊匹配调用）：")
+    else:
+        title = "**变量列表**（参考，调用函数时可以使用关键词模糊匹配）："
+    return f"""当前数据集：{n_rows}行，{n_columns}列。
+
+{title}
+{columns_list}
+
+💡 **模糊匹配功能**：
+- 可以使用简短的关键词，如"满意度"、"选项"、"类别"
+- 系统会自动匹配到完整的变量名
+- 不需要输入完整的变量名（包括括号、标点符号等）"""
+
+
+@dataclass
+class PromptTokens:
+    """一次组装的 token 估算"""
+    static: int
+    dataset: int
+    labels: int
+    history: int
+    omitted_messages: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.static + self.dataset + self.labels + self.history
+
+
+@dataclass
+class BuiltPrompt:
+    messages: list
+    tokens: PromptTokens
+
+
+class PromptBuilder:
+    """固定规则只保存和估算一次，每轮只组装变化的部分"""
+
+    def __init__(self, static_prefix: str, budget: int = DEFAULT_BUDGET):
+        self.static_prefix = static_prefix
+        self.static_tokens = estimate_tokens(static_prefix)
+        self.budget = budget
+
+    def build(self, history: list, data_context: str = "", labels_context: str = "") -> BuiltPrompt:
+        """history 为 [{role, content}, ...]，最后一条是当前问题（始终保留）"""
+        data_tokens = estimate_tokens(data_context)
+        labels_tokens = estimate_tokens(labels_context)
+        remaining = self.budget - self.static_tokens - data_tokens - labels_tokens
+
+        kept, used = [], 0
+        for i in range(len(history) - 1, -1, -1):
+            message = history[i]
+            content = message.get('content') or ''
+            if i < len(history) - 1 and len(content) > HISTORY_MESSAGE_CHARS:
+                content = _clip(content, HISTORY_MESSAGE_CHARS)
+            cost = estimate_tokens(content)
+            if kept and used + cost > remaining:
+                break
+            kept.append({"role": message['role'], "content": content})
+            used += cost
+        kept.reverse()
+        omitted = history[:len(history) - len(kept)]
+
+        summary = ""
+        if omitted:
+            questions = [_clip(m.get('content') or '', SUMMARY_QUESTION_CHARS)
+                         for m in omitted if m.get('role') == 'user'][-SUMMARY_QUESTIONS:]
+            if questions:
+                summary = "\n\n**较早的对话（已省略，仅列出用户问题）**：\n" + "\n".join(f"- {q}" for q in questions)
+        sections = [self.static_prefix, data_context, labels_context]
+        system_prompt = "\n\n".join(section for section in sections if section) + summary
+
+        tokens = PromptTokens(
+            static=self.static_tokens,
+            dataset=data_tokens,
+            labels=labels_tokens,
+            history=used + estimate_tokens(summary),
+            omitted_messages=len(omitted)
+        )
+        return BuiltPrompt([{"role": "system", "content": system_prompt}] + kept, tokens)
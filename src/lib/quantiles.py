@@ -0,0 +1,176 @@
+"""分位数：一次划分得到全部精确分位数，或用可合并的草图得到近似分位数
+
+精确模式：把所有需要的秩位置一次传给 np.partition，只做一次选择，
+结果与 pandas / NumPy 的线性插值分位数相同（不再对每个分位数各排序一次）。
+
+近似模式（KLL 草图）：草图按层保存样本，第 h 层的每个元素代表 2^h 个原始值。
+某层超出容量时排序后隔一个取一个（起点随机）并入上一层，内存约为 O(k)，与数据量无关。
+两个草图可以直接合并，适合追加数据后只更新新增行，或分块 / 多进程计算后汇总。
+数据量不超过容量时不做压缩，结果与精确分位数完全相同。
+"""
+from dataclasses import dataclass
+import numpy as np
+
+# 默认精度参数：k = 200 时单个分位数的秩误差约 1.3%
+DEFAULT_K = 200
+# 层容量按 2/3 递减，最小为 8
+_CAPACITY_DECAY = 2 / 3
+_MIN_CAPACITY = 8
+# 批量更新时每次放入第 0 层的元素数
+_UPDATE_BLOCK = 65536
+
+EXACT, SKETCH, AUTO = "exact", "sketch", "auto"
+# auto 模式下有效值个数超过该值时改用草图
+AUTO_SKETCH_MIN = 5_000_000
+
+
+def rank_error(k: int = DEFAULT_K) -> float:
+    """k 对应的单个分位数归一化秩误差（99% 置信度的经验公式）"""
+    return 2.296 / k ** 0.9723
+
+
+class QuantileSketch:
+    """KLL 分位数草图（忽略 NaN）"""
+
+    def __init__(self, k: int = DEFAULT_K, seed: int = None):
+        self.k = k
+        self.n = 0
+        self.min = np.nan
+        self.max = np.nan
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def exact(self) -> bool:
+        """是否从未压缩过（此时分位数是精确值）"""
+        return len(self._levels) == 1
+
+    @property
+    def error_bound(self) -> float:
+        """归一化秩误差上界；精确时为 0"""
+        return 0.0 if self.exact else rank_error(self.k)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - 1 - level
+        return max(_MIN_CAPACITY, int(np.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = np.fmin(self.min, values.min())
+        self.max = np.fmax(self.max, values.max())
+        for start in range(0, len(values), _UPDATE_BLOCK):
+            self._levels[0] = np.concatenate([self._levels[0], values[start:start + _UPDATE_BLOCK]])
+            self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch"):
+        """把另一个草图并入本草图"""
+        if not other.n:
+            return self
+        self.n += other.n
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for h, items in enumerate(other._levels):
+            self._levels[h] = np.concatenate([self._levels[h], items])
+        self._compress()
+        return self
+
+    def _compress(self):
+        while sum(len(items) for items in self._levels) > sum(self._capacity(h) for h in range(len(self._levels))):
+            for h, items in enumerate(self._levels):
+                if len(items) > self._capacity(h):
+                    break
+            items = np.sort(self._levels[h])
+            # 奇数个时留下一个，保持总权重不变
+            keep, items = (items[:1], items[1:]) if len(items) % 2 else (items[:0], items)
+            promoted = items[self._rng.integers(0, 2)::2]
+            if h + 1 == len(self._levels):
+                self._levels.append(np.empty(0))
+            self._levels[h] = keep
+            self._levels[h + 1] = np.concatenate([self._levels[h + 1], promoted])
+
+    def quantile(self, q):
+        """分位数（q 可为标量或数组）"""
+        scalar = np.ndim(q) == 0
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if not self.n:
+            result = np.full(q.shape, np.nan)
+        elif self.exact:
+            result = np.quantile(self._levels[0], q)
+        else:
+            items = np.concatenate(self._levels)
+            weights = np.concatenate([np.full(len(items_h), 2.0 ** h) for h, items_h in enumerate(self._levels)])
+            order = np.argsort(items, kind='stable')
+            items, cumulative = items[order], np.cumsum(weights[order])
+            idx = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+            result = items[np.clip(idx, 0, len(items) - 1)]
+            # 两端使用真实的最小 / 最大值
+            result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+        return float(result[0]) if scalar else result
+
+    def copy(self) -> "QuantileSketch":
+        other = QuantileSketch(self.k)
+        other.n, other.min, other.max = self.n, self.min, self.max
+        other._levels = [items.copy() for items in self._levels]
+        other._rng = np.random.default_rng(self._rng.integers(2 ** 63))
+        return other
+
+
+@dataclass
+class QuantileResult:
+    """一列数据的多个分位数"""
+    probabilities: list
+    values: np.ndarray
+    n: int
+    method: str  # exact / sketch
+    rank_error: float = 0.0  # 归一化秩误差上界，精确时为 0
+
+    def __getitem__(self, q: float) -> float:
+        return float(self.values[self.probabilities.index(q)])
+
+    def to_dict(self) -> dict:
+        return {q: float(v) for q, v in zip(self.probabilities, self.values)}
+
+
+def exact_quantiles(values, probabilities) -> np.ndarray:
+    """精确分位数（线性插值，与 np.quantile 相同），所有分位数共用一次 np.partition"""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    values = values[~np.isnan(values)]
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    if not len(values):
+        return np.full(probabilities.shape, np.nan)
+    position = probabilities * (len(values) - 1)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, len(values) - 1)
+    partitioned = np.partition(values, np.unique(np.concatenate([lower, upper])))
+    fraction = position - lower
+    return partitioned[lower] + (partitioned[upper] - partitioned[lower]) * fraction
+
+
+def compute_quantiles(values, probabilities=(0.25, 0.5, 0.75), method: str = EXACT,
+                      k: int = DEFAULT_K, seed: int = 0) -> QuantileResult:
+    """一次计算一列数据的多个分位数
+
+    Args:
+        method: exact（一次划分，精确）/ sketch（KLL 草图，近似，内存 O(k)）/
+                auto（有效值超过 AUTO_SKETCH_MIN 时用草图）
+        k: 草图精度参数，越大越精确
+    """
+    if method not in (EXACT, SKETCH, AUTO):
+        raise ValueError(f"未知的分位数计算方式：{method}")
+    values = np.asarray(values, dtype=np.float64).ravel()
+    probabilities = [float(q) for q in probabilities]
+    n = int((~np.isnan(values)).sum())
+    if method == AUTO:
+        method = SKETCH if n > AUTO_SKETCH_MIN else EXACT
+    if method == EXACT:
+        return QuantileResult(probabilities, exact_quantiles(values, probabilities), n, EXACT)
+    sketch = QuantileSketch(k, seed=seed).update(values)
+    return QuantileResult(probabilities, sketch.quantile(probabilities), n,
+                          SKETCH if not sketch.exact else EXACT, sketch.error_bound)
@@ -0,0 +1,150 @@
+"""闭式最小二乘回归：NumPy 实现的 OLS，不再为每次点击构建 statsmodels 模型
+
+先对参与分析的全部变量计算一次中心化交叉积矩阵（SSCP），之后任意"因变量 ~ 自变量子集"
+的回归都只在这个小方阵上做 Cholesky 分解：中介分析的 a、b、c 路径和逐步加入自变量的
+嵌套模型共用同一个矩阵，数据只扫描一次。
+
+斜率由中心化矩阵求解、截距由均值还原，比直接对含常数列的 X'X 求解数值更稳定；
+自变量完全共线时退回到伪逆。
+"""
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from scipy import linalg, stats
+
+CONST = "const"
+
+
+@dataclass
+class OLSFit:
+    """一个回归模型的结果（系数等 Series 的索引为 const + 自变量名）"""
+    outcome: str
+    predictors: list
+    n: int
+    coefficients: pd.Series
+    std_errors: pd.Series
+    t_values: pd.Series
+    p_values: pd.Series
+    r_squared: float
+    adj_r_squared: float
+    f_statistic: float
+    f_p_value: float
+    df_model: int
+    df_resid: int
+    vif: pd.Series  # 自变量的方差膨胀因子
+    test_type: str = "线性回归"
+
+    def table(self) -> pd.DataFrame:
+        """系数表：系数、标准误、t、p、VIF"""
+        return pd.DataFrame({
+            "coef": self.coefficients,
+            "std_err": self.std_errors,
+            "t": self.t_values,
+            "p": self.p_values,
+            "vif": self.vif.reindex(self.coefficients.index)
+        })
+
+    def to_dict(self) -> dict:
+        table = self.table().astype(object)
+        table = table.where(table.notna(), None)
+        return {
+            "test_type": self.test_type,
+            "outcome": self.outcome,
+            "predictors": list(self.predictors),
+            "n": self.n,
+            "r_squared": self.r_squared,
+            "adj_r_squared": self.adj_r_squared,
+            "f_statistic": self.f_statistic,
+            "f_p_value": self.f_p_value,
+            "df_model": self.df_model,
+            "df_resid": self.df_resid,
+            "coefficients": table.to_dict(orient="index")
+        }
+
+
+class CrossProducts:
+    """无缺失数值数据的均值与中心化交叉积矩阵，可反复用来拟合不同的回归模型"""
+
+    def __init__(self, data: pd.DataFrame):
+        values = data.to_numpy(dtype=np.float64)
+        self.columns = list(data.columns)
+        self.n = values.shape[0]
+        self.means = values.mean(axis=0)
+        centered = values - self.means
+        self.sscp = centered.T @ centered
+        self._index = {col: i for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def from_moments(cls, columns: list, n: int, means: np.ndarray, sscp: np.ndarray) -> "CrossProducts":
+        """由已有的均值和中心化交叉积构造（如增量统计累积的结果），不需要原始数据"""
+        xp = cls.__new__(cls)
+        xp.columns = list(columns)
+        xp.n = int(n)
+        xp.means = np.asarray(means, dtype=np.float64)
+        xp.sscp = np.asarray(sscp, dtype=np.float64)
+        xp._index = {col: i for i, col in enumerate(xp.columns)}
+        return xp
+
+    def fit(self, outcome: str, predictors: list) -> OLSFit:
+        """outcome ~ const + predictors"""
+        predictors = list(predictors)
+        y = self._index[outcome]
+        x = [self._index[p] for p in predictors]
+        k = len(x)
+        df_resid = self.n - k - 1
+        if df_resid < 1:
+            raise ValueError("有效数据点太少，无法拟合回归模型")
+
+        s_xx = self.sscp[np.ix_(x, x)]
+        s_xy = self.sscp[x, y]
+        s_yy = self.sscp[y, y]
+        try:
+            factor = linalg.cho_factor(s_xx)
+            beta = linalg.cho_solve(factor, s_xy)
+            inverse = linalg.cho_solve(factor, np.eye(k))
+        except linalg.LinAlgError:
+            inverse = np.linalg.pinv(s_xx)
+            beta = inverse @ s_xy
+
+        sse = max(float(s_yy - beta @ s_xy), 0.0)
+        sigma2 = sse / df_resid
+        x_means = self.means[x]
+        intercept = self.means[y] - beta @ x_means
+        slope_var = sigma2 * np.diag(inverse)
+        intercept_var = sigma2 * (1.0 / self.n + x_means @ inverse @ x_means)
+
+        names = [CONST] + predictors
+        coef = np.concatenate([[intercept], beta])
+        se = np.sqrt(np.concatenate([[intercept_var], slope_var]))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = coef / se
+            r2 = 1 - sse / s_yy if s_yy > 0 else np.nan
+            f = (s_yy - sse) / k / sigma2
+        p = 2 * stats.t.sf(np.abs(t), df_resid)
+        adj_r2 = 1 - (1 - r2) * (self.n - 1) / df_resid
+
+        return OLSFit(
+            outcome=outcome,
+            predictors=predictors,
+            n=self.n,
+            coefficients=pd.Series(coef, index=names),
+            std_errors=pd.Series(se, index=names),
+            t_values=pd.Series(t, index=names),
+            p_values=pd.Series(p, index=names),
+            r_squared=float(r2),
+            adj_r_squared=float(adj_r2),
+            f_statistic=float(f),
+            f_p_value=float(stats.f.sf(f, k, df_resid)),
+            df_model=k,
+            df_resid=df_resid,
+            vif=pd.Series(np.diag(inverse) * np.diag(s_xx), index=predictors)
+        )
+
+    def nested(self, outcome: str, predictors: list) -> list:
+        """依次加入自变量的嵌套模型：[y ~ x1, y ~ x1 + x2, ...]"""
+        return [self.fit(outcome, predictors[:i]) for i in range(1, len(predictors) + 1)]
+
+
+def ols(data: pd.DataFrame, outcome: str, predictors: list) -> OLSFit:
+    """单个模型的便捷入口；data 为无缺失的数值数据"""
+    return CrossProducts(data[[outcome] + list(predictors)]).fit(outcome, predictors)
@@ -0,0 +1,201 @@
+"""重抽样推断：Bootstrap 置信区间与置换检验
+
+一次生成 B 组重抽样下标（B × n 矩阵），统计量函数对整批样本做矩阵运算，不逐次循环。
+B 组重抽样按块计算以限制内存；每块使用由 seed 派生的独立随机流，
+因此结果只取决于 seed，与是否使用多进程、进程数无关。
+
+统计量函数接收若干数组，第 0 维为样本；重抽样时每个数组前面多出一维 B，
+函数需沿倒数第 1 维（二维数据为倒数第 2 维）计算，返回形状为 (B,) 的结果。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+import numpy as np
+
+DEFAULT_RESAMPLES = 2000
+# 每块重抽样分配的元素上限：下标矩阵加上按下标取出的各变量（每个元素 8 字节，约 40 MB）
+CHUNK_ELEMENTS = 5_000_000
+# 总计算量（B × n）超过该值时，n_jobs=None 才会启用多进程
+PARALLEL_MIN_ELEMENTS = 20_000_000
+
+
+@dataclass
+class ResamplingResult:
+    statistic: str
+    estimate: float
+    n: int
+    n_resamples: int
+    seed: int = None
+    confidence: float = 0.95
+    ci_lower: float = None  # Bootstrap 百分位置信区间
+    ci_upper: float = None
+    std_error: float = None  # Bootstrap 标准误
+    p_value: float = None  # 置换检验双侧 p 值
+    test_type: str = "重抽样推断"
+
+    def to_dict(self) -> dict:
+        result = {"test_type": self.test_type}
+        result.update({k: v for k, v in asdict(self).items() if k != "test_type"})
+        return result
+
+
+# ================================
+# 批量统计量（最后一维 / 倒数第二维为样本）
+# ================================
+
+def _moments(x, y):
+    """中心化后的协方差与方差（分母相同，比值不受影响）"""
+    x = x - x.mean(axis=-1, keepdims=True)
+    y = y - y.mean(axis=-1, keepdims=True)
+    return (x * y).sum(axis=-1), (x * x).sum(axis=-1), (y * y).sum(axis=-1)
+
+
+def mean_difference(values, in_group1):
+    """组 1 均值 - 组 2 均值（in_group1 为布尔数组）"""
+    group1 = in_group1.astype(float)
+    group2 = 1.0 - group1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean1 = (values * group1).sum(axis=-1) / group1.sum(axis=-1)
+        mean2 = (values * group2).sum(axis=-1) / group2.sum(axis=-1)
+    return mean1 - mean2
+
+
+def pearson_r(x, y):
+    cov, var_x, var_y = _moments(x, y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return cov / np.sqrt(var_x * var_y)
+
+
+def indirect_effect(x, m, y):
+    """简单中介模型的间接效应 a × b
+
+    a：M 对 X 的回归系数；b：Y 对 X、M 回归中 M 的系数（由协方差直接求解二元回归）。
+    """
+    cov_xm, var_x, var_m = _moments(x, m)
+    cov_xy, _, _ = _moments(x, y)
+    cov_my, _, _ = _moments(m, y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = cov_xm / var_x
+        b = (cov_my * var_x - cov_xy * cov_xm) / (var_x * var_m - cov_xm ** 2)
+    return a * b
+
+
+def cronbach_alpha(items):
+    """items：样本 × 题目（重抽样时为 B × 样本 × 题目）"""
+    k = items.shape[-1]
+    item_vars = items.var(axis=-2, ddof=1).sum(axis=-1)
+    total_var = items.sum(axis=-1).var(axis=-1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return k / (k - 1) * (1 - item_vars / total_var)
+
+
+# ================================
+# 重抽样下标
+# ================================
+
+def bootstrap_indices(n: int, n_resamples: int, rng: np.random.Generator, strata=None) -> np.ndarray:
+    """B × n 的有放回抽样下标；给定 strata 时在每层内分别抽样（各层样本量不变）"""
+    if strata is None:
+        return rng.integers(0, n, size=(n_resamples, n))
+    blocks = []
+    for level in np.unique(strata):
+        members = np.flatnonzero(strata == level)
+        blocks.append(members[rng.integers(0, len(members), size=(n_resamples, len(members)))])
+    return np.concatenate(blocks, axis=1)
+
+
+def permutation_indices(n: int, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """B × n 的随机排列下标"""
+    return np.argsort(rng.random((n_resamples, n)), axis=1)
+
+
+def _chunk_sizes(n: int, n_resamples: int, width: int = 1) -> list:
+    """每块的重抽样次数；width 为每次抽样每行分配的元素数（下标 + 各变量的列数）"""
+    size = max(1, min(n_resamples, CHUNK_ELEMENTS // max(n * width, 1)))
+    sizes = [size] * (n_resamples // size)
+    if n_resamples % size:
+        sizes.append(n_resamples % size)
+    return sizes
+
+
+def _resample_chunk(statistic, arrays, kind, size, seed_sequence, strata, permute):
+    rng = np.random.default_rng(seed_sequence)
+    n = len(arrays[0])
+    if kind == "bootstrap":
+        idx = bootstrap_indices(n, size, rng, strata)
+        return statistic(*[a[idx] for a in arrays])
+    idx = permutation_indices(n, size, rng)
+    shuffled = [a[idx] if i == permute else a for i, a in enumerate(arrays)]
+    return statistic(*shuffled)
+
+
+def _resample(statistic, arrays, kind, n_resamples, seed, strata=None, permute=0, n_jobs=1,
+              progress=None) -> np.ndarray:
+    """计算 B 次重抽样的统计量分布（按块，可多进程）；progress(已完成比例) 在每块完成后调用"""
+    n = len(arrays[0])
+    # 每块分配 size × n 的下标矩阵，以及每个数组取下标后的 size × n × 列数
+    width = 1 + sum(int(np.prod(np.shape(a)[1:])) for a in arrays)
+    sizes = _chunk_sizes(n, n_resamples, width)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if n_jobs is None:
+        n_jobs = (os.cpu_count() or 1) if n * n_resamples >= PARALLEL_MIN_ELEMENTS else 1
+    n_jobs = min(n_jobs, len(sizes))
+
+    jobs = [(statistic, arrays, kind, size, s, strata, permute) for size, s in zip(sizes, seeds)]
+    if n_jobs <= 1:
+        parts = (_resample_chunk(*job) for job in jobs)
+        return _collect(parts, sizes, n_resamples, progress)
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        return _collect(pool.map(_resample_chunk, *zip(*jobs)), sizes, n_resamples, progress)
+
+
+def _collect(parts, sizes, n_resamples, progress) -> np.ndarray:
+    done, collected = 0, []
+    for size, part in zip(sizes, parts):
+        collected.append(part)
+        done += size
+        if progress is not None:
+            progress(done / n_resamples)
+    return np.concatenate(collected)
+
+
+def bootstrap(statistic, arrays, n_resamples: int = DEFAULT_RESAMPLES, confidence: float = 0.95,
+              seed: int = None, strata=None, n_jobs: int = 1, progress=None) -> ResamplingResult:
+    """Bootstrap 百分位置信区间
+
+    Args:
+        statistic: 批量统计量函数（见模块说明）
+        arrays: 传给 statistic 的数组列表，第 0 维为样本
+        strata: 分层标签（如两组比较时的分组），每层内分别有放回抽样
+        n_jobs: 进程数；None 表示计算量大时自动使用全部 CPU
+        progress: 进度回调 progress(0~1)
+    """
+    arrays = [np.asarray(a) for a in arrays]
+    estimate = float(statistic(*arrays))
+    distribution = _resample(statistic, arrays, "bootstrap", n_resamples, seed, strata=strata, n_jobs=n_jobs,
+                             progress=progress)
+    distribution = distribution[np.isfinite(distribution)]
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(distribution, [tail, 100 - tail]) if len(distribution) else (np.nan, np.nan)
+    return ResamplingResult(
+        statistic=getattr(statistic, "__name__", "statistic"), estimate=estimate, n=len(arrays[0]),
+        n_resamples=n_resamples, seed=seed, confidence=confidence,
+        ci_lower=float(lower), ci_upper=float(upper),
+        std_error=float(distribution.std(ddof=1)) if len(distribution) > 1 else None
+    )
+
+
+def permutation_test(statistic, arrays, permute: int = 0, n_resamples: int = DEFAULT_RESAMPLES,
+                     seed: int = None, n_jobs: int = 1, progress=None) -> ResamplingResult:
+    """置换检验：打乱第 permute 个数组与其余数组的对应关系，双侧 p = (#|T*| ≥ |T| + 1) / (B + 1)"""
+    arrays = [np.asarray(a) for a in arrays]
+    estimate = float(statistic(*arrays))
+    distribution = _resample(statistic, arrays, "permutation", n_resamples, seed, permute=permute, n_jobs=n_jobs,
+                             progress=progress)
+    # 浮点误差容差：与观测值相等的置换结果计为"至少同样极端"
+    extreme = np.abs(distribution) >= np.abs(estimate) * (1 - 1e-12)
+    return ResamplingResult(
+        statistic=getattr(statistic, "__name__", "statistic"), estimate=estimate, n=len(arrays[0]),
+        n_resamples=n_resamples, seed=seed,
+        p_value=float((extreme.sum() + 1) / (n_resamples + 1))
+    )
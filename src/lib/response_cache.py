@@ -0,0 +1,147 @@
+"""AI 解读结果的磁盘缓存：相同的提示词不再重复请求 AI 服务
+
+统计视图和绘图视图的解读提示词由（四舍五入后的）统计量确定性地生成，同一分析重跑时
+提示词完全相同。缓存键 = (模型, Base URL, 规范化后的消息, 界面语言)；
+规范化只去掉每行首尾空白和多余空行，不改变内容。
+
+缓存保存在 SQLite 文件中（默认 ~/.cache/aistats，可用环境变量 AISTATS_CACHE_DIR 指定），
+进程重启后仍然有效，多个进程可同时读写。条目超过有效期（TTL）后失效；
+总大小超过上限时按最近访问时间淘汰最旧的条目。磁盘不可写等错误只会使缓存失效，不影响分析。
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# 默认有效期 30 天、总大小上限 32 MB
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+_FILE_NAME = "ai_responses.sqlite3"
+
+_BLANK_LINES = re.compile(r"\n{2,}")
+
+
+def default_cache_dir() -> str:
+    return os.environ.get("AISTATS_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "aistats")
+
+
+def normalize_prompt(text: str) -> str:
+    """去掉每行首尾空白和多余空行"""
+    lines = (line.strip() for line in str(text).strip().splitlines())
+    return _BLANK_LINES.sub("\n", "\n".join(lines))
+
+
+def response_key(config: dict, messages: list, lang: str) -> str:
+    """(模型, Base URL, 规范化后的消息, 语言) → 缓存键"""
+    payload = [
+        config.get('model', ''),
+        (config.get('base_url') or '').rstrip('/'),
+        [(m['role'], normalize_prompt(m['content'])) for m in messages],
+        lang
+    ]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """线程安全的磁盘缓存（每个线程一个 SQLite 连接）"""
+
+    def __init__(self, path: str = None, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(default_cache_dir(), _FILE_NAME)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """未过期的缓存回复；没有时返回 None"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+                if row is not None:
+                    conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        except (sqlite3.Error, OSError):
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str):
+        if not response:
+            return
+        now = time.time()
+        size = len(response.encode('utf-8')) + len(key)
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                    (key, response, now, now, size)
+                )
+                self._evict(conn, now)
+        except (sqlite3.Error, OSError):
+            pass
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """删除过期条目；总大小超过上限时按最近访问时间从旧到新删除"""
+        conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        removed, stale = 0, []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            stale.append((key,))
+            removed += size
+            if removed >= excess:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM responses")
+        except (sqlite3.Error, OSError):
+            pass
+
+    def stats(self) -> dict:
+        try:
+            entries, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        except (sqlite3.Error, OSError):
+            entries, total = 0, 0
+        return {"entries": entries, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+
+_cache = ResponseCache()
+
+
+def get_response_cache() -> ResponseCache:
+    """进程内共享的 AI 回复缓存"""
+    return _cache
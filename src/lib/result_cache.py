@@ -0,0 +1,160 @@
+"""统计结果缓存：按数据内容指纹缓存分析结果
+
+缓存键 = (数据集内容指纹, 分析函数, 规范化参数, 值标签版本)。
+缓存在进程内共享，统计视图与 AI 工具调用命中同一份结果；
+按 LRU 淘汰，并限制条目数和估算内存。
+"""
+import hashlib
+import json
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+import pandas as pd
+
+# 默认容量：256 条结果 / 64 MB
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# id(DataFrame) → 内容指纹；对象被回收时自动移除
+_fingerprints = {}
+_fingerprint_lock = threading.Lock()
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """数据集内容指纹（列名 + 类型 + 全部取值的哈希），同一对象只计算一次"""
+    key = id(df)
+    with _fingerprint_lock:
+        cached = _fingerprints.get(key)
+    if cached is not None:
+        return cached
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(list(df.columns)).encode('utf-8'))
+    h.update(repr([str(dtype) for dtype in df.dtypes]).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    fingerprint = h.hexdigest()
+    register_fingerprint(df, fingerprint)
+    return fingerprint
+
+
+def register_fingerprint(df: pd.DataFrame, fingerprint: str):
+    """为已知内容的数据对象直接登记指纹（如共享数据集仓库的句柄）"""
+    key = id(df)
+    with _fingerprint_lock:
+        _fingerprints[key] = fingerprint
+    weakref.finalize(df, _fingerprints.pop, key, None)
+
+
+def labels_fingerprint(value_labels: dict) -> str:
+    """值标签内容的版本号（内容相同则版本相同，可跨会话共享）"""
+    if not value_labels:
+        return ""
+    payload = sorted(
+        (str(var), sorted((repr(value), str(label)) for value, label in labels.items()))
+        for var, labels in value_labels.items()
+    )
+    return hashlib.blake2b(repr(payload).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _normalize_args(kwargs: dict) -> str:
+    """参数规范化为稳定字符串（键排序；列表保持顺序，因为变量顺序影响结果展示）"""
+    return json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _estimate_size(value) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class ResultCache:
+    """线程安全的 LRU 结果缓存，同时限制条目数和估算内存"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key → (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """返回 (是否命中, 值)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value):
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # 淘汰最久未使用的条目
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def get_or_compute(self, key, compute):
+        """命中则直接返回，否则计算并写入缓存（计算过程中的异常不会被缓存）"""
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+_result_cache = ResultCache()
+
+
+def get_result_cache() -> ResultCache:
+    """进程内共享的结果缓存"""
+    return _result_cache
+
+
+def cached_analysis(df: pd.DataFrame, func, **kwargs):
+    """带缓存地执行 func(df, **kwargs)
+
+    例：cached_analysis(df, stat_engine.independent_t_test, data_var="成绩", group_var="性别")
+    参数 value_labels 只以其内容版本号参与缓存键。
+    """
+    return get_result_cache().get_or_compute(analysis_key(df, func, **kwargs), lambda: func(df, **kwargs))
+
+
+def analysis_key(df: pd.DataFrame, func, **kwargs) -> tuple:
+    """cached_analysis(df, func, **kwargs) 使用的缓存键"""
+    args = dict(kwargs)
+    labels_version = labels_fingerprint(args.pop('value_labels', None))
+    return (
+        dataset_fingerprint(df),
+        f"{func.__module__}.{func.__qualname__}",
+        _normalize_args(args),
+        labels_version
+    )
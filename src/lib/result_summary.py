@@ -0,0 +1,186 @@
+"""发送给 AI 的统计结果摘要：按分析类型压缩结果字典，完整结果只用于本地展示
+
+AI 解读只需要关键统计量，原样发送 to_dict() 会把完整相关矩阵、p 值矩阵、共选矩阵
+和每个类别的频次都放进第二次请求的提示词。这里按分析类型：
+
+- 数值保留有效位数（绝对值 ≥ 1 保留 3 位小数，否则 3 位有效数字），NaN / inf 记为 null；
+- 去掉解读用不到或已合并到其他字段的内容（如自由度、置信区间、值标签字典、完整共选矩阵）；
+- 频次表合并为 "数值（标签）": "频次 (百分比%)"，类别过多时只保留频次最高的若干类，
+  其余合并为 "其他"；
+- 相关矩阵改为按 |r| 排序的变量对列表，批量检验按校正后 p 值排序，均有条数上限。
+"""
+import json
+import math
+import numpy as np
+from src.lib.stat_engine import (
+    TTestResult, BatchTTestResult, CorrelationResult, MultipleChoiceResult
+)
+
+# 频次表最多保留的类别数（含 "其他"）
+MAX_CATEGORIES = 20
+# 批量检验最多保留的变量数
+MAX_ROWS = 30
+# 相关分析最多保留的变量对数
+MAX_PAIRS = 30
+# 多选题最多列出的共选选项对数
+MAX_CO_SELECTED = 10
+OTHER = "其他"
+
+# 批量检验中发送给 AI 的列（其余如标准差、自由度、置信区间只在本地展示）
+_BATCH_FIELDS = ("variable", "n1", "n2", "mean1", "mean2", "median1", "median2",
+                 "statistic", "p", "p_adjusted", "effect_size", "significant")
+_TTEST_DROPPED = ("df", "ci_95_lower", "ci_95_upper")
+
+
+def _number(value):
+    if value is None or isinstance(value, (bool, np.bool_)):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        if not math.isfinite(value):
+            return None
+        if value == 0 or abs(value) >= 1:
+            return round(value, 3)
+        return float(f"{value:.3g}")
+    return value
+
+
+def _compact(obj):
+    """递归地压缩数值"""
+    if isinstance(obj, dict):
+        return {str(k): _compact(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_compact(v) for v in obj]
+    return _number(obj)
+
+
+def _label(value, labels: dict) -> str:
+    label = labels.get(value, labels.get(str(value))) if labels else None
+    return f"{value}（{label}）" if label not in (None, "") else str(value)
+
+
+def _frequencies(counts: dict, percentages: dict, labels: dict = None) -> dict:
+    """合并频次和百分比；类别过多时保留频次最高的 MAX_CATEGORIES - 1 类，其余合并为 "其他" """
+    items = list(counts.items())
+    omitted = []
+    if len(items) > MAX_CATEGORIES:
+        kept = {value for value, _ in sorted(items, key=lambda item: -item[1])[:MAX_CATEGORIES - 1]}
+        omitted = [value for value, _ in items if value not in kept]
+        items = [(value, count) for value, count in items if value in kept]
+    table = {_label(value, labels): f"{count} ({_number(percentages.get(value, 0))}%)" for value, count in items}
+    if omitted:
+        table[f"{OTHER}（{len(omitted)}类）"] = str(sum(counts[value] for value in omitted))
+    return table
+
+
+def _variable_summary(summary: dict) -> dict:
+    """描述统计中单个变量的摘要"""
+    kind = summary.get("type")
+    if "error" in summary:
+        return _compact(summary)
+    if kind == "categorical":
+        return {
+            "type": kind, "n": summary["n"], "unique": summary.get("unique"), "missing": summary.get("missing"),
+            "frequencies": _frequencies(summary["all_values"], summary["percentages"], summary.get("value_labels"))
+        }
+    if kind == "multiple_choice":
+        return {
+            "type": kind, "n": summary["n"], "n_selections": summary["n_selections"],
+            "avg_per_person": _number(summary["avg_per_person"]), "missing": summary.get("missing"),
+            "option_frequencies": _frequencies(summary["option_frequencies"], summary["option_percentages"])
+        }
+    return _compact(summary)
+
+
+def _descriptive(result: dict) -> dict:
+    return {var: _variable_summary(summary) if isinstance(summary, dict) else summary
+            for var, summary in result.items()}
+
+
+def _t_test(result: dict) -> dict:
+    return _compact({k: v for k, v in result.items() if k not in _TTEST_DROPPED})
+
+
+def _batch(result: dict) -> dict:
+    rows = sorted(result["results"], key=lambda row: (row.get("p_adjusted") is None, row.get("p_adjusted") or 0))
+    summary = {k: v for k, v in result.items() if k != "results"}
+    summary["results"] = [{k: row[k] for k in _BATCH_FIELDS if k in row} for row in rows[:MAX_ROWS]]
+    if len(rows) > MAX_ROWS:
+        summary["omitted_variables"] = len(rows) - MAX_ROWS
+    return _compact(summary)
+
+
+def _correlation(result: dict) -> dict:
+    variables = result["variables"]
+    r, p = result["correlation_matrix"], result["p_value_matrix"]
+    pairwise_n = result.get("pairwise_n")
+    pairs = []
+    for i, var1 in enumerate(variables):
+        for var2 in variables[i + 1:]:
+            pair = {"var1": var1, "var2": var2, "r": r[var2][var1], "p": p[var1][var2]}
+            if pairwise_n is not None:
+                pair["n"] = pairwise_n[var1][var2]
+            pairs.append(pair)
+    # 按 |r| 降序，无法计算的系数排在最后
+    pairs.sort(key=lambda pair: (_number(pair["r"]) is None, -abs(_number(pair["r"]) or 0)))
+    summary = {
+        "test_type": result["test_type"], "variables": variables, "n": result["n"],
+        "n_pairs": len(pairs), "pairs": pairs[:MAX_PAIRS]
+    }
+    if len(pairs) > MAX_PAIRS:
+        summary["omitted_pairs"] = len(pairs) - MAX_PAIRS
+    return _compact(summary)
+
+
+def _multiple_choice(result: dict) -> dict:
+    frequencies = result["option_frequencies"]
+    summary = {
+        "test_type": result["test_type"], "variable": result["variable"],
+        "n": result["n"], "n_selections": result["n_selections"],
+        "option_frequencies": _frequencies(frequencies, result["option_percentages"])
+    }
+    co_selection = result.get("co_selection") or {}
+    options = list(co_selection)
+    pairs = [(a, b, co_selection[b][a]) for i, a in enumerate(options) for b in options[i + 1:]]
+    pairs = sorted((pair for pair in pairs if pair[2] > 0), key=lambda pair: -pair[2])[:MAX_CO_SELECTED]
+    summary["top_co_selected"] = [{"options": [a, b], "count": count} for a, b, count in pairs]
+    if result.get("crosstab") is not None:
+        kept = sorted(frequencies, key=lambda option: -frequencies[option])[:MAX_CATEGORIES - 1]
+        crosstab = {}
+        for group, counts in result["crosstab"].items():
+            row = {option: counts.get(option, 0) for option in kept}
+            rest = sum(count for option, count in counts.items() if option not in row)
+            if rest:
+                row[OTHER] = rest
+            crosstab[group] = row
+        summary["group_var"] = result["group_var"]
+        summary["crosstab"] = crosstab
+    return _compact(summary)
+
+
+_SUMMARIZERS = {
+    TTestResult.test_type: _t_test,
+    BatchTTestResult.test_type: _batch,
+    CorrelationResult.test_type: _correlation,
+    MultipleChoiceResult.test_type: _multiple_choice
+}
+
+
+def summarize_result(result: dict) -> dict:
+    """工具调用结果（to_dict() 的字典）→ 发送给 AI 的摘要"""
+    if not isinstance(result, dict) or "error" in result:
+        return result
+    summarizer = _SUMMARIZERS.get(result.get("test_type"))
+    if summarizer is not None:
+        return summarizer(result)
+    if "test_type" not in result:
+        # 描述统计：变量名 → 统计字典
+        return _descriptive(result)
+    return _compact(result)
+
+
+def serialize_result(result: dict) -> str:
+    """摘要的紧凑 JSON 文本"""
+    return json.dumps(summarize_result(result), ensure_ascii=False, separators=(",", ":"), default=str)
@@ -0,0 +1,990 @@
+"""统计计算引擎：不依赖 st.session_state 的纯计算函数
+
+所有函数接收 DataFrame 并返回带类型的结果对象（dataclass），
+可以在 Streamlit 重跑之外、工作线程或批处理任务中直接调用。
+统计视图和 AI 的 TOOL_FUNCTIONS 只负责读取会话数据并展示结果。
+"""
+import copy
+import io
+from dataclasses import dataclass, asdict, field
+import pandas as pd
+import numpy as np
+from scipy import stats
+from scipy.stats import f_oneway, levene
+from src.lib.fuzzy_match import match_variable
+from src.lib.column_profile import (
+    ColumnProfile, get_profile, profile_column, sorted_values as _sorted_values
+)
+from src.lib.correlation import correlation_arrays, screen_correlations, write_correlation_pairs
+from src.lib.multiple_choice import MultipleChoiceMatrix, expand_multiple_choice, get_multiple_choice
+from src.lib import batch_tests, resampling
+from src.lib.resampling import ResamplingResult
+from src.lib.regression import CrossProducts, OLSFit
+from src.lib.incremental import RunningMoments
+from src.lib.quantiles import compute_quantiles, EXACT, SKETCH
+
+
+class StatError(ValueError):
+    """统计输入无效（变量不存在、分组数不对、有效数据太少等）"""
+
+
+def significance_stars(p_value: float) -> str:
+    """p 值对应的显著性标记"""
+    return "***" if p_value < 0.001 else "**" if p_value < 0.01 else "*" if p_value < 0.05 else "ns"
+
+
+def to_numeric(series: pd.Series) -> pd.Series:
+    """转换为数值类型，无法转换的值记为缺失
+
+    统一为 float64：导入时降精度的 float32 列在求和、方差等计算中按双精度累加。
+    """
+    return pd.to_numeric(series, errors='coerce').astype('float64')
+
+
+def _require_columns(df: pd.DataFrame, columns):
+    for col in columns:
+        if col not in df.columns:
+            raise StatError(f"变量 {col} 不存在")
+
+
+# ================================
+# 结果对象
+# ================================
+
+@dataclass
+class TTestResult:
+    """独立样本 t 检验结果"""
+    data_var: str
+    group_var: str
+    group1_name: str
+    group2_name: str
+    group1_n: int
+    group2_n: int
+    group1_mean: float
+    group2_mean: float
+    group1_std: float
+    group2_std: float
+    mean_diff: float
+    t_statistic: float
+    df: int
+    p_value: float
+    ci_95_lower: float
+    ci_95_upper: float
+    cohens_d: float
+    significant: str
+    test_type: str = "独立样本 t 检验"
+
+    def to_dict(self) -> dict:
+        result = {"test_type": self.test_type}
+        result.update({k: v for k, v in asdict(self).items() if k != "test_type"})
+        return result
+
+
+@dataclass
+class BatchTTestResult:
+    """批量两组比较结果：每个结果变量一行"""
+    group_var: str
+    group1_name: str
+    group2_name: str
+    method: str  # student / welch / mannwhitney
+    adjust: str  # holm / bh / none
+    table: pd.DataFrame  # 索引为变量名；含 n1、n2、statistic、p、p_adjusted、effect_size、significant 等
+    test_type: str = "批量两组比较"
+
+    def significant_variables(self, alpha: float = 0.05) -> list:
+        """校正后 p < alpha 的变量"""
+        return self.table.index[self.table["p_adjusted"] < alpha].tolist()
+
+    def to_dict(self) -> dict:
+        table = self.table.astype(object).where(self.table.notna(), None)
+        return {
+            "test_type": self.test_type,
+            "group_var": self.group_var,
+            "group1_name": self.group1_name,
+            "group2_name": self.group2_name,
+            "method": self.method,
+            "adjust": self.adjust,
+            "n_variables": len(self.table),
+            "n_significant": len(self.significant_variables()),
+            "results": [{"variable": var, **row} for var, row in table.to_dict(orient="index").items()]
+        }
+
+
+@dataclass
+class OneSampleTTestResult:
+    """单样本 t 检验结果"""
+    variable: str
+    n: int
+    mean: float
+    std: float
+    test_value: float
+    t_statistic: float
+    p_value: float
+    significant: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class PairedTTestResult:
+    """配对样本 t 检验结果"""
+    var1: str
+    var2: str
+    n: int
+    mean1: float
+    mean2: float
+    mean_diff: float
+    t_statistic: float
+    p_value: float
+    significant: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class AnovaResult:
+    """单因素方差分析结果"""
+    dependent: str
+    factor: str
+    n_groups: int
+    f_statistic: float
+    p_value: float
+    levene_statistic: float
+    levene_p_value: float
+    significant: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class AlphaResult:
+    """Cronbach's Alpha 信度结果"""
+    n_items: int
+    n: int
+    alpha: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class MediationResult:
+    """简单中介模型 X → M → Y 的路径系数（三条路径共用一个交叉积矩阵）"""
+    x_var: str
+    m_var: str
+    y_var: str
+    n: int
+    a: float  # X → M
+    p_a: float
+    b: float  # M → Y（控制 X）
+    p_b: float
+    c_prime: float  # X → Y 直接效应
+    p_c_prime: float
+    c: float  # X → Y 总效应
+    p_c: float
+    indirect: float  # a × b
+    test_type: str = "简单中介效应"
+
+    @property
+    def mediation_ratio(self) -> float:
+        """中介比例（%）"""
+        return self.indirect / self.c * 100 if self.c != 0 else 0.0
+
+    def to_dict(self) -> dict:
+        result = {"test_type": self.test_type}
+        result.update({k: v for k, v in asdict(self).items() if k != "test_type"})
+        result["mediation_ratio"] = self.mediation_ratio
+        return result
+
+
+@dataclass
+class CorrelationResult:
+    """Pearson 相关分析结果（各矩阵均为以变量名为索引的方阵）
+
+    n 为所有变量均有效的样本量；成对删除时每个系数实际使用的样本量见 n_pairs。
+    """
+    variables: list
+    n: int
+    r: pd.DataFrame
+    p: pd.DataFrame
+    n_pairs: pd.DataFrame = None
+    ci_lower: pd.DataFrame = None
+    ci_upper: pd.DataFrame = None
+    test_type: str = "Pearson 相关分析"
+
+    def to_dict(self) -> dict:
+        result = {
+            "test_type": self.test_type,
+            "variables": list(self.variables),
+            "n": self.n,
+            "correlation_matrix": self.r.to_dict(),
+            "p_value_matrix": self.p.to_dict(orient="index")
+        }
+        if self.n_pairs is not None:
+            result["pairwise_n"] = self.n_pairs.to_dict(orient="index")
+        return result
+
+
+@dataclass
+class CorrelationScreenResult:
+    """宽数据的相关筛选结果：只保留最强 / 超过阈值的变量对和计数摘要，不保存完整矩阵"""
+    variables: list
+    pairs: pd.DataFrame  # var1 / var2 / r / n / p / ci_lower / ci_upper，按 |r| 降序
+    summary: dict
+    top_n: int = None
+    threshold: float = None
+    test_type: str = "相关筛选"
+
+    def to_dict(self) -> dict:
+        return {
+            "test_type": self.test_type,
+            "n_variables": len(self.variables),
+            "top_n": self.top_n,
+            "threshold": self.threshold,
+            "summary": dict(self.summary),
+            "top_pairs": [
+                {"var1": row.var1, "var2": row.var2, "r": round(float(row.r), 4),
+                 "n": int(row.n), "p": float(row.p)}
+                for row in self.pairs.itertuples(index=False)
+            ]
+        }
+
+
+@dataclass
+class MultipleChoiceResult:
+    """多选题分析结果：选项频次/占比、共选矩阵、（可选）分组交叉表"""
+    variable: str
+    n: int
+    n_selections: int
+    frequencies: pd.Series
+    percentages: pd.Series
+    co_selection: pd.DataFrame
+    group_var: str = None
+    crosstab: pd.DataFrame = None
+    test_type: str = "多选题分析"
+
+    def to_dict(self) -> dict:
+        result = {
+            "test_type": self.test_type,
+            "variable": self.variable,
+            "n": self.n,
+            "n_selections": self.n_selections,
+            "option_frequencies": {k: int(v) for k, v in self.frequencies.items()},
+            "option_percentages": {k: float(v) for k, v in self.percentages.items()},
+            "co_selection": self.co_selection.to_dict()
+        }
+        if self.crosstab is not None:
+            result["group_var"] = self.group_var
+            result["crosstab"] = self.crosstab.to_dict(orient="index")
+        return result
+
+
+@dataclass
+class GroupedStatsResult:
+    """分组描述统计结果
+
+    table: 行为分组（排序后的取值），列为 (变量或维度名, 统计量) 两级索引，
+           统计量为 n / mean / std / min / q1 / median / q3 / max / skew
+    sizes: 每组总行数（含缺失）
+    """
+    group_var: str
+    columns: list
+    table: pd.DataFrame
+    sizes: pd.Series
+    dimensions: dict = field(default_factory=dict)
+    test_type: str = "分组描述统计"
+
+    def stat(self, column: str, name: str) -> pd.Series:
+        """某一变量/维度在各组的某个统计量"""
+        return self.table[(column, name)]
+
+    def to_dict(self) -> dict:
+        groups = {}
+        for group in self.table.index:
+            groups[str(group)] = {
+                "n_total": int(self.sizes[group]),
+                **{
+                    col: {name: (None if pd.isna(value) else float(value))
+                          for name, value in self.table.loc[group, col].items()}
+                    for col in self.columns
+                }
+            }
+        return {
+            "test_type": self.test_type,
+            "group_var": self.group_var,
+            "columns": list(self.columns),
+            "dimensions": {name: list(items) for name, items in self.dimensions.items()},
+            "groups": groups
+        }
+
+
+@dataclass
+class DescriptiveResult:
+    """描述统计结果
+
+    summaries: 变量名 → 统计字典（type 为 numeric / categorical / multiple_choice / empty）
+    matched: 模糊匹配记录，原始关键词 → 实际变量名
+    """
+    summaries: dict = field(default_factory=dict)
+    matched: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        # 结果对象可能被缓存共享，返回副本以免调用方修改缓存内容
+        return copy.deepcopy(self.summaries)
+
+
+@dataclass
+class NumericSummaryResult:
+    """数值变量描述统计表（每个变量一行）"""
+    table: pd.DataFrame
+    quantile_method: str = EXACT
+    quantile_rank_error: float = 0.0  # 近似分位数的归一化秩误差上界
+
+    def to_dict(self) -> dict:
+        table = self.table.astype(object).where(self.table.notna(), None)
+        return {
+            "quantile_method": self.quantile_method,
+            "quantile_rank_error": self.quantile_rank_error,
+            "variables": table.to_dict(orient="index")
+        }
+
+
+# ================================
+# t 检验 / 方差分析 / 信度
+# ================================
+
+def independent_t_test(df: pd.DataFrame, data_var: str, group_var: str) -> TTestResult:
+    """独立样本 t 检验"""
+    if data_var not in df.columns or group_var not in df.columns:
+        raise StatError(f"变量 {data_var} 或 {group_var} 不存在")
+
+    groups = df[group_var].unique()
+    if len(groups) != 2:
+        raise StatError("分组变量必须恰好有 2 个水平")
+
+    group1 = to_numeric(df.loc[df[group_var] == groups[0], data_var]).dropna()
+    group2 = to_numeric(df.loc[df[group_var] == groups[1], data_var]).dropna()
+    if len(group1) < 2 or len(group2) < 2:
+        raise StatError("每组至少需要2个有效数据点")
+
+    t_stat, p_value = stats.ttest_ind(group1, group2)
+    n1, n2 = len(group1), len(group2)
+    mean1, mean2 = float(group1.mean()), float(group2.mean())
+    std1, std2 = float(group1.std()), float(group2.std())
+
+    # Cohen's d
+    pooled_std = np.sqrt(((n1 - 1) * std1 ** 2 + (n2 - 1) * std2 ** 2) / (n1 + n2 - 2))
+    mean_diff = mean1 - mean2
+    cohens_d = mean_diff / pooled_std
+
+    # 置信区间（t 分布临界值，自由度 n1 + n2 - 2）
+    se_diff = pooled_std * np.sqrt(1 / n1 + 1 / n2)
+    half_width = stats.t.ppf(0.975, n1 + n2 - 2) * se_diff
+
+    return TTestResult(
+        data_var=data_var,
+        group_var=group_var,
+        group1_name=str(groups[0]),
+        group2_name=str(groups[1]),
+        group1_n=n1,
+        group2_n=n2,
+        group1_mean=mean1,
+        group2_mean=mean2,
+        group1_std=std1,
+        group2_std=std2,
+        mean_diff=float(mean_diff),
+        t_statistic=float(t_stat),
+        df=n1 + n2 - 2,
+        p_value=float(p_value),
+        ci_95_lower=float(mean_diff - half_width),
+        ci_95_upper=float(mean_diff + half_width),
+        cohens_d=float(cohens_d),
+        significant=significance_stars(p_value)
+    )
+
+
+def batch_t_test(df: pd.DataFrame, group_var: str, variables: list = None, method: str = "student",
+                 adjust: str = "holm") -> BatchTTestResult:
+    """批量两组比较：多个结果变量按同一个二分组变量一次完成检验，并做多重比较校正
+
+    Args:
+        variables: 结果变量列表，None 表示除分组变量外的全部数值型变量
+        method: student（Student t）/ welch（Welch t）/ mannwhitney（Mann–Whitney U）
+        adjust: holm / bh / none
+    """
+    if method not in batch_tests.METHODS:
+        raise StatError(f"不支持的检验方法：{method}")
+    if adjust not in batch_tests.ADJUST_METHODS:
+        raise StatError(f"不支持的校正方法：{adjust}")
+    if variables is None:
+        variables = [col for col in get_profile(df).numeric_columns() if col != group_var]
+    _require_columns(df, [group_var] + list(variables))
+    if not variables:
+        raise StatError("请至少选择一个结果变量")
+
+    groups = df[group_var].dropna().unique()
+    if len(groups) != 2:
+        raise StatError("分组变量必须恰好有 2 个水平")
+
+    values = df[list(variables)].apply(to_numeric).to_numpy()
+    in_group1 = (df[group_var] == groups[0]).to_numpy()
+    in_group2 = (df[group_var] == groups[1]).to_numpy()
+    if method == "mannwhitney":
+        table = batch_tests.mann_whitney(values, in_group1, in_group2)
+    else:
+        table = batch_tests.t_tests(values, in_group1, in_group2, method=method)
+
+    table.index = list(variables)
+    table["p_adjusted"] = batch_tests.adjust_pvalues(table["p"].to_numpy(), adjust)
+    table["significant"] = [
+        significance_stars(p) if pd.notna(p) else "" for p in table["p_adjusted"]
+    ]
+    return BatchTTestResult(
+        group_var=group_var, group1_name=str(groups[0]), group2_name=str(groups[1]),
+        method=method, adjust=adjust, table=table
+    )
+
+
+def one_sample_t_test(df: pd.DataFrame, variable: str, test_value: float) -> OneSampleTTestResult:
+    """单样本 t 检验"""
+    _require_columns(df, [variable])
+    data = to_numeric(df[variable]).dropna()
+    if len(data) < 2:
+        raise StatError("数据点太少，无法执行t检验（至少需要2个有效数据点）")
+
+    t_stat, p_value = stats.ttest_1samp(data, test_value)
+    return OneSampleTTestResult(
+        variable=variable,
+        n=len(data),
+        mean=float(data.mean()),
+        std=float(data.std()),
+        test_value=test_value,
+        t_statistic=float(t_stat),
+        p_value=float(p_value),
+        significant=significance_stars(p_value)
+    )
+
+
+def paired_t_test(df: pd.DataFrame, var1: str, var2: str) -> PairedTTestResult:
+    """配对样本 t 检验（只使用两次测量都有效的样本）"""
+    _require_columns(df, [var1, var2])
+    data1 = to_numeric(df[var1]).dropna()
+    data2 = to_numeric(df[var2]).dropna()
+    if len(data1) < 2 or len(data2) < 2:
+        raise StatError("数据点太少，无法执行t检验（至少需要2个有效数据点）")
+
+    # 保证配对 - 使用共同的索引
+    common_idx = data1.index.intersection(data2.index)
+    data1 = data1.loc[common_idx]
+    data2 = data2.loc[common_idx]
+    if len(data1) < 2:
+        raise StatError("配对数据点太少，无法执行配对t检验（至少需要2对有效数据）")
+
+    t_stat, p_value = stats.ttest_rel(data1, data2)
+    mean1, mean2 = float(data1.mean()), float(data2.mean())
+    return PairedTTestResult(
+        var1=var1,
+        var2=var2,
+        n=len(data1),
+        mean1=mean1,
+        mean2=mean2,
+        mean_diff=mean1 - mean2,
+        t_statistic=float(t_stat),
+        p_value=float(p_value),
+        significant=significance_stars(p_value)
+    )
+
+
+def one_way_anova(df: pd.DataFrame, data_var: str, group_var: str) -> AnovaResult:
+    """单因素方差分析（附 Levene 方差齐性检验）"""
+    _require_columns(df, [data_var, group_var])
+    groups = df[group_var].unique()
+    group_data = [to_numeric(df.loc[df[group_var] == g, data_var]).dropna() for g in groups]
+
+    # 检查每组至少有数据
+    valid_groups = [g for g in group_data if len(g) >= 1]
+    if len(valid_groups) < 2:
+        raise StatError("至少需要2组有效数据才能进行方差分析")
+
+    f_stat, p_value = f_oneway(*valid_groups)
+    lev_stat, lev_p = levene(*valid_groups)
+    return AnovaResult(
+        dependent=data_var,
+        factor=group_var,
+        n_groups=len(valid_groups),
+        f_statistic=float(f_stat),
+        p_value=float(p_value),
+        levene_statistic=float(lev_stat),
+        levene_p_value=float(lev_p),
+        significant=significance_stars(p_value)
+    )
+
+
+def cronbach_alpha(df: pd.DataFrame, items: list) -> AlphaResult:
+    """Cronbach's Alpha 信度系数"""
+    _require_columns(df, items)
+    data = df[items].apply(to_numeric).dropna()
+    if len(data) < 2:
+        raise StatError("有效数据点太少，无法计算信度（至少需要2个有效数据点）")
+
+    n_items = len(items)
+    item_vars = float(data.var(axis=0).sum())
+    total_var = float(data.sum(axis=1).var())
+    if total_var == 0:
+        raise StatError("数据方差为0，无法计算信度")
+
+    alpha = float((n_items / (n_items - 1)) * (1 - item_vars / total_var))
+    return AlphaResult(n_items=n_items, n=len(data), alpha=alpha)
+
+
+# ================================
+# 相关分析
+# ================================
+
+def pearson_correlation(df: pd.DataFrame, variables: list, listwise: bool = False) -> CorrelationResult:
+    """Pearson 相关分析：r、p、成对样本量和 95% 置信区间一次矩阵运算得到
+
+    Args:
+        listwise: True 时删除任一变量缺失的样本（统计视图的做法），
+            False 时成对删除，每对变量使用二者共同有效的样本
+    """
+    _require_columns(df, variables)
+
+    data = df[variables].apply(to_numeric)
+    n = int(data.notna().all(axis=1).sum())
+    if listwise:
+        data = data.dropna()
+        if len(data) < 3:
+            raise StatError("有效数据点太少，无法进行相关分析（至少需要3个有效数据点）")
+
+    arrays = correlation_arrays(data.to_numpy())
+
+    def frame(values):
+        return pd.DataFrame(values, index=variables, columns=variables)
+
+    return CorrelationResult(
+        variables=list(variables), n=n,
+        r=frame(arrays.r), p=frame(arrays.p), n_pairs=frame(arrays.n),
+        ci_lower=frame(arrays.ci_lower), ci_upper=frame(arrays.ci_upper)
+    )
+
+
+def correlation_screen(df: pd.DataFrame, variables: list = None, top_n: int = 50,
+                       threshold: float = None) -> CorrelationScreenResult:
+    """宽数据相关筛选：分块计算所有变量对（成对删除），只返回最强的 top_n 对 / |r| ≥ threshold 的变量对
+
+    Args:
+        variables: 变量列表，None 表示全部数值型变量
+    """
+    if variables is None:
+        variables = get_profile(df).numeric_columns()
+    _require_columns(df, variables)
+    if len(variables) < 2:
+        raise StatError("至少需要2个变量才能进行相关分析")
+
+    # 按列块转换为数值，不生成整张表的 float64 副本
+    pairs, summary = screen_correlations(df[variables], variables, top_n=top_n, threshold=threshold)
+    return CorrelationScreenResult(
+        variables=list(variables), pairs=pairs, summary=summary, top_n=top_n, threshold=threshold
+    )
+
+
+def correlation_pairs_parquet(df: pd.DataFrame, variables: list, threshold: float = None) -> tuple:
+    """|r| ≥ threshold 的全部变量对逐块写成 Parquet，返回 (文件内容, 变量对数)"""
+    _require_columns(df, variables)
+    buffer = io.BytesIO()
+    written = write_correlation_pairs(df[variables], variables, buffer, threshold=threshold)
+    return buffer.getvalue(), written
+
+
+# ================================
+# 回归 / 中介
+# ================================
+
+def _regression_data(df: pd.DataFrame, variables: list, min_n: int) -> CrossProducts:
+    _require_columns(df, variables)
+    data = df[list(variables)].apply(to_numeric).dropna()
+    if len(data) < min_n:
+        raise StatError(f"有效数据点太少，无法进行回归分析（至少需要{min_n}个有效数据点）")
+    return CrossProducts(data)
+
+
+def linear_regression(df: pd.DataFrame, y_var: str, x_vars: list) -> OLSFit:
+    """线性回归（一元或多元）：系数、标准误、t、p、R²、调整 R²、F 和 VIF"""
+    x_vars = [x for x in x_vars if x != y_var]
+    if not x_vars:
+        raise StatError("至少需要1个自变量")
+    return _regression_data(df, [y_var] + x_vars, len(x_vars) + 2).fit(y_var, x_vars)
+
+
+def mediation_analysis(df: pd.DataFrame, x_var: str, m_var: str, y_var: str) -> MediationResult:
+    """简单中介模型的 a、b、c、c' 路径（间接效应的置信区间见 resampling_inference）"""
+    if len({x_var, m_var, y_var}) < 3:
+        raise StatError("X、M、Y 必须是三个不同的变量")
+    xp = _regression_data(df, [x_var, m_var, y_var], 4)
+    path_a = xp.fit(m_var, [x_var])
+    path_b = xp.fit(y_var, [x_var, m_var])
+    path_c = xp.fit(y_var, [x_var])
+    a = float(path_a.coefficients[x_var])
+    b = float(path_b.coefficients[m_var])
+    return MediationResult(
+        x_var=x_var, m_var=m_var, y_var=y_var, n=xp.n,
+        a=a, p_a=float(path_a.p_values[x_var]),
+        b=b, p_b=float(path_b.p_values[m_var]),
+        c_prime=float(path_b.coefficients[x_var]), p_c_prime=float(path_b.p_values[x_var]),
+        c=float(path_c.coefficients[x_var]), p_c=float(path_c.p_values[x_var]),
+        indirect=a * b
+    )
+
+
+# ================================
+# 重抽样推断
+# ================================
+
+# 分析类型 → 需要的变量个数（None 表示至少 2 个）
+RESAMPLING_ANALYSES = {
+    "mean_difference": 1,
+    "correlation": 2,
+    "alpha": None,
+    "indirect_effect": 3
+}
+
+
+def resampling_inference(df: pd.DataFrame, analysis: str, variables: list, group_var: str = None,
+                         n_resamples: int = resampling.DEFAULT_RESAMPLES, confidence: float = 0.95,
+                         seed: int = 0, n_jobs: int = 1, progress=None) -> ResamplingResult:
+    """Bootstrap 置信区间（均值差、相关、中介效应还给出置换检验 p 值）
+
+    Args:
+        analysis: mean_difference（variables=[数据变量]，需 group_var）/ correlation（[X, Y]）/
+                  alpha（[题目...]）/ indirect_effect（[X, M, Y]）
+        seed: 随机种子，相同种子结果可复现
+        n_jobs: 进程数，None 表示计算量大时自动并行
+        progress: 进度回调 progress(0~1)，供后台任务显示进度和取消
+    """
+    if analysis not in RESAMPLING_ANALYSES:
+        raise StatError(f"不支持的重抽样分析：{analysis}")
+    expected = RESAMPLING_ANALYSES[analysis]
+    if expected is None and len(variables) < 2:
+        raise StatError("至少需要2个题目")
+    if expected is not None and len(variables) != expected:
+        raise StatError(f"该分析需要 {expected} 个变量")
+    if n_resamples < 100:
+        raise StatError("重抽样次数至少为 100")
+    _require_columns(df, list(variables) + ([group_var] if group_var else []))
+    options = dict(n_resamples=n_resamples, seed=seed, n_jobs=n_jobs)
+    # 同时做 Bootstrap 与置换检验时，两步各占一半进度
+    both = analysis in ("mean_difference", "correlation")
+    boot_progress = _scaled_progress(progress, 0.0, 0.5 if both else 1.0)
+    perm_progress = _scaled_progress(progress, 0.5, 0.5)
+
+    if analysis == "mean_difference":
+        if not group_var:
+            raise StatError("均值差分析需要分组变量")
+        groups = df[group_var].dropna().unique()
+        if len(groups) != 2:
+            raise StatError("分组变量必须恰好有 2 个水平")
+        values = to_numeric(df[variables[0]])
+        keep = values.notna() & df[group_var].notna()
+        values = values[keep].to_numpy()
+        in_group1 = (df.loc[keep, group_var] == groups[0]).to_numpy()
+        if in_group1.sum() < 2 or (~in_group1).sum() < 2:
+            raise StatError("每组至少需要2个有效数据点")
+        result = resampling.bootstrap(resampling.mean_difference, [values, in_group1], confidence=confidence,
+                                      strata=in_group1, progress=boot_progress, **options)
+        result.p_value = resampling.permutation_test(
+            resampling.mean_difference, [values, in_group1], permute=1, progress=perm_progress, **options
+        ).p_value
+        return result
+
+    data = df[list(variables)].apply(to_numeric).dropna()
+    if len(data) < 4:
+        raise StatError("有效数据点太少（至少需要4个有效数据点）")
+    columns = [data[col].to_numpy() for col in variables]
+
+    if analysis == "alpha":
+        return resampling.bootstrap(resampling.cronbach_alpha, [data.to_numpy()], confidence=confidence,
+                                    progress=boot_progress, **options)
+    if analysis == "correlation":
+        result = resampling.bootstrap(resampling.pearson_r, columns, confidence=confidence,
+                                      progress=boot_progress, **options)
+        result.p_value = resampling.permutation_test(resampling.pearson_r, columns, permute=1,
+                                                     progress=perm_progress, **options).p_value
+        return result
+    # 间接效应不满足置换检验的零假设结构，只给 Bootstrap 置信区间（区间不含 0 即显著）
+    return resampling.bootstrap(resampling.indirect_effect, columns, confidence=confidence,
+                                progress=boot_progress, **options)
+
+
+def _scaled_progress(progress, start: float, span: float):
+    """把子步骤的进度 0~1 映射到总进度 start ~ start + span"""
+    if progress is None:
+        return None
+    return lambda fraction: progress(start + span * fraction)
+
+
+# ================================
+# 描述统计
+# ================================
+
+def summarize_variable(series: pd.Series, value_labels: dict = None, profile: ColumnProfile = None,
+                       choices: MultipleChoiceMatrix = None, quantile_method: str = EXACT) -> dict:
+    """单个变量的描述统计，自动识别数值 / 分类 / 多选题
+
+    Args:
+        profile: 该列的列概况（来自 get_profile，省去重复的类型判断和计数）
+        choices: 多选题矩阵（来自 get_multiple_choice，可复用缓存）
+        quantile_method: 四分位数的计算方式 exact / sketch / auto（见 quantiles 模块）
+    """
+    value_labels = value_labels or {}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # 筛选后的子集可能带有未出现的类别，频次表中不应出现
+        series = series.cat.remove_unused_categories()
+    if profile is None:
+        profile = profile_column(series)
+    data = series.dropna()
+    missing = profile.missing
+
+    # 安全检查：如果数据为空，返回错误
+    if profile.kind == "empty":
+        return {
+            "type": "empty",
+            "error": "变量中没有有效数据（全部为缺失值）",
+            "n": 0,
+            "missing": missing
+        }
+
+    is_multiple_choice = profile.is_multiple_choice
+
+    # 智能判断：数值型变量但设置了值标签 → 当作分类变量处理
+    # 或者：唯一值很少（≤15个）→ 也当作分类变量
+    is_numeric = profile.is_numeric
+    is_categorical_numeric = is_numeric and (bool(value_labels) or profile.nunique <= 15)
+
+    # 数值型变量（连续型）
+    if is_numeric and not is_categorical_numeric:
+        try:
+            # 三个四分位数一次计算
+            quartiles = compute_quantiles(to_numeric(data).to_numpy(), (0.25, 0.5, 0.75), method=quantile_method)
+            summary = {
+                "type": "numeric",
+                "n": len(data),
+                "mean": float(data.mean()),
+                "std": float(data.std()),
+                "min": float(data.min()),
+                "q1": quartiles[0.25],
+                "median": quartiles[0.5],
+                "q3": quartiles[0.75],
+                "max": float(data.max()),
+                "missing": missing
+            }
+            if quartiles.method == SKETCH:
+                summary["quantile_rank_error"] = quartiles.rank_error
+            return summary
+        except Exception as e:
+            return {
+                "type": "numeric",
+                "error": f"计算数值统计时出错: {str(e)}",
+                "n": len(data),
+                "missing": missing
+            }
+
+    # 🎯 多选题处理（向量化展开为稀疏矩阵）
+    if is_multiple_choice:
+        if choices is None:
+            choices = expand_multiple_choice(series)
+        valid_responses = choices.n_respondents
+        n_selections = choices.n_selections
+
+        # 避免除零错误
+        if valid_responses > 0:
+            option_counts = choices.frequencies()
+            percentages = choices.percentages()
+            avg_per_person = round(n_selections / valid_responses, 2)
+        else:
+            option_counts = pd.Series(dtype=int)
+            percentages = pd.Series(dtype=float)
+            avg_per_person = 0
+
+        return {
+            "type": "multiple_choice",
+            "n": valid_responses,
+            "n_selections": n_selections,
+            "avg_per_person": avg_per_person,
+            "option_frequencies": {k: int(v) for k, v in option_counts.items()},
+            "option_percentages": {k: float(v) for k, v in percentages.items()},
+            "missing": missing
+        }
+
+    # 普通分类变量（包括设置了值标签的数值型变量）
+    try:
+        value_counts = series.value_counts(dropna=True)
+
+        # 合并：数据中的值 + 标签中定义的值，为所有可能的值给出频次（包括0）
+        all_possible_values = set(value_counts.keys())
+        all_possible_values.update(value_labels.keys())
+
+        complete_values = {}
+        complete_percentages = {}
+        for val in _sorted_values(all_possible_values):
+            count = value_counts.get(val, 0)
+            complete_values[val] = int(count)
+            complete_percentages[val] = round((count / len(data) * 100), 2)
+
+        return {
+            "type": "categorical",
+            "n": len(data),
+            "unique": profile.nunique,
+            "all_values": complete_values,
+            "percentages": complete_percentages,
+            "value_labels": value_labels,
+            "missing": missing
+        }
+    except Exception as e:
+        return {
+            "type": "categorical",
+            "n": len(data),
+            "unique": profile.nunique,
+            "error": f"处理分类变量时出错: {str(e)}",
+            "missing": missing
+        }
+
+
+def descriptive_stats(df: pd.DataFrame, variables: list, value_labels: dict = None,
+                      quantile_method: str = EXACT) -> DescriptiveResult:
+    """描述统计 - 自动检测多选题，变量名精确匹配失败时使用模糊匹配
+
+    Args:
+        df: 数据
+        variables: 变量名或关键词列表
+        value_labels: 变量名 → 值标签字典（可选）
+        quantile_method: 四分位数的计算方式 exact / sketch / auto
+    """
+    value_labels = value_labels or {}
+    result = DescriptiveResult()
+    columns = df.columns.tolist()
+    profile = get_profile(df)
+
+    for var in variables:
+        original_var = var
+        if var not in df.columns:
+            matched_var = match_variable(columns, var)
+            if not matched_var:
+                result.summaries[original_var] = {"error": f"变量 '{original_var}' 不存在（也未找到匹配的变量）"}
+                continue
+            var = matched_var
+            result.matched[original_var] = var
+
+        choices = get_multiple_choice(df, var) if profile[var].is_multiple_choice else None
+        result.summaries[var] = summarize_variable(df[var], value_labels.get(var, {}), profile[var], choices,
+                                                   quantile_method)
+
+    return result
+
+
+def describe_numeric(df: pd.DataFrame, variables: list, quantile_method: str = EXACT) -> NumericSummaryResult:
+    """数值变量描述统计表（与 DataFrame.describe().T 相同的列，另含缺失数、偏度、峰度）
+
+    各阶矩对全部列一次累积得到，每列的四分位数一次计算，不再分别调用 describe / skew / kurt。
+    """
+    _require_columns(df, variables)
+    data = df[list(variables)].apply(to_numeric).to_numpy()
+    moments = RunningMoments(list(variables)).update(data)
+    quartiles = [compute_quantiles(data[:, i], (0.25, 0.5, 0.75), method=quantile_method)
+                 for i in range(len(variables))]
+    table = pd.DataFrame({
+        "count": moments.n,
+        "mean": np.where(moments.n > 0, moments.mean, np.nan),
+        "std": moments.std(),
+        "min": moments.min,
+        "25%": [q[0.25] for q in quartiles],
+        "50%": [q[0.5] for q in quartiles],
+        "75%": [q[0.75] for q in quartiles],
+        "max": moments.max,
+        "count_missing": moments.missing,
+        "skewness": moments.skewness(),
+        "kurtosis": moments.kurtosis()
+    }, index=list(variables))
+    approximate = [q.rank_error for q in quartiles if q.method == SKETCH]
+    return NumericSummaryResult(table=table, quantile_method=SKETCH if approximate else EXACT,
+                                quantile_rank_error=max(approximate, default=0.0))
+
+
+def multiple_choice_analysis(df: pd.DataFrame, variable: str, group_var: str = None) -> MultipleChoiceResult:
+    """多选题分析：选项频次与占比、共选矩阵，指定分组变量时给出分组 × 选项交叉表"""
+    _require_columns(df, [variable] + ([group_var] if group_var else []))
+    choices = get_multiple_choice(df, variable)
+    if choices.n_respondents == 0:
+        raise StatError(f"变量 {variable} 没有有效回答")
+
+    result = MultipleChoiceResult(
+        variable=variable,
+        n=choices.n_respondents,
+        n_selections=choices.n_selections,
+        frequencies=choices.frequencies(),
+        percentages=choices.percentages(),
+        co_selection=choices.co_selection()
+    )
+    if group_var:
+        result.group_var = group_var
+        result.crosstab = choices.crosstab(df[group_var])
+    return result
+
+
+# ================================
+# 分组描述统计
+# ================================
+
+GROUPED_STATS = ["n", "mean", "std", "min", "q1", "median", "q3", "max", "skew"]
+
+
+def grouped_stats(df: pd.DataFrame, group_var: str, variables: list = None,
+                  dimensions: dict = None) -> GroupedStatsResult:
+    """分组描述统计：所有变量、所有分组在一次 groupby 中完成
+
+    Args:
+        group_var: 分组变量（缺失值不参与分组）
+        variables: 分别统计的变量
+        dimensions: 维度名 → 题目列表；每个样本先对题目求平均（忽略缺失）得到维度得分，
+                    再按组统计。维度名不能与 variables 重名。
+    """
+    variables = list(variables or [])
+    dimensions = {name: list(items) for name, items in (dimensions or {}).items()}
+    items = [item for dim_items in dimensions.values() for item in dim_items]
+    _require_columns(df, [group_var] + variables + items)
+    if not variables and not dimensions:
+        raise StatError("请至少选择一个变量或维度")
+
+    # 分组编码只计算一次；缺失分组编码为 -1
+    codes, levels = pd.factorize(df[group_var], sort=True)
+    if len(levels) < 2:
+        raise StatError("分组变量至少需要2个不同的值")
+
+    # 每列只转换一次数值类型，维度得分作为派生列
+    numeric = {col: to_numeric(df[col]) for col in dict.fromkeys(variables + items)}
+    work = pd.DataFrame({col: numeric[col] for col in variables}, index=df.index)
+    for name, dim_items in dimensions.items():
+        work[name] = pd.concat([numeric[item] for item in dim_items], axis=1).mean(axis=1)
+    columns = list(work.columns)
+
+    valid = codes >= 0
+    grouped = work[valid].groupby(codes[valid], sort=True)
+    table = grouped.agg(["count", "mean", "std", "min", "max", "skew"])
+    quantiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    for col in columns:
+        table[(col, "q1")] = quantiles[(col, 0.25)]
+        table[(col, "median")] = quantiles[(col, 0.5)]
+        table[(col, "q3")] = quantiles[(col, 0.75)]
+    table = table.rename(columns={"count": "n"}, level=1)
+    table = table.reindex(columns=pd.MultiIndex.from_product([columns, GROUPED_STATS]))
+    table.index = levels[table.index]
+    table.index.name = group_var
+
+    sizes = pd.Series(np.bincount(codes[valid], minlength=len(levels)), index=levels)
+    sizes = sizes.loc[table.index]
+    return GroupedStatsResult(
+        group_var=group_var, columns=columns, table=table, sizes=sizes, dimensions=dimensions
+    )
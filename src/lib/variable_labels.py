@@ -29,6 +29,11 @@ def get_value_labels(var_name: str) -> dict:
     init_value_labels()
     return st.session_state.value_labels.get(var_name, {})
 
+def get_all_value_labels() -> dict:
+    """获取所有变量的值标签（变量名 → 值标签字典）"""
+    init_value_labels()
+    return dict(st.session_state.value_labels)
+
 def get_value_label(var_name: str, value) -> str:
     """获取单个值的标签"""
     labels = get_value_labels(var_name)
@@ -36,12 +41,16 @@ def get_value_label(var_name: str, value) -> str:
         return str(value)
     return labels.get(value, str(value))
 
-def get_labels_context() -> str:
-    """生成包含标签信息的上下文文本，供AI使用"""
+def get_labels_context(variables=None) -> str:
+    """生成包含标签信息的上下文文本，供AI使用；variables 不为空时只包含这些变量"""
     init_value_labels()
     lang = get_lang()
     
-    if not st.session_state.value_labels:
+    value_labels = st.session_state.value_labels
+    if variables is not None:
+        variables = set(variables)
+        value_labels = {var: labels for var, labels in value_labels.items() if var in variables}
+    if not value_labels:
         return ""
     
     if lang == 'zh':
@@ -51,7 +60,7 @@ def get_labels_context() -> str:
         context = "\n## Хувьсагчийн утгын тэмдэглэгээний тайлбар\n"
         context += "💡 Дараах тэмдэглэгээ нь хувьсагчийн бүрэн утгын хүрээг тодорхойлно. Статистикийн үр дүнд тодорхойлсон бүх утгыг харуулна (давтамж=0 ч бай).\n"
     
-    for var_name, labels in st.session_state.value_labels.items():
+    for var_name, labels in value_labels.items():
         var_label = st.session_state.variable_labels.get(var_name, var_name)
         if lang == 'zh':
             context += f"\n**{var_name}** ({var_label}) - 完整值域定义:\n"
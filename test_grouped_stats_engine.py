@@ -0,0 +1,52 @@
+"""
+测试统计引擎的分组描述统计（grouped_stats）与逐组 groupby().agg() 参考结果一致
+"""
+import numpy as np
+import pandas as pd
+from src.lib.stat_engine import grouped_stats
+
+# 构造测试数据：含缺失值、文本数字和缺失分组
+rng = np.random.default_rng(0)
+n = 500
+df = pd.DataFrame({
+    'class': rng.choice(['A', 'B', 'C', None], size=n, p=[0.3, 0.3, 0.3, 0.1]),
+    '1.1': rng.integers(1, 6, size=n).astype(float),
+    '1.2': rng.integers(1, 6, size=n).astype(float),
+    '1.3': rng.normal(3, 1, size=n)
+})
+df.loc[rng.random(n) < 0.1, '1.1'] = np.nan
+df['1.2'] = df['1.2'].astype(str).where(rng.random(n) > 0.05, 'x')  # 无法转换的文本记为缺失
+print(f"✅ 测试数据：{df.shape[0]} 行 × {df.shape[1]} 列")
+
+group_var = 'class'
+vars_to_analyze = ['1.1', '1.3']
+dimension_items = ['1.1', '1.2', '1.3']
+
+result = grouped_stats(df, group_var, variables=vars_to_analyze, dimensions={'维度得分': dimension_items})
+
+# 参考结果：逐列转换为数值后直接 groupby().agg()
+numeric = df[dimension_items].apply(pd.to_numeric, errors='coerce')
+reference = numeric[vars_to_analyze].copy()
+reference['维度得分'] = numeric[dimension_items].mean(axis=1)
+reference[group_var] = df[group_var]
+grouped = reference.groupby(group_var, sort=True)
+expected = grouped.agg(['count', 'mean', 'std', 'min', 'max', 'skew'])
+quantiles = {q: grouped.quantile(q, numeric_only=True) for q in (0.25, 0.5, 0.75)}
+
+print("\n" + "=" * 50)
+print("对比 grouped_stats 与 groupby().agg()")
+print("=" * 50)
+pairs = {'n': 'count', 'mean': 'mean', 'std': 'std', 'min': 'min', 'max': 'max', 'skew': 'skew'}
+for col in vars_to_analyze + ['维度得分']:
+    for name, agg in pairs.items():
+        np.testing.assert_allclose(result.stat(col, name).to_numpy(dtype=float),
+                                   expected[(col, agg)].to_numpy(dtype=float), rtol=1e-12)
+    for name, q in (('q1', 0.25), ('median', 0.5), ('q3', 0.75)):
+        np.testing.assert_allclose(result.stat(col, name).to_numpy(dtype=float),
+                                   quantiles[q][col].to_numpy(dtype=float), rtol=1e-12)
+    print(f"  {col}: ✅")
+
+# 每组总行数（含缺失值）
+np.testing.assert_array_equal(result.sizes.to_numpy(), df.groupby(group_var, sort=True).size().to_numpy())
+print(f"\n分组：{list(result.table.index)}，每组行数：{result.sizes.tolist()}")
+print("\n✅ grouped_stats 与 groupby().agg() 的结果一致")
@@ -0,0 +1,45 @@
+"""
+测试一轮多个工具调用在大数据上的并行执行（后台进程池，每个会话的任务数有上限）
+"""
+import numpy as np
+import pandas as pd
+from src.lib import stat_engine
+from src.lib.job_runner import get_job_runner
+from src.lib.stat_functions import ToolTask, compute_tasks, BACKGROUND_MIN_CELLS, TOOL_WORKERS
+
+
+def main():
+    # 构造超过后台计算阈值的数据
+    n_columns = 10
+    n_rows = BACKGROUND_MIN_CELLS // n_columns + 1
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(n_rows, n_columns)), columns=[f"q{i}" for i in range(n_columns)])
+    df["group"] = rng.integers(0, 2, size=n_rows)
+    print(f"✅ 测试数据：{df.shape[0]} 行 × {df.shape[1]} 列（{df.size} 个单元格）")
+
+    runner = get_job_runner()
+    print(f"每个会话同时进行的后台任务上限：{runner.max_jobs_per_owner}，工具线程数：{TOOL_WORKERS}")
+
+    # 一轮 4 个不同的工具调用，多于每个会话的任务上限
+    owner = "test-owner"
+    tasks = {
+        "t_test": ToolTask(df, stat_engine.independent_t_test, {"data_var": "q0", "group_var": "group"}, owner),
+        "anova": ToolTask(df, stat_engine.one_way_anova, {"data_var": "q1", "group_var": "group"}, owner),
+        "correlation": ToolTask(df, stat_engine.pearson_correlation, {"variables": ["q2", "q3", "q4"]}, owner),
+        "alpha": ToolTask(df, stat_engine.cronbach_alpha, {"items": ["q5", "q6", "q7"]}, owner),
+    }
+    assert len(tasks) > runner.max_jobs_per_owner
+
+    results = compute_tasks(tasks)
+    for key, result in results.items():
+        status = f"❌ {result['error']}" if "error" in result else "✅"
+        print(f"  {key}: {status}")
+
+    errors = {key: result["error"] for key, result in results.items() if "error" in result}
+    assert not errors, f"工具调用失败：{errors}"
+    print("\n✅ 4 个工具调用全部完成，超过上限的调用排队等待而没有失败")
+
+
+if __name__ == "__main__":
+    # 后台进程池使用 spawn，测试代码必须放在 __main__ 保护中
+    main()